@@ -0,0 +1,135 @@
+import os
+import sys
+import inspect
+import random
+import argparse
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+
+sys.path.insert(0, parentdir + '/fan-controller')
+
+from engine.control.controller import Controller
+from engine.control.model import ThermalModel
+from engine.control.output import Output
+from engine.control.plant import Plant
+from engine.rotation.curve import Curve
+
+def simulate(mode: str, args):
+    """
+    Runs a control loop against the thermal plant, with a heat load step halfway through.
+
+    Returns:
+    - (list, int, int) : (time, temperature) samples, duty cycle changes calculated & duty cycle writes after the output stage;
+    """
+    rng = random.Random(args.seed)
+    # Cold start, the chassis heats up from ambient with the fans at their lowest
+    plant = Plant(args.ambient, args.heat_load, args.efficiency, args.time_constant, args.ambient)
+    curve = Curve(args.min_temp, args.max_temp, args.min_rotation, args.max_rotation, args.control_temp, args.control_rotation)
+    controller = Controller()
+    controller.configure(mode, args.target, args.kp, args.ki, args.kd, args.derivative_filter, args.min_rotation, args.max_rotation)
+    # The model as fitted, before the heat load step it does not know about
+    controller.setModel(ThermalModel(args.ambient, args.heat_load, args.heat_load * args.efficiency / 100, args.time_constant), args.max_temp - args.margin, args.horizon, args.offset_filter)
+    output = Output()
+    output.configure(args.temp_deadband if mode == 'curve' else 0, args.duty_deadband, args.slew_rate, args.write_interval, args.min_rotation, args.max_rotation)
+
+    samples = []
+    changes = 0
+    writes = 0
+    calculated = -1
+    current = -1
+    steps = int(args.duration / args.interval)
+
+    for step in range(steps):
+        now = step * args.interval
+        if step == steps // 2:
+            plant.setHeatLoad(args.heat_load + args.load_step)
+
+        # Sensor as read on the Pi: noisy, 1/16 degree resolution
+        temperature = round((plant.getTemperature() + rng.gauss(0, args.noise)) * 16) / 16
+        samples.append((now, plant.getTemperature()))
+
+        # Same bounds & truncation as the engine zone iteration
+        rotation = controller.calculate(temperature, curve.calculate(temperature)[0] if controller.usesCurve() else None, now)
+        if rotation is not None:
+            rotation = min(max(int(rotation), args.min_rotation), args.max_rotation)
+            if rotation != calculated:
+                calculated = rotation
+                changes += 1
+            dutyCycle, suppressed = output.update(rotation, temperature, now)
+            if dutyCycle is not None and dutyCycle != current:
+                current = dutyCycle
+                writes += 1
+
+        plant.advance(max(current, 0) / 100, args.interval)
+
+    return samples, changes, writes
+
+def analyse(samples: list, band: float, tail: float):
+    """
+    Measures how a phase settles, against the mean temperature of its last tail seconds.
+
+    Returns:
+    - (float, float, float) : settling time (secs), overshoot (degrees past the final value) & final temperature;
+    """
+    start = samples[0][0]
+    end = samples[-1][0]
+    tailValues = [temperature for timestamp, temperature in samples if timestamp >= end - tail]
+    final = sum(tailValues) / len(tailValues)
+
+    settled = start
+    for timestamp, temperature in samples:
+        if abs(temperature - final) > band:
+            settled = timestamp
+
+    direction = 1 if samples[0][1] > final else -1
+    overshoot = max(0.0, max(direction * (final - temperature) for timestamp, temperature in samples))
+
+    return settled - start, overshoot, final
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the control modes against a simulated thermal plant: settling time, overshoot & duty cycle writes, on startup and after a heat load step. Pass 0 to the output stage options to measure without it.')
+    parser.add_argument('--modes', default='curve,pid,pid+curve,mpc', help='Comma separated [Control][Mode] values to compare')
+    parser.add_argument('--duration', type=float, default=14400, help='Simulated seconds, the heat load steps up halfway through')
+    parser.add_argument('--interval', type=float, default=5, help='Seconds between iterations')
+    parser.add_argument('--band', type=float, default=0.5, help='Degrees around the final temperature a phase is settled within')
+    parser.add_argument('--seed', type=int, default=1, help='Sensor noise seed')
+    parser.add_argument('--ambient', type=float, default=22)
+    parser.add_argument('--heat-load', type=float, default=16)
+    parser.add_argument('--load-step', type=float, default=4, help='Heat load added halfway through')
+    parser.add_argument('--efficiency', type=float, default=0.8)
+    parser.add_argument('--time-constant', type=float, default=120)
+    parser.add_argument('--noise', type=float, default=0.05)
+    parser.add_argument('--min-temp', type=float, default=20)
+    parser.add_argument('--max-temp', type=float, default=36)
+    parser.add_argument('--control-temp', type=float, default=36)
+    parser.add_argument('--min-rotation', type=int, default=18)
+    parser.add_argument('--max-rotation', type=int, default=100)
+    parser.add_argument('--control-rotation', type=float, default=70)
+    parser.add_argument('--target', type=float, default=30)
+    parser.add_argument('--kp', type=float, default=12)
+    parser.add_argument('--ki', type=float, default=0.1)
+    parser.add_argument('--kd', type=float, default=0)
+    parser.add_argument('--derivative-filter', type=float, default=10)
+    parser.add_argument('--horizon', type=float, default=180)
+    parser.add_argument('--margin', type=float, default=1)
+    parser.add_argument('--offset-filter', type=float, default=120)
+    parser.add_argument('--temp-deadband', type=float, default=0.25)
+    parser.add_argument('--duty-deadband', type=int, default=2)
+    parser.add_argument('--slew-rate', type=float, default=10)
+    parser.add_argument('--write-interval', type=float, default=0)
+    args = parser.parse_args()
+
+    print('{0:>10} | {1:>12} | {2:>12} | {3:>10} | {4:>10} | {5:>10} | {6:>12} | {7:>12}'.format('Mode', 'Settle (s)', 'Step (s)', 'Overshoot', 'Changes', 'Writes', 'Final (C)', 'Step (C)'))
+
+    for mode in args.modes.split(','):
+        samples, changes, writes = simulate(mode, args)
+        half = len(samples) // 2
+        tail = args.duration / 8
+        settle, overshoot, final = analyse(samples[:half], args.band, tail)
+        stepSettle, stepOvershoot, stepFinal = analyse(samples[half:], args.band, tail)
+
+        print('{0:>10} | {1:>12.0f} | {2:>12.0f} | {3:>10.2f} | {4:>10} | {5:>10} | {6:>12.2f} | {7:>12.2f}'.format(mode, settle, stepSettle, max(overshoot, stepOvershoot), changes, writes, final, stepFinal))
+
+if __name__ == '__main__':
+    main()
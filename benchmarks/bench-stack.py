@@ -0,0 +1,33 @@
+import os
+import sys
+import inspect
+import random
+import timeit
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+
+sys.path.insert(0, parentdir + '/fan-controller')
+
+from engine.tacho.stack import Stack
+
+# Window sizes to measure, cost per operation should stay flat across them
+sizes = [15, 150, 1500, 15000]
+operations = 20000
+
+print('{0:>8} | {1:>12} | {2:>12} | {3:>12} | {4:>12}'.format('Window', 'push (ns)', 'average (ns)', 'repeated (ns)', 'variance (ns)'))
+
+for size in sizes:
+    stack = Stack(size)
+    values = [random.randint(0, 40) for _ in range(operations)]
+
+    # Fill the window so pushes evict
+    for value in values[:size]:
+        stack.push(value)
+
+    push = timeit.timeit(lambda: [stack.push(value) for value in values], number=1) / operations
+    average = min(timeit.repeat(stack.getAverage, number=operations, repeat=3)) / operations
+    repeated = min(timeit.repeat(stack.getRepeated, number=operations, repeat=3)) / operations
+    variance = min(timeit.repeat(stack.getVariance, number=operations, repeat=3)) / operations
+
+    print('{0:>8} | {1:>12.0f} | {2:>12.0f} | {3:>12.0f} | {4:>12.0f}'.format(size, push * 1e9, average * 1e9, repeated * 1e9, variance * 1e9))
@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import inspect
+import argparse
+import platform
+import tempfile
+import timeit
+import configparser
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+
+sys.path.insert(0, parentdir + '/fan-controller')
+
+from config.config import Config
+from log.logger import Logger
+from engine.engine import Engine
+from engine.rotation.rotation import Rotation
+from engine.tacho.stack import Stack
+from engine.failure.failure import Failures
+from engine.temperature.filter import Filter
+
+# Baselines are stored per machine, results are only comparable on the same hardware
+BASELINE = currentdir + '/baselines/{0}.json'.format(platform.machine() or 'unknown')
+
+def setUp(workdir: str):
+    """
+    Builds a config, logger & engine running on the simulated backend within workdir.
+
+    Returns:
+    - (Config, Logger, Engine)
+    """
+    parser = configparser.ConfigParser()
+    parser.optionxform = str
+    parser.read(parentdir + '/data/config/sample.default.ini')
+    parser['Hardware']['Backend'] = 'simulated'
+    parser['Telemetry']['Path'] = workdir + '/telemetry.ring'
+    parser['Faults']['HistoryPath'] = workdir + '/faults.jsonl'
+    parser['Api']['StatusPath'] = workdir + '/status'
+    parser['Metrics']['Port'] = '0'
+
+    os.makedirs(workdir + '/data/config')
+    with open(workdir + '/data/config/default.ini', 'w') as f:
+        parser.write(f)
+
+    config = Config(workdir + '/data/config/default.ini')
+    logger = Logger(workdir + '/data/logs/', 'bench', verbose=False, debug=False)
+    engine = Engine(config, logger)
+
+    return config, logger, engine
+
+def getBenchmarks(config: Config, logger: Logger, engine: Engine):
+    """
+    Returns the benchmarks, as name -> (callable, operations per call).
+    """
+    benchmarks = {}
+
+    rotation = Rotation(config, logger)
+    temperatures = [20 + step * 0.0625 for step in range(256)]
+    benchmarks['rotation.calculate'] = (lambda: [rotation.calculate(temperature) for temperature in temperatures], len(temperatures))
+
+    stack = Stack(config.getSnapshot().Fan.TachoWindowSize)
+    values = [(step * 7) % 41 for step in range(1000)]
+    # Fill the window so pushes evict
+    for value in values:
+        stack.push(value)
+    benchmarks['stack.push'] = (lambda: [stack.push(value) for value in values], len(values))
+    benchmarks['stack.getAverage'] = (stack.getAverage, 1)
+    benchmarks['stack.getRepeated'] = (stack.getRepeated, 1)
+
+    benchmarks['logger.log'] = (lambda: [logger.info('Bench', message='Iteration measured: Temp [{0}C]'.format(step)) for step in range(1000)], 1000)
+    # Debug lines dropped by the level, as every curve calculation logs: nothing may be formatted
+    benchmarks['logger.disabled'] = (lambda: [logger.debug('Bench', 'Calculation: curTemp[{0}] output[{1},{2}], Tach [{3},{4}], Speed [{5}rpm], Zone [{6}], Took [{7:.2f}ms], Step [{8}]', 30.5, 45, 30.5, 40, 2, 1200, 'Default', 0.2, step) for step in range(1000)], 1000)
+    # Lines kept with structured fields, formatted by the writer thread
+    benchmarks['logger.structured'] = (lambda: [logger.info('Bench', message='Iteration measured: Temp [{temperature}C], RPM [{dutyCycle}%]', temperature=step, dutyCycle=45) for step in range(1000)], 1000)
+
+    benchmarks['config.get'] = (lambda: config.get('Temperature', 'MinTemp'), 1)
+    benchmarks['config.snapshot'] = (lambda: config.getSnapshot().Temperature.MinTemp, 1)
+
+    failures = Failures()
+    def cycle():
+        failures.report('temp_reading')
+        failures.exists('temp_reading')
+        failures.getFault('temp_reading').getAge()
+        failures.clear('temp_reading')
+    benchmarks['failures.cycle'] = (cycle, 1)
+
+    # Fault rules evaluated against a healthy zone, as every iteration does
+    faults = engine._Engine__faults
+    zone = engine.getZones()[0]
+    healthy = {'temperature': 30.0, 'rotation': 50, 'minTemp': 20.0, 'stopped': False, 'tachLikelyStopped': False, 'rpm': 1200}
+    benchmarks['faults.evaluate'] = (lambda: faults.evaluate(zone, healthy), 1)
+
+    # Sensor readings through the whole filter chain, 1/16 degree steps around a slow rise
+    sensorFilter = Filter.fromSection(config.getSnapshot().Filter)
+    readings = [(30 + (step // 8 + step % 3) * 0.0625, step * 2.0) for step in range(1000)]
+    def filterReadings():
+        sensorFilter.reset()
+        for value, timestamp in readings:
+            sensorFilter.update(value, timestamp)
+    benchmarks['filter.update'] = (filterReadings, len(readings))
+
+    # A whole engine iteration, every zone included, on the simulated hardware
+    benchmarks['engine.iterate'] = (engine._Engine__iterate, 1)
+
+    return benchmarks
+
+def run(benchmarks: dict, repeat: int, budget: float):
+    """
+    Times each benchmark, keeping the fastest of repeat rounds of ~budget secs.
+
+    Returns:
+    - dict : name -> nanoseconds per operation;
+    """
+    results = {}
+    for name, (function, operations) in benchmarks.items():
+        # Calibrate the number of calls so a round lasts about budget secs
+        number = 1
+        while True:
+            elapsed = timeit.timeit(function, number=number)
+            if elapsed >= budget / 10 or number >= 1 << 20:
+                break
+            number *= 2
+        number = max(1, int(number * budget / max(elapsed, 1e-9)))
+
+        best = min(timeit.repeat(function, number=number, repeat=repeat))
+        results[name] = best / number / operations * 1e9
+    return results
+
+async def measure(args):
+    """
+    Runs the benchmarks within a throwaway working directory.
+
+    Returns:
+    - dict : name -> nanoseconds per operation;
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        config, logger, engine = setUp(workdir)
+        # The engine loop is driven by the benchmark, only the temperature sampler runs
+        temperature = engine._Engine__temperature
+        temperature.start()
+        await temperature.waitReady(timeout=5)
+
+        try:
+            benchmarks = {name: benchmark for name, benchmark in getBenchmarks(config, logger, engine).items() if args.filter in name}
+            # Timed off the event loop, so the sampler keeps readings fresh meanwhile
+            return await asyncio.to_thread(run, benchmarks, args.repeat, args.budget)
+        finally:
+            await engine.stop()
+            logger.close()
+
+def compare(baseline: dict, results: dict, threshold: float):
+    """
+    Compares results with a baseline.
+
+    Returns:
+    - list : (name, baseline ns, current ns, change ratio, regressed) per benchmark found in both;
+    """
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        change = current / previous - 1 if previous > 0 else 0.0
+        rows.append((name, previous, current, change, change > threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Times the daemon hot paths against the simulated hardware, saving & comparing JSON baselines.')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=5, help='Rounds per benchmark, the fastest is kept')
+    parser.add_argument('--budget', type=float, default=0.2, help='Target seconds per round')
+    parser.add_argument('--save', nargs='?', const=BASELINE, help='Write the results as a baseline, to {0} by default'.format(os.path.relpath(BASELINE, parentdir)))
+    parser.add_argument('--compare', nargs='?', const=BASELINE, help='Compare the results with a baseline, exits with 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Slowdown ratio reported as a regression')
+    args = parser.parse_args()
+
+    results = asyncio.run(measure(args))
+
+    regressions = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+        print('{0:<20} | {1:>14} | {2:>14} | {3:>8} |'.format('Benchmark', 'Baseline (ns)', 'Current (ns)', 'Change'))
+        for name, previous, current, change, regressed in compare(baseline, results, args.threshold):
+            print('{0:<20} | {1:>14.0f} | {2:>14.0f} | {3:>+7.1%} | {4}'.format(name, previous, current, change, 'REGRESSION' if regressed else ''))
+            regressions += regressed
+    else:
+        print('{0:<20} | {1:>14} |'.format('Benchmark', 'Time (ns/op)'))
+        for name, value in results.items():
+            print('{0:<20} | {1:>14.0f} |'.format(name, value))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({
+                'meta': {
+                    'date': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                    'processor': platform.processor(),
+                },
+                'results': {name: round(value, 1) for name, value in results.items()},
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('Baseline written to {0}'.format(args.save))
+
+    if regressions:
+        print('{0} benchmark(s) regressed by more than {1:.0%}'.format(regressions, args.threshold))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import socket
+import inspect
+import argparse
+
+from datetime import datetime
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+
+sys.path.insert(0, parentdir + '/fan-controller')
+
+from api.status import StatusPage
+
+# Seconds to wait for the daemon to answer a command
+TIMEOUT = 5
+
+def status(args):
+    try:
+        page = StatusPage(args.status, readOnly=True)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    try:
+        values = page.read()
+    finally:
+        page.close()
+
+    if args.json:
+        print(json.dumps(values, indent=2))
+        return 0
+
+    age = time.time() - values['updated']
+    print('Fan Controller [pid {0}], up since {1}, updated {2:.1f}s ago{3}'.format(values['pid'], datetime.fromtimestamp(values['started']).strftime('%Y-%m-%d %H:%M:%S'), age, ' (stale)' if values['period'] > 0 and age > values['period'] * 3 else ''))
+    print('Loop: Period [{0:.2f}s], Iterations [{1}], Overruns [{2}], Jitter [{3:.2f}ms]'.format(values['period'], values['iterations'], values['overruns'], values['jitter'] * 1000))
+    print('{0:<16} {1:>9} {2:>6} {3:>6} {4:>6} {5:>5} {6:>6} {7:>10}  {8}'.format('Zone', 'Temp', 'Duty', 'RPM', 'Relay', 'Fans', 'Panic', 'Iteration', 'Faults'))
+    for zone in values['zones']:
+        duty = '-' if zone['dutyCycle'] is None else '{0}%'.format(zone['dutyCycle'])
+        if zone['override'] is not None:
+            duty += '*'
+        print('{0:<16} {1:>9} {2:>6} {3:>6} {4:>6} {5:>5} {6:>6} {7:>10}  {8}'.format(
+            zone['name'],
+            'n/a' if zone['temperature'] is None else '{0:.2f}C'.format(zone['temperature']),
+            duty,
+            zone['rpm'],
+            'ON' if zone['relayOn'] else 'OFF',
+            'ON' if zone['fanOn'] else 'OFF',
+            'YES' if zone['panic'] else 'no',
+            '{0:.2f}ms'.format(zone['iteration'] * 1000),
+            ', '.join(zone['faults']) or '-'))
+    for zone in values['zones']:
+        if zone['override'] is not None:
+            print('* Duty cycle of zone {0} overridden for another {1:.0f} secs'.format(zone['name'], max(zone['override'][1] - time.time(), 0)))
+    return 0
+
+def send(path: str, request: dict):
+    """
+    Sends a command to the daemon control socket.
+
+    Returns:
+    - dict : The daemon response;
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(TIMEOUT)
+        client.connect(path)
+        client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        response = b''
+        while not response.endswith(b'\n'):
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            response += chunk
+    return json.loads(response)
+
+def command(args):
+    request = {'command': args.command}
+    if args.command == 'override':
+        request.update({'zone': args.zone, 'duty': None if args.clear else args.duty, 'duration': args.duration})
+    elif args.command == 'panic-test':
+        request.update({'zone': args.zone, 'duration': args.duration})
+    elif args.command == 'silence':
+        request.update({'duration': args.duration})
+    elif args.command == 'log-level':
+        request.update({'level': args.level})
+
+    try:
+        response = send(args.socket, request)
+    except (OSError, ValueError) as e:
+        print('Cannot reach the daemon on {0}: {1}'.format(args.socket, repr(e)), file=sys.stderr)
+        return 1
+
+    if not response.get('ok'):
+        print('Rejected: {0}'.format(response.get('error')), file=sys.stderr)
+        return 1
+    print('OK')
+    return 0
+
+def main():
+    argParser = argparse.ArgumentParser(description='Raspberry PI : Fan Controller - Live status & runtime commands')
+    argParser.add_argument('--status', dest='status', default='/dev/shm/fan-controller.status', help='Status page, see [Api][StatusPath]')
+    argParser.add_argument('--socket', dest='socket', default=parentdir + '/data/run/control.sock', help='Control socket, see [Api][SocketPath]')
+    commands = argParser.add_subparsers(dest='command', required=True)
+
+    statusParser = commands.add_parser('status', help='Print the live status, read from the status page')
+    statusParser.add_argument('--json', dest='json', action='store_true', help='Print as JSON')
+
+    overrideParser = commands.add_parser('override', help='Hold a zone duty cycle for a while')
+    overrideParser.add_argument('duty', type=int, nargs='?', default=None, help='Duty cycle in percentage')
+    overrideParser.add_argument('--zone', dest='zone', default=None, help='Zone name, optional with a single zone')
+    overrideParser.add_argument('--duration', dest='duration', type=float, default=300, help='Secs the override lasts for')
+    overrideParser.add_argument('--clear', dest='clear', action='store_true', help='Clear the override')
+
+    panicParser = commands.add_parser('panic-test', help='Enter panic mode (relay on, full duty cycle, alarm) for a while')
+    panicParser.add_argument('--zone', dest='zone', default=None, help='Zone name, optional with a single zone')
+    panicParser.add_argument('--duration', dest='duration', type=float, default=10, help='Secs before the zone is reset')
+
+    silenceParser = commands.add_parser('silence', help='Silence the buzzer')
+    silenceParser.add_argument('--duration', dest='duration', type=float, default=3600, help='Secs to keep the buzzer quiet, 0 lifts the silence')
+
+    levelParser = commands.add_parser('log-level', help='Change the log level until restart')
+    levelParser.add_argument('level', choices=('debug', 'info', 'warning', 'error'))
+
+    args = argParser.parse_args()
+    if args.command == 'override' and args.duty is None and not args.clear:
+        argParser.error('override needs a duty cycle, or --clear')
+
+    try:
+        sys.exit(status(args) if args.command == 'status' else command(args))
+    except BrokenPipeError:
+        # Output piped to e.g. head, which exited early
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import os
+import json
+import math
+import asyncio
+
+from config.config import Config
+from log.logger import Logger
+
+class Server:
+    """
+    Runtime commands over a Unix domain socket, see [Api] config section.
+
+    Requests & responses are single JSON lines, e.g. {"command": "override", "zone": "Default", "duty": 60,
+    "duration": 300} answered by {"ok": true}, or {"ok": false, "error": "..."}. Commands are run by the event loop,
+    between engine iterations. Access is controlled by the socket file permissions.
+    """
+
+    COMMANDS = ('override', 'panic-test', 'silence', 'log-level')
+
+    # Seconds a client gets to send its request
+    REQUEST_TIMEOUT = 5
+
+    # Socket file permissions, owner & group
+    MODE = 0o660
+
+    def __init__(self, config: Config, logger: Logger, engine):
+        self.__config = config
+        self.__logger = logger
+        self.__engine = engine
+        self.__server = None
+        self.__path = None
+
+    async def start(self):
+        path = self.__config.getSnapshot().Api.SocketPath
+        if not path:
+            return
+
+        try:
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            # A socket left behind by a crashed run would fail the bind
+            if os.path.exists(path):
+                os.unlink(path)
+            self.__server = await asyncio.start_unix_server(self.__handle, path)
+            os.chmod(path, self.MODE)
+            self.__path = path
+            self.__logger.info('Api', message='Accepting commands on {0}'.format(path))
+        except OSError as e:
+            self.__server = None
+            self.__logger.error('Api', message='Cannot listen for commands on {0}: {1}'.format(path, repr(e)))
+
+    async def stop(self):
+        if self.__server is None:
+            return
+        self.__server.close()
+        await self.__server.wait_closed()
+        self.__server = None
+        try:
+            os.unlink(self.__path)
+        except FileNotFoundError:
+            pass
+
+    def execute(self, request: dict):
+        """
+        Runs a command.
+
+        Returns:
+        - dict : Command result, merged into the response;
+
+        Raises:
+        - ValueError : When the command or its arguments are not valid;
+        """
+        command = request.get('command')
+        maxDuration = self.__config.getSnapshot().Api.MaxOverrideTime
+
+        if command == 'override':
+            zone = self.__getZone(request)
+            duty = request.get('duty')
+            if duty is None:
+                zone.setOverride(None, 0)
+                return {}
+            if not Server.__isNumber(duty) or not 0 <= duty <= 100:
+                raise ValueError('duty must be between 0 and 100')
+            zone.setOverride(int(duty), self.__getDuration(request, maxDuration))
+            return {'expires': zone.getOverride()[1]}
+
+        if command == 'panic-test':
+            zone = self.__getZone(request)
+            self.__engine.testPanic(zone, self.__getDuration(request, maxDuration))
+            return {}
+
+        if command == 'silence':
+            self.__engine.silenceBuzzer(self.__getDuration(request, maxDuration, allowZero=True))
+            return {}
+
+        if command == 'log-level':
+            level = request.get('level')
+            if level not in Logger.LEVELS:
+                raise ValueError('level must be one of {0}'.format(', '.join(Logger.LEVELS)))
+            self.__logger.info('Api', message='Log level set to {0}'.format(level))
+            self.__logger.setLevel(level)
+            return {}
+
+        raise ValueError('Unknown command "{0}", expected one of {1}'.format(command, ', '.join(self.COMMANDS)))
+
+    def __getZone(self, request: dict):
+        zones = self.__engine.getZones()
+        name = request.get('zone')
+        # The zone may be left out when there is only one
+        if name is None and len(zones) == 1:
+            return zones[0]
+        zone = self.__engine.getZone(name) if name is not None else None
+        if zone is None:
+            raise ValueError('zone must be one of {0}'.format(', '.join(zone.getName() for zone in zones)))
+        return zone
+
+    @staticmethod
+    def __getDuration(request: dict, maxDuration: float, allowZero: bool = False):
+        duration = request.get('duration')
+        if not Server.__isNumber(duration) or duration < 0 or (duration == 0 and not allowZero) or duration > maxDuration:
+            raise ValueError('duration must be in secs, up to {0:g}'.format(maxDuration))
+        return duration
+
+    @staticmethod
+    def __isNumber(value):
+        # JSON accepts NaN & Infinity, which pass every range check, & booleans are ints
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+    async def __handle(self, reader, writer):
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.REQUEST_TIMEOUT)
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('request must be a JSON object')
+                response = dict(self.execute(request), ok=True)
+            except ValueError as e:
+                response = {'ok': False, 'error': str(e)}
+                self.__logger.warning('Api', message='Rejected command {0}: {1}'.format(line.decode('utf-8', 'replace').strip(), str(e)))
+
+            writer.write(json.dumps(response).encode('utf-8') + b'\n')
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
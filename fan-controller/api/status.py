@@ -0,0 +1,166 @@
+import os
+import mmap
+import math
+import struct
+import time
+
+from config.schema import MAX_ZONE_NAME_BYTES, MAX_FAULT_ID_BYTES
+
+class StatusPage:
+    """
+    The live daemon status, published in a memory mapped page (e.g. under /dev/shm), see [Api] config section.
+
+    The engine overwrites the page after every iteration, readers map the file and copy it out without any round
+    trip to the daemon. A sequence number guards consistency: it is odd while the page is written, readers retry
+    when it is odd or changed during their copy.
+    """
+
+    MAGIC = b'FCST'
+    VERSION = 1
+    SIZE = 4096
+
+    # magic, version, zone count, pid, sequence, updated (epoch secs), started (epoch secs), period (secs),
+    # last jitter (secs), iterations, overruns
+    HEADER = struct.Struct('<4sHHIQddffII')
+    HEADER_SIZE = 64
+
+    # Fault ids in status bit order
+    FAULT = struct.Struct('<{0}s'.format(MAX_FAULT_ID_BYTES))
+    MAX_FAULTS = 8
+
+    # name, temperature (NaN when invalid), duty cycle (-1 until set), rpm, relay on, fans on, panic,
+    # override duty cycle (255 when none), fault bits, iteration time (secs), override expiry (epoch secs)
+    ZONE = struct.Struct('<{0}sfhHBBBBIfd'.format(MAX_ZONE_NAME_BYTES))
+    NO_OVERRIDE = 255
+
+    ZONES_OFFSET = HEADER_SIZE + FAULT.size * MAX_FAULTS
+    MAX_ZONES = (SIZE - ZONES_OFFSET) // ZONE.size
+
+    # Copies attempted before a reader gives up on a page being rewritten
+    READ_ATTEMPTS = 100
+
+    def __init__(self, path: str, readOnly: bool = False):
+        """
+        Opens a status page, created (or truncated) by the writer.
+
+        Raises:
+        - ValueError : When the page is missing or not a status page, in read only mode;
+        - OSError : When the page cannot be created;
+        """
+        self.__path = path
+        self.__readOnly = readOnly
+        self.__sequence = 0
+
+        if readOnly:
+            if not os.path.exists(path):
+                raise ValueError('Status page not found, is the daemon running? {0}'.format(path))
+            self.__file = open(path, 'rb')
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.__map[:4] != self.MAGIC or struct.unpack_from('<H', self.__map, 4)[0] != self.VERSION:
+                self.close()
+                raise ValueError('Not a status page (or an unsupported version): {0}'.format(path))
+            return
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.__file = open(path, 'w+b')
+        self.__file.truncate(self.SIZE)
+        self.__map = mmap.mmap(self.__file.fileno(), self.SIZE, access=mmap.ACCESS_WRITE)
+        self.__started = time.time()
+        self.__faults = []
+        # Readers can tell the daemon is up before its first iteration
+        self.HEADER.pack_into(self.__map, 0, self.MAGIC, self.VERSION, 0, os.getpid(), self.__sequence, self.__started, self.__started, 0, 0, 0, 0)
+
+    def getPath(self):
+        return self.__path
+
+    def close(self, unlink: bool = False):
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        self.__file.close()
+        if unlink:
+            try:
+                os.unlink(self.__path)
+            except FileNotFoundError:
+                pass
+
+    def publish(self, faults: list, zones: list, loop: dict, period: float):
+        """
+        Overwrites the page.
+
+        Parameters:
+        - faults (list): Fault ids, in status bit order;
+        - zones (list): dict per zone: name, temperature, dutyCycle, rpm, relayOn, fanOn, panic, faults, iteration, override (duty, expiry epoch) or None;
+        - loop (dict): Scheduler statistics, see Scheduler.getStats();
+        - period (float): Current period between iterations in secs;
+        """
+        zones = zones[:self.MAX_ZONES]
+        self.__sequence += 1
+        struct.pack_into('<Q', self.__map, 12, self.__sequence)
+
+        if faults != self.__faults:
+            self.__faults = list(faults)
+            for index in range(self.MAX_FAULTS):
+                self.FAULT.pack_into(self.__map, self.HEADER_SIZE + index * self.FAULT.size, faults[index].encode('utf-8') if index < len(faults) else b'')
+
+        for index, zone in enumerate(zones):
+            override = zone['override']
+            self.ZONE.pack_into(self.__map, self.ZONES_OFFSET + index * self.ZONE.size,
+                zone['name'].encode('utf-8'),
+                math.nan if zone['temperature'] is None else zone['temperature'],
+                -1 if zone['dutyCycle'] is None else int(zone['dutyCycle']),
+                min(max(int(zone['rpm'] or 0), 0), 65535),
+                1 if zone['relayOn'] else 0,
+                1 if zone['fanOn'] else 0,
+                1 if zone['panic'] else 0,
+                self.NO_OVERRIDE if override is None else int(override[0]),
+                zone['faults'],
+                zone['iteration'],
+                0 if override is None else override[1])
+
+        self.__sequence += 1
+        self.HEADER.pack_into(self.__map, 0, self.MAGIC, self.VERSION, len(zones), os.getpid(), self.__sequence, time.time(), self.__started, period, loop['jitter'], loop['iterations'], loop['overruns'])
+
+    def read(self):
+        """
+        Copies the page out, retrying while it is being rewritten.
+
+        Returns:
+        - dict : pid, updated, started, period, jitter, iterations, overruns, faults (ids) & zones (dict per zone, see publish());
+
+        Raises:
+        - ValueError : When no consistent copy could be made;
+        """
+        for attempt in range(self.READ_ATTEMPTS):
+            sequence = struct.unpack_from('<Q', self.__map, 12)[0]
+            if sequence % 2 == 0:
+                page = self.__map[:self.SIZE]
+                if struct.unpack_from('<Q', self.__map, 12)[0] == sequence:
+                    return self.__decode(page)
+            time.sleep(0.001)
+        raise ValueError('Status page kept changing while read: {0}'.format(self.__path))
+
+    def __decode(self, page: bytes):
+        magic, version, count, pid, sequence, updated, started, period, jitter, iterations, overruns = self.HEADER.unpack_from(page, 0)
+        faults = [self.FAULT.unpack_from(page, self.HEADER_SIZE + index * self.FAULT.size)[0].rstrip(b'\0').decode('utf-8', errors='replace') for index in range(self.MAX_FAULTS)]
+        faults = [faultId for faultId in faults if faultId]
+
+        zones = []
+        for index in range(min(count, self.MAX_ZONES)):
+            name, temperature, duty, rpm, relay, fanOn, panic, override, bits, iteration, expiry = self.ZONE.unpack_from(page, self.ZONES_OFFSET + index * self.ZONE.size)
+            zones.append({
+                'name': name.rstrip(b'\0').decode('utf-8', errors='replace'),
+                'temperature': None if math.isnan(temperature) else round(temperature, 4),
+                'dutyCycle': None if duty < 0 else duty,
+                'rpm': rpm,
+                'relayOn': bool(relay),
+                'fanOn': bool(fanOn),
+                'panic': bool(panic),
+                'override': None if override == self.NO_OVERRIDE else (override, expiry),
+                'faults': [faultId for bit, faultId in enumerate(faults) if bits & (1 << bit)],
+                'iteration': iteration,
+            })
+
+        return {'pid': pid, 'updated': updated, 'started': started, 'period': period, 'jitter': jitter, 'iterations': iterations, 'overruns': overruns, 'faults': faults, 'zones': zones}
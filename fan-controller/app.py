@@ -1,19 +1,27 @@
 import os
 import argparse
+import asyncio
 import time
 
 from datetime import datetime
-from time import sleep
 
 from log.logger import Logger
 from config.config import Config
+from config.watcher import Watcher
 from utils.utils import Utils
 from engine.engine import Engine
+from metrics.exporter import Exporter
+from metrics.instruments import Instruments
+from api.server import Server
 from filesystem.signals import Signals
+from filesystem.systemd import Systemd
 
 class App:
 
     def run(self):
+        # Startup steps durations in milliseconds, reported once the fans are under control
+        self.__startup = {'interpreter': self.__getProcessAge()}
+        start = time.monotonic()
 
         # Initialize app args
         argParser = argparse.ArgumentParser(description='Raspberry PI : Fan Controller - Controls & manages PWM fans')
@@ -34,25 +42,78 @@ class App:
 
         # Initialize logger & config
         config = Config(app['path'] + '/data/config/default.ini')
-        logger = Logger(app['path'] + '/data/logs/', app['rid'], verbose=app['verbose'], debug=app['debug'], maxLogLines=int(config.get('Logs', 'MaxLogLines')), maxFilesCount=int(config.get('Logs', 'MaxFilesCount')))
+        self.__startup['config'] = (time.monotonic() - start) * 1000
+        start = time.monotonic()
+        logs = config.getSnapshot().Logs
+        logger = Logger(app['path'] + '/data/logs/', app['rid'], verbose=app['verbose'], debug=app['debug'], maxLogLines=logs.MaxLogLines, maxLogBytes=logs.MaxLogBytes or None, maxFilesCount=logs.MaxFilesCount, flushInterval=logs.FlushInterval, flushLines=logs.FlushLines, compress=logs.Compress, format=logs.Format)
 
-        # Initialize & start engine
-        engine = Engine(config, logger)
-        engine.start()
+        self.__startup['logger'] = (time.monotonic() - start) * 1000
 
-        # Initialize OS signals
-        osSignals = Signals()
-        while osSignals.isRunning():
-            sleep(1)
+        # Hot reload config changes
+        config.subscribe(lambda snapshot, previous: logger.configure(maxLogLines=snapshot.Logs.MaxLogLines, maxLogBytes=snapshot.Logs.MaxLogBytes or None, maxFilesCount=snapshot.Logs.MaxFilesCount, flushInterval=snapshot.Logs.FlushInterval, flushLines=snapshot.Logs.FlushLines, compress=snapshot.Logs.Compress))
 
-        engine.stop()
+        # Every component runs as a task of a single event loop until a shutdown signal
+        asyncio.run(self.__serve(config, logger, app))
 
         # Report & cleanup
         logger.info(message='Process completed in ' + Utils.secondsToHours(time.time() - app['stime']))
         logger.purge()
+        logger.close()
 
         # Exit
         if logger.hasErrors() is True:
             exit(1)
 
-        exit(0)
\ No newline at end of file
+        exit(0)
+
+    async def __serve(self, config: Config, logger: Logger, app: dict):
+        # Initialize OS signals
+        osSignals = Signals()
+
+        watcher = Watcher(config, logger)
+        watcher.start()
+
+        # Initialize & start engine
+        start = time.monotonic()
+        engine = Engine(config, logger)
+        self.__startup['engine'] = (time.monotonic() - start) * 1000
+        start = time.monotonic()
+        engine.start()
+
+        # Expose metrics
+        Instruments.START_TIME.labels().set(app['stime'])
+        exporter = Exporter(config, logger)
+        await exporter.start()
+
+        # Accept runtime commands
+        server = Server(config, logger, engine)
+        await server.start()
+
+        # Ready once the fans are driven from the temperature, or the sensors gave up
+        ready = await engine.waitReady(timeout=30)
+        self.__startup['first iteration'] = (time.monotonic() - start) * 1000
+        logger.info(message='Startup completed in {0:.0f}ms: {1}'.format(sum(value for value in self.__startup.values() if value is not None), ', '.join('{0} [{1}]'.format(name, 'n/a' if value is None else '{0:.0f}ms'.format(value)) for name, value in self.__startup.items())))
+        Systemd.notify('READY=1', 'STATUS=' + ('Controlling {0} zone(s)'.format(len(engine.getZones())) if ready else 'Waiting for the first engine iteration'))
+
+        await osSignals.wait()
+        Systemd.notify('STOPPING=1')
+
+        # Tasks are cancelled rather than left to notice the shutdown on their next wake up
+        start = time.monotonic()
+        await asyncio.gather(server.stop(), engine.stop(), watcher.stop(), exporter.stop())
+        logger.info(message='Shutdown completed in {0:.0f}ms'.format((time.monotonic() - start) * 1000))
+
+    @staticmethod
+    def __getProcessAge():
+        """
+        Returns the milliseconds since the process started (interpreter start up & imports), None if unknown.
+        """
+        try:
+            with open('/proc/self/stat') as f:
+                # Fields after the command name, which may contain spaces, start time is the 22nd field
+                startTicks = int(f.read().rsplit(')', 1)[1].split()[19])
+            with open('/proc/uptime') as f:
+                uptime = float(f.read().split()[0])
+            return max(uptime - startTicks / os.sysconf('SC_CLK_TCK'), 0) * 1000
+        except (OSError, ValueError, IndexError):
+            return None
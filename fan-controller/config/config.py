@@ -1,20 +1,63 @@
-import configparser
+import os
+import threading
+
+from .snapshot import Snapshot
 
 class Config:
 
 	def __init__(self, file):
-	
+
 		self.storage = file
-		self.parser = configparser.ConfigParser()
-		
+		self.__subscribers = []
+		self.__lock = threading.Lock()
+
 		# Read
 
-		self.parser.read(self.storage)
+		self.__snapshot = Snapshot.parse(self.storage, self.getMtime())
 
 	def get(self ,section, key):
-		
-		if self.parser.has_option(section, key) is False:
+
+		return self.__snapshot.get(section, key)
+
+	def getSnapshot(self):
+		"""
+		Returns the current config snapshot, callers should hold on to it for a consistent view.
+		"""
+		return self.__snapshot
+
+	def subscribe(self, callback):
+		"""
+		Registers a callback(snapshot, previous) invoked after a new snapshot is swapped in.
+		"""
+		self.__subscribers.append(callback)
+
+	def hasChanged(self):
+
+		return self.getMtime() != self.__snapshot.getMtime()
+
+	def reload(self):
+		"""
+		Parses the config file again, swapping in the new snapshot if valid.
+
+		Returns:
+		- list : The (section, key) pairs that changed;
+
+		Raises:
+		- ValueError : When the new file is not valid, the current snapshot is kept;
+		"""
+		with self.__lock:
+			previous = self.__snapshot
+			snapshot = Snapshot.parse(self.storage, self.getMtime())
+			self.__snapshot = snapshot
+
+		for callback in self.__subscribers:
+			callback(snapshot, previous)
+
+		return snapshot.diff(previous)
+
+	def getMtime(self):
+
+		try:
+			return os.stat(self.storage).st_mtime_ns
+		except OSError:
 			return None
-		
-		return self.parser.get(section, key)
-	
\ No newline at end of file
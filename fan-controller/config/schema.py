@@ -0,0 +1,304 @@
+# Known configuration keys, as section -> key -> (type, default, live)
+# - A default of None marks the key as required;
+# - Live keys are applied on hot reload, others require a restart;
+SCHEMA = {
+	'Temperature': {
+		'MinTemp': (float, None, True),
+		'MaxTemp': (float, None, True),
+		'ControlPointTemp': (float, None, True),
+		'CurveResolution': (float, 0.01, True),
+		'DevicePath': (str, '/sys/bus/w1/devices/', False),
+		'DeviceFolder': (str, '28*', False),
+		'DeviceFile': (str, '/w1_slave', False),
+		'Resolution': (int, 12, False),
+		'SampleInterval': (float, 2, False),
+		'MaxAge': (float, 15, False),
+		'ReadRetries': (int, 3, False),
+		'BulkRead': (bool, True, False),
+	},
+	'Filter': {
+		'Enabled': (bool, True, False),
+		'Median': (int, 3, False),
+		'MinValid': (float, -55, False),
+		'MaxValid': (float, 125, False),
+		'MaxRate': (float, 1, False),
+		'GlitchValues': (str, '85, -127', False),
+		'Kalman': (bool, True, False),
+		'SensorNoise': (float, 0.1, False),
+		'ProcessNoise': (float, 0.0001, False),
+	},
+	'Fan': {
+		'MinRotationPercent': (int, None, True),
+		'MaxRotationPercent': (int, None, True),
+		'ControlPointRotationPercent': (float, None, True),
+		'ShutdownGraceTime': (float, 1, True),
+		'TachoGPIOPin': (int, None, False),
+		'TachoPulsesPerRev': (int, 2, False),
+		'TachoMode': (str, 'sampled', False),
+		'TachoGPIOChip': (str, '/dev/gpiochip0', False),
+		'TachoWindowSize': (int, 15, True),
+		'TachoMaxRepeatedPulsesAsPer': (int, 75, True),
+		'Profile': (str, '', True),
+		'ProfileMargin': (int, 5, True),
+		'SpeedControl': (str, 'duty', True),
+		'TargetMaxRPM': (int, 0, True),
+		'SpeedKp': (float, 0.005, True),
+		'SpeedKi': (float, 0.002, True),
+	},
+	'Buzzer': {
+		'GPIOPin': (int, None, False),
+		'PINHighTime': (float, 1, True),
+		'PINHighShortTime': (float, 0.2, True),
+		'IntermittentPINLowTime': (float, 4, True),
+	},
+	'Relay': {
+		'GPIOPin': (int, None, False),
+		'InitialState': (int, 0, False),
+		'OnState': (int, 0, False),
+	},
+	'PWM': {
+		'Channel': (int, None, False),
+		'ChipNo': (int, None, False),
+		'Frequency': (int, 25000, False),
+		'TempDeadband': (float, 0.25, True),
+		'DutyDeadband': (int, 2, True),
+		'SlewRate': (float, 10, True),
+		'WriteInterval': (float, 0, True),
+	},
+	'Logs': {
+		'MaxLogLines': (int, 2000, True),
+		'MaxLogBytes': (int, 0, True),
+		'MaxFilesCount': (int, 10, True),
+		'FlushInterval': (float, 1, True),
+		'FlushLines': (int, 100, True),
+		'Compress': (bool, False, True),
+		'Format': (str, 'text', False),
+	},
+	'Hardware': {
+		'Backend': (str, 'rpigpio', False),
+		'GPIOChip': (int, 0, False),
+		'HwmonFan': (str, 'pwmfan', False),
+		'HwmonTemp': (str, 'w1_slave_temp', False),
+	},
+	'Simulation': {
+		'Ambient': (float, 22, False),
+		'HeatLoad': (float, 16, False),
+		'CoolingEfficiency': (float, 0.8, False),
+		'TimeConstant': (float, 120, False),
+		'TimeScale': (float, 1, False),
+		'Noise': (float, 0.05, False),
+		'MaxRPM': (int, 2000, False),
+		'Sensors': (int, 1, False),
+		'Glitches': (float, 0, False),
+		'StallDuty': (int, 0, False),
+		'StartDuty': (int, 0, False),
+	},
+	'Scheduler': {
+		'Interval': (float, 5, True),
+		'Adaptive': (bool, False, True),
+		'MinInterval': (float, 1, True),
+		'MaxInterval': (float, 30, True),
+		'FastRate': (float, 1, True),
+		'StableRate': (float, 0.1, True),
+		'RateWindow': (float, 30, True),
+		'StatsInterval': (float, 300, True),
+	},
+	'Metrics': {
+		'Address': (str, '127.0.0.1', False),
+		'Port': (int, 0, False),
+		'TextfilePath': (str, '', False),
+		'TextfileInterval': (float, 15, True),
+	},
+	'Telemetry': {
+		'Enabled': (bool, True, False),
+		'Path': (str, 'data/telemetry/telemetry.ring', False),
+		'Capacity': (int, 262144, False),
+		'Interval': (float, 30, True),
+		'FlushInterval': (float, 300, True),
+	},
+	'Control': {
+		'Mode': (str, 'curve', True),
+		'TargetTemp': (float, 30, True),
+		'Kp': (float, 12, True),
+		'Ki': (float, 0.1, True),
+		'Kd': (float, 0, True),
+		'DerivativeFilter': (float, 10, True),
+	},
+	'Model': {
+		'Ambient': (float, 22, True),
+		'HeatInput': (float, 16, True),
+		'Cooling': (float, 0.128, True),
+		'TimeConstant': (float, 120, True),
+		'Lag': (float, 0, True),
+		'Horizon': (float, 180, True),
+		'Margin': (float, 1, True),
+		'OffsetFilter': (float, 120, True),
+	},
+	'Faults': {
+		'HistoryPath': (str, 'data/faults/history.jsonl', False),
+		'HistoryMaxBytes': (int, 1048576, True),
+	},
+	'Api': {
+		'StatusPath': (str, '/dev/shm/fan-controller.status', False),
+		'SocketPath': (str, 'data/run/control.sock', False),
+		'MaxOverrideTime': (float, 3600, True),
+	},
+	'Config': {
+		'WatchInterval': (float, 5, False),
+	},
+}
+
+# Zones are declared as [Zone:<name>] sections, keys as key -> (type, default, live)
+# - A (section, key) default inherits the value of a global key;
+# - Without any zone section, a single "Default" zone is built from the global keys;
+ZONE_PREFIX = 'Zone:'
+ZONE_SCHEMA = {
+	'Sensors': (str, '', False),
+	'Aggregate': (str, 'max', True),
+	'MinTemp': (float, ('Temperature', 'MinTemp'), True),
+	'MaxTemp': (float, ('Temperature', 'MaxTemp'), True),
+	'ControlPointTemp': (float, ('Temperature', 'ControlPointTemp'), True),
+	'MinRotationPercent': (int, ('Fan', 'MinRotationPercent'), True),
+	'MaxRotationPercent': (int, ('Fan', 'MaxRotationPercent'), True),
+	'ControlPointRotationPercent': (float, ('Fan', 'ControlPointRotationPercent'), True),
+	'ShutdownGraceTime': (float, ('Fan', 'ShutdownGraceTime'), True),
+	'ControlMode': (str, ('Control', 'Mode'), True),
+	'TargetTemp': (float, ('Control', 'TargetTemp'), True),
+	'PWMChannel': (int, ('PWM', 'Channel'), False),
+	'PWMChipNo': (int, ('PWM', 'ChipNo'), False),
+	'RelayGPIOPin': (int, ('Relay', 'GPIOPin'), False),
+	'TachoGPIOPin': (int, ('Fan', 'TachoGPIOPin'), False),
+	'FanProfile': (str, ('Fan', 'Profile'), True),
+	'SpeedControl': (str, ('Fan', 'SpeedControl'), True),
+	'TargetMaxRPM': (int, ('Fan', 'TargetMaxRPM'), True),
+}
+
+# Fault rules are declared as [Fault:<id>] sections, keys as key -> (type, default, live)
+# - Built-in faults are always declared, a section of the same id overrides their FAULT_DEFAULTS;
+# - Delays are in seconds from the fault being reported, -1 disables the escalation;
+FAULT_PREFIX = 'Fault:'
+FAULT_SCHEMA = {
+	'Condition': (str, None, True),
+	'Threshold': (float, 0, True),
+	'NotifyDelay': (float, 0, True),
+	'PanicDelay': (float, -1, True),
+	'Recovery': (str, 'reset', True),
+}
+FAULT_DEFAULTS = {
+	'temp_reading': {'Condition': 'temperature_invalid', 'NotifyDelay': 0, 'PanicDelay': 60},
+	'rotation_calculation': {'Condition': 'rotation_invalid', 'NotifyDelay': 0, 'PanicDelay': 60},
+	'rotation_tachometer': {'Condition': 'tacho_stalled', 'NotifyDelay': 120, 'PanicDelay': 300},
+}
+# Fault bits are stored on one byte in telemetry records
+MAX_FAULTS = 8
+# Zone names & fault ids are stored in fixed size UTF-8 fields of the status page
+MAX_ZONE_NAME_BYTES = 16
+MAX_FAULT_ID_BYTES = 24
+
+# Accepted values for enumerated keys
+CHOICES = {
+	('Fan', 'TachoMode'): ('sampled', 'continuous'),
+	('Fan', 'SpeedControl'): ('duty', 'rpm'),
+	('Zone', 'SpeedControl'): ('duty', 'rpm'),
+	('Logs', 'Format'): ('text', 'json'),
+	('Hardware', 'Backend'): ('rpigpio', 'native', 'hwmon', 'simulated'),
+	('Zone', 'Aggregate'): ('max', 'mean'),
+	('Control', 'Mode'): ('curve', 'pid', 'pid+curve', 'mpc'),
+	('Zone', 'ControlMode'): ('curve', 'pid', 'pid+curve', 'mpc'),
+	('Fault', 'Condition'): ('temperature_invalid', 'rotation_invalid', 'tacho_stalled', 'temperature_above', 'rpm_below'),
+	('Fault', 'Recovery'): ('reset', 'manual'),
+}
+
+def validate(snapshot):
+	"""
+	Checks cross-key constraints of a parsed snapshot.
+
+	Returns:
+	- list : Problems found, empty when valid;
+	"""
+	problems = []
+
+	if snapshot.Temperature.MinTemp >= snapshot.Temperature.MaxTemp:
+		problems.append('[Temperature] MinTemp must be lower than MaxTemp')
+	if snapshot.Temperature.CurveResolution <= 0:
+		problems.append('[Temperature] CurveResolution must be greater than 0')
+	if not 0 <= snapshot.Fan.MinRotationPercent <= snapshot.Fan.MaxRotationPercent <= 100:
+		problems.append('[Fan] MinRotationPercent and MaxRotationPercent must satisfy 0 <= Min <= Max <= 100')
+	if snapshot.Fan.TachoPulsesPerRev < 1:
+		problems.append('[Fan] TachoPulsesPerRev must be at least 1')
+	if not 9 <= snapshot.Temperature.Resolution <= 12:
+		problems.append('[Temperature] Resolution must be between 9 and 12 bits')
+	if snapshot.Temperature.SampleInterval <= 0:
+		problems.append('[Temperature] SampleInterval must be greater than 0')
+	if snapshot.Filter.Median < 1:
+		problems.append('[Filter] Median must be at least 1 reading')
+	if snapshot.Filter.MinValid >= snapshot.Filter.MaxValid:
+		problems.append('[Filter] MinValid must be lower than MaxValid')
+	if snapshot.Filter.MaxRate < 0:
+		problems.append('[Filter] MaxRate must not be negative')
+	if snapshot.Filter.SensorNoise <= 0 or snapshot.Filter.ProcessNoise <= 0:
+		problems.append('[Filter] SensorNoise and ProcessNoise must be greater than 0')
+	try:
+		[float(value) for value in snapshot.Filter.GlitchValues.split(',') if value.strip()]
+	except ValueError:
+		problems.append('[Filter] GlitchValues must be comma separated numbers')
+	if snapshot.Simulation.TimeConstant <= 0 or snapshot.Simulation.TimeScale <= 0:
+		problems.append('[Simulation] TimeConstant and TimeScale must be greater than 0')
+	if not 0 <= snapshot.Fan.ProfileMargin <= 100:
+		problems.append('[Fan] ProfileMargin must be between 0 and 100')
+	if snapshot.Fan.SpeedKp < 0 or snapshot.Fan.SpeedKi < 0:
+		problems.append('[Fan] SpeedKp and SpeedKi must not be negative')
+	if snapshot.Fan.TachoWindowSize < 1:
+		problems.append('[Fan] TachoWindowSize must be at least 1')
+	if snapshot.Fan.TachoMode == 'continuous' and snapshot.Hardware.Backend not in ('rpigpio', 'native'):
+		problems.append('[Fan] TachoMode continuous requires the rpigpio or native [Hardware] Backend')
+	if not 0 < snapshot.Scheduler.MinInterval <= snapshot.Scheduler.Interval <= snapshot.Scheduler.MaxInterval:
+		problems.append('[Scheduler] MinInterval, Interval and MaxInterval must satisfy 0 < Min <= Interval <= Max')
+	if not 0 <= snapshot.Metrics.Port <= 65535:
+		problems.append('[Metrics] Port must be between 0 and 65535')
+	if snapshot.Metrics.TextfileInterval <= 0:
+		problems.append('[Metrics] TextfileInterval must be greater than 0')
+	if snapshot.Telemetry.Capacity < 1:
+		problems.append('[Telemetry] Capacity must be at least 1 record')
+	if not 0 <= snapshot.Scheduler.StableRate < snapshot.Scheduler.FastRate:
+		problems.append('[Scheduler] StableRate must be lower than FastRate')
+	if snapshot.PWM.TempDeadband < 0 or snapshot.PWM.DutyDeadband < 0 or snapshot.PWM.SlewRate < 0 or snapshot.PWM.WriteInterval < 0:
+		problems.append('[PWM] TempDeadband, DutyDeadband, SlewRate and WriteInterval must not be negative')
+	if min(snapshot.Control.Kp, snapshot.Control.Ki, snapshot.Control.Kd, snapshot.Control.DerivativeFilter) < 0:
+		problems.append('[Control] Kp, Ki, Kd and DerivativeFilter must not be negative')
+	if snapshot.Model.Cooling <= 0 or snapshot.Model.TimeConstant <= 0 or snapshot.Model.Horizon <= 0:
+		problems.append('[Model] Cooling, TimeConstant and Horizon must be greater than 0')
+	if min(snapshot.Model.Lag, snapshot.Model.Margin, snapshot.Model.OffsetFilter) < 0:
+		problems.append('[Model] Lag, Margin and OffsetFilter must not be negative')
+
+	if snapshot.Api.MaxOverrideTime <= 0:
+		problems.append('[Api] MaxOverrideTime must be greater than 0')
+	if snapshot.Faults.HistoryMaxBytes < 0:
+		problems.append('[Faults] HistoryMaxBytes must not be negative')
+	if len(snapshot.getFaults()) > MAX_FAULTS:
+		problems.append('At most {0} faults can be declared, including the built-in ones'.format(MAX_FAULTS))
+	for fault in snapshot.getFaults():
+		if not fault.Name.isidentifier():
+			problems.append('[{0}{1}] Fault ids may only contain letters, digits and underscores'.format(FAULT_PREFIX, fault.Name))
+		if len(fault.Name.encode('utf-8')) > MAX_FAULT_ID_BYTES:
+			problems.append('[{0}{1}] Fault ids may be at most {2} bytes long'.format(FAULT_PREFIX, fault.Name, MAX_FAULT_ID_BYTES))
+		if fault.NotifyDelay < -1 or fault.PanicDelay < -1:
+			problems.append('[{0}{1}] NotifyDelay and PanicDelay must be -1 (disabled) or not negative'.format(FAULT_PREFIX, fault.Name))
+
+	channels = {}
+	for zone in snapshot.getZones():
+		section = '[{0}{1}]'.format(ZONE_PREFIX, zone.Name)
+		if len(zone.Name.encode('utf-8')) > MAX_ZONE_NAME_BYTES:
+			problems.append('{0} Zone names may be at most {1} bytes long'.format(section, MAX_ZONE_NAME_BYTES))
+		if zone.MinTemp >= zone.MaxTemp:
+			problems.append('{0} MinTemp must be lower than MaxTemp'.format(section))
+		if not 0 <= zone.MinRotationPercent <= zone.MaxRotationPercent <= 100:
+			problems.append('{0} MinRotationPercent and MaxRotationPercent must satisfy 0 <= Min <= Max <= 100'.format(section))
+		if zone.TargetMaxRPM < 0:
+			problems.append('{0} TargetMaxRPM must not be negative'.format(section))
+		channel = (zone.PWMChipNo, zone.PWMChannel)
+		if channel in channels:
+			problems.append('{0} PWM chip {1} channel {2} is already driven by zone {3}'.format(section, *channel, channels[channel]))
+		channels[channel] = zone.Name
+
+	return problems
@@ -0,0 +1,223 @@
+import configparser
+
+from .schema import SCHEMA, ZONE_PREFIX, ZONE_SCHEMA, FAULT_PREFIX, FAULT_SCHEMA, FAULT_DEFAULTS, CHOICES, validate
+
+class Section:
+	"""
+	Immutable, typed values of a config section, accessed as attributes.
+
+	Values are instance attributes, read by the regular attribute lookup, __getattr__ only reports missing keys.
+	"""
+
+	def __init__(self, name, values):
+		object.__setattr__(self, '_Section__name', name)
+		object.__setattr__(self, '_Section__values', dict(values))
+		for key, value in self.__values.items():
+			# Keys named as methods stay reachable with get()
+			if not hasattr(Section, key):
+				object.__setattr__(self, key, value)
+
+	def __getattr__(self, key):
+		try:
+			return self.__values[key]
+		except KeyError:
+			raise AttributeError('Config section [{0}] has no key {1}'.format(self.__name, key)) from None
+
+	def __setattr__(self, key, value):
+		raise AttributeError('Config snapshots are immutable')
+
+	def get(self, key, default = None):
+		return self.__values.get(key, default)
+
+	def items(self):
+		return self.__values.items()
+
+class Snapshot:
+	"""
+	Immutable, typed & validated view of a config file, parsed once.
+
+	Sections are accessed as attributes, e.g. snapshot.Fan.MinRotationPercent. Known keys are cast to
+	their schema type, keys & sections outside the schema are kept as strings.
+	"""
+
+	def __init__(self, sections, mtime = None, zones = None, faults = None):
+		object.__setattr__(self, '_Snapshot__sections', sections)
+		object.__setattr__(self, '_Snapshot__mtime', mtime)
+		object.__setattr__(self, '_Snapshot__zones', list(zones or []))
+		object.__setattr__(self, '_Snapshot__faults', list(faults or []))
+		# Sections are instance attributes, read by the regular attribute lookup
+		for name, section in sections.items():
+			if not hasattr(Snapshot, name):
+				object.__setattr__(self, name, section)
+
+	def __getattr__(self, name):
+		try:
+			return self.__sections[name]
+		except KeyError:
+			raise AttributeError('Config has no section [{0}]'.format(name)) from None
+
+	def __setattr__(self, key, value):
+		raise AttributeError('Config snapshots are immutable')
+
+	def get(self, section, key):
+		if section not in self.__sections:
+			return None
+		return self.__sections[section].get(key)
+
+	def has(self, section):
+		return section in self.__sections
+
+	def sections(self):
+		return list(self.__sections.keys())
+
+	def getMtime(self):
+		return self.__mtime
+
+	def getZones(self):
+		"""
+		Returns the control zones in declaration order, each a section with a Name key & the ZONE_SCHEMA keys.
+		"""
+		return list(self.__zones)
+
+	def getZone(self, name = None):
+		"""
+		Returns a control zone by name, the first zone when no name is given, None if not declared.
+		"""
+		for zone in self.__zones:
+			if name is None or zone.Name == name:
+				return zone
+		return None
+
+	def getFaults(self):
+		"""
+		Returns the fault rules, built-in ones first then declared ones, each a section with a Name key & the FAULT_SCHEMA keys.
+		"""
+		return list(self.__faults)
+
+	def diff(self, other):
+		"""
+		Lists the (section, key) pairs whose values differ from another snapshot.
+		"""
+		keys = set()
+		for snapshot in (self, other):
+			for section in snapshot.sections():
+				keys.update((section, key) for key, value in getattr(snapshot, section).items())
+		return sorted(key for key in keys if self.get(*key) != other.get(*key))
+
+	@staticmethod
+	def isLive(section, key):
+		"""
+		Whether a key is applied on hot reload, as opposed to requiring a restart.
+		"""
+		if section.startswith(ZONE_PREFIX):
+			return ZONE_SCHEMA.get(key, (None, None, False))[2]
+		if section.startswith(FAULT_PREFIX):
+			return FAULT_SCHEMA.get(key, (None, None, False))[2]
+		return SCHEMA.get(section, {}).get(key, (None, None, False))[2]
+
+	@classmethod
+	def parse(cls, file, mtime = None):
+		"""
+		Parses and validates a config file.
+
+		Raises:
+		- ValueError : When the file has missing, malformed or inconsistent values;
+		"""
+		parser = configparser.ConfigParser()
+		# Preserve key case, keys are accessed as attributes
+		parser.optionxform = str
+
+		if not parser.read(file):
+			raise ValueError('Cannot read config file: {0}'.format(file))
+
+		problems = []
+		sections = {}
+		zones = []
+
+		for name in set(SCHEMA.keys()) | set(parser.sections()):
+			if name.startswith(ZONE_PREFIX) or name.startswith(FAULT_PREFIX):
+				continue
+			values = dict(parser.items(name)) if parser.has_section(name) else {}
+			sections[name] = Section(name, cls.__cast(parser, name, name, SCHEMA.get(name, {}), values, sections, problems))
+
+		# Zones inherit global keys, so they are cast once the global sections are
+		for name in parser.sections():
+			if name.startswith(ZONE_PREFIX):
+				zoneName = name[len(ZONE_PREFIX):].strip()
+				values = cls.__cast(parser, name, 'Zone', ZONE_SCHEMA, dict(parser.items(name)), sections, problems)
+				values['Name'] = zoneName
+				sections[name] = Section(name, values)
+				zones.append(sections[name])
+
+		if not zones and not problems:
+			values = cls.__cast(parser, 'Zone:Default', 'Zone', ZONE_SCHEMA, {}, sections, problems)
+			values['Name'] = 'Default'
+			zones.append(Section('Zone:Default', values))
+
+		# Built-in faults come first, so their telemetry bits do not depend on the declared ones
+		faults = []
+		declared = [name[len(FAULT_PREFIX):].strip() for name in parser.sections() if name.startswith(FAULT_PREFIX)]
+		for faultId in list(FAULT_DEFAULTS.keys()) + [faultId for faultId in declared if faultId not in FAULT_DEFAULTS]:
+			name = FAULT_PREFIX + faultId
+			schema = dict(FAULT_SCHEMA)
+			for key, default in FAULT_DEFAULTS.get(faultId, {}).items():
+				schema[key] = (schema[key][0], default, schema[key][2])
+			written = dict(parser.items(name)) if parser.has_section(name) else {}
+			values = cls.__cast(parser, name, 'Fault', schema, written, sections, problems)
+			values['Name'] = faultId
+			sections[name] = Section(name, values)
+			faults.append(sections[name])
+
+		snapshot = cls(sections, mtime, zones, faults)
+
+		if not problems:
+			problems = validate(snapshot)
+
+		if problems:
+			raise ValueError('Invalid config {0}: {1}'.format(file, '; '.join(problems)))
+
+		return snapshot
+
+	@staticmethod
+	def __cast(parser, name, kind, schema, values, sections, problems):
+		"""
+		Casts the values of a section to their schema types, filling in defaults.
+
+		Parameters:
+		- name (str): Section name, as reported in problems;
+		- kind (str): Section kind enumerated keys are looked up with in CHOICES;
+		- sections (dict): Sections cast so far, (section, key) defaults are inherited from;
+
+		Returns:
+		- dict : Cast values, problems are appended to the given list;
+		"""
+		# Keys are matched case insensitively, as configparser does
+		written = {key.lower(): key for key in values}
+		for key in schema:
+			if key.lower() in written and written[key.lower()] != key:
+				values[key] = values.pop(written[key.lower()])
+
+		for key, (type, default, live) in schema.items():
+			if isinstance(default, tuple):
+				inherited = sections.get(default[0])
+				default = inherited.get(default[1]) if inherited is not None else None
+			if key not in values:
+				if default is None:
+					problems.append('[{0}] {1} is required'.format(name, key))
+				values[key] = default
+				continue
+			try:
+				if type is bool:
+					values[key] = parser.BOOLEAN_STATES[values[key].lower()]
+				else:
+					values[key] = type(values[key])
+			except (ValueError, KeyError):
+				problems.append('[{0}] {1} must be a valid {2}, got "{3}"'.format(name, key, type.__name__, values[key]))
+				values[key] = default
+				continue
+
+			choices = CHOICES.get((kind, key))
+			if choices is not None and values[key] not in choices:
+				problems.append('[{0}] {1} must be one of {2}, got "{3}"'.format(name, key, ', '.join(choices), values[key]))
+
+		return values
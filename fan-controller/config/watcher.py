@@ -0,0 +1,67 @@
+import asyncio
+
+from config.config import Config
+from log.logger import Logger
+from runtime.runtime import Runtime
+
+class Watcher:
+	"""
+	Polls the config file modification time, hot reloading it when changed.
+	"""
+
+	def __init__(self, config: Config, logger: Logger):
+		self.__config = config
+		self.__logger = logger
+		self.__interval = self.__config.getSnapshot().Config.WatchInterval
+		self.__failedMtime = None
+		self.__task = None
+
+	def start(self):
+		if self.__interval <= 0:
+			self.__logger.info('Config', message='Config watching disabled, changes require a restart')
+			return
+		self.__task = Runtime.spawn(self.__run(), 'config-watcher', self.__logger)
+
+	async def stop(self):
+		await Runtime.cancel(self.__task)
+
+	def check(self):
+		"""
+		Reloads the config if the file changed since the last snapshot.
+
+		Returns:
+		- bool : Whether a new snapshot was swapped in;
+		"""
+		if not self.__config.hasChanged():
+			return False
+
+		mtime = self.__config.getMtime()
+		if mtime == self.__failedMtime:
+			return False
+
+		try:
+			changes = self.__config.reload()
+		except ValueError as e:
+			# Keep running on the current snapshot until the file is fixed
+			self.__failedMtime = mtime
+			self.__logger.error('Config', message='Config changed but could not be reloaded, keeping current values: {0}'.format(e))
+			return False
+
+		self.__failedMtime = None
+
+		live = ['[{0}] {1}'.format(*key) for key in changes if self.__config.getSnapshot().isLive(*key)]
+		restart = ['[{0}] {1}'.format(*key) for key in changes if not self.__config.getSnapshot().isLive(*key)]
+
+		self.__logger.info('Config', message='Config reloaded, applied: {0}'.format(', '.join(live) or 'none'))
+		if restart:
+			self.__logger.warning('Config', message='Config changes requiring a restart: {0}'.format(', '.join(restart)))
+
+		return True
+
+	async def __run(self):
+		while True:
+			await asyncio.sleep(self.__interval)
+			try:
+				self.check()
+			except Exception as e:
+				self.__logger.error('Config', message='Error while watching config: {0}'.format(repr(e)))
@@ -1,9 +1,11 @@
-import RPi.GPIO as GPIO
-import time
-import threading
+import asyncio
+
+from time import monotonic
 
 from config.config import Config
 from log.logger import Logger
+from engine.hardware.backends import Backends
+from runtime.runtime import Runtime
 
 class Buzzer:
     __config = None
@@ -11,55 +13,86 @@ class Buzzer:
     __devicePin = None
     __pinHighTime = 1
     __intermittentPinLowTime = 4
-    __isActive = False
     __type = 'once'
+    __task = None
+    __silencedUntil = 0
 
     def __init__(self, config: Config, logger: Logger):
         self.__config = config
         self.__logger = logger
 
-        self.__devicePin = int(self.__config.get('Buzzer', 'GPIOPin'))
-        self.__pinHighTime = int(self.__config.get('Buzzer', 'PINHighTime'))
-        self.__pinHighShortTime = float(self.__config.get('Buzzer', 'PINHighShortTime'))
-        self.__intermittentPinLowTime = int(self.__config.get('Buzzer', 'IntermittentPINLowTime'))
+        self.__devicePin = self.__config.getSnapshot().Buzzer.GPIOPin
 
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.__devicePin, GPIO.OUT, initial=GPIO.LOW)
+        self.__output = Backends.get(self.__config).digitalOutput(self.__devicePin, 0)
 
     def buzzOnce(self, length = 'normal'):
+        """
+        Plays a single beep as a task of the event loop, returning right away.
+        """
         if length == 'normal':
             self.__type = 'once_normal'
         else:
             self.__type = 'once_short'
-        self.__run()
+        self.__play()
 
     def buzzIntermittent(self):
+        if self.isActive() and self.__type == 'intermittent':
+            return
         self.__type = 'intermittent'
-        if self.__isActive == False:
-            self.__thread = threading.Thread(target=self.__run)
-            self.__thread.start()
+        self.__play()
+
+    def isActive(self):
+        return self.__task is not None and not self.__task.done()
 
     def stop(self):
-        self.__isActive = False
+        # The pattern switches the buzzer off as it is cancelled
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+
+    def silence(self, duration: float):
+        """
+        Stops the pattern playing and keeps the buzzer quiet for duration secs, 0 lifts the silence.
+        """
+        self.__silencedUntil = monotonic() + duration if duration > 0 else 0
+        if duration > 0:
+            self.stop()
+
+    def isSilenced(self):
+        return monotonic() < self.__silencedUntil
 
-    def shutdown(self):
+    async def shutdown(self):
+        await Runtime.cancel(self.__task)
+        self.__task = None
+        self.__output.close()
+
+    def __play(self):
+        if self.isSilenced():
+            return
+        # A new pattern replaces the one playing
         self.stop()
-        GPIO.cleanup(self.__devicePin)
-
-    def __run(self):
-        if (self.__type == 'intermittent'):
-            self.__isActive = True
-            try:
-                while self.__isActive:
-                    GPIO.output(self.__devicePin, GPIO.HIGH)  # Buzzer will be switched on
-                    time.sleep(self.__pinHighTime)  # Waitmode for y seconds
-                    GPIO.output(self.__devicePin, GPIO.LOW)  # Buzzer will be switched off
-                    time.sleep(self.__intermittentPinLowTime)  # Waitmode for x seconds
-            except Exception as e:
-                self.__logger.error('Buzzer',message='Error while setting GPIO pins: {0}'.format(repr(e)))
-
-        if (self.__type == 'once_normal' or self.__type == 'once_short'):
-            highTime = self.__pinHighTime if self.__type == 'once_normal' else self.__pinHighShortTime
-            GPIO.output(self.__devicePin, GPIO.HIGH)  # Buzzer will be switched on
-            time.sleep(highTime)  # Waitmode for x seconds
-            GPIO.output(self.__devicePin, GPIO.LOW)  # Buzzer will be switched off
\ No newline at end of file
+        self.__task = Runtime.spawn(self.__run(), 'buzzer', self.__logger)
+
+    async def __run(self):
+        # Timings are read on every buzz so config reloads apply
+        snapshot = self.__config.getSnapshot()
+        self.__pinHighTime = snapshot.Buzzer.PINHighTime
+        self.__pinHighShortTime = snapshot.Buzzer.PINHighShortTime
+        self.__intermittentPinLowTime = snapshot.Buzzer.IntermittentPINLowTime
+
+        try:
+            if (self.__type == 'intermittent'):
+                while True:
+                    self.__output.write(1)  # Buzzer will be switched on
+                    await asyncio.sleep(self.__pinHighTime)  # Waitmode for y seconds
+                    self.__output.write(0)  # Buzzer will be switched off
+                    await asyncio.sleep(self.__intermittentPinLowTime)  # Waitmode for x seconds
+
+            if (self.__type == 'once_normal' or self.__type == 'once_short'):
+                highTime = self.__pinHighTime if self.__type == 'once_normal' else self.__pinHighShortTime
+                self.__output.write(1)  # Buzzer will be switched on
+                await asyncio.sleep(highTime)  # Waitmode for x seconds
+        except Exception as e:
+            self.__logger.error('Buzzer',message='Error while setting GPIO pins: {0}'.format(repr(e)))
+        finally:
+            self.__output.write(0)  # Buzzer will be switched off
\ No newline at end of file
@@ -0,0 +1,88 @@
+import os
+import sys
+import inspect
+import asyncio
+import argparse
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+
+sys.path.insert(0, parentdir + '/fan-controller')
+
+from config.config import Config
+from log.logger import Logger
+from engine.hardware.backends import Backends
+from engine.pwm.pwm import PWM
+from engine.relay.relay import Relay
+from engine.tacho.tachometer import Tachometer
+from engine.temperature.temperature import Temperature
+from engine.fan.sweep import Sweep
+
+async def characterize(config: Config, logger: Logger, args):
+    snapshot = config.getSnapshot()
+    zone = snapshot.getZone(args.zone)
+    if zone is None:
+        raise RuntimeError('Unknown zone {0}, expected one of {1}'.format(args.zone, ', '.join(zone.Name for zone in snapshot.getZones())))
+
+    pwm = PWM(config, logger, zone.Name)
+    relay = Relay(config, logger, zone.Name)
+    tachometer = Tachometer(config, logger, zone.Name)
+    temperature = Temperature(config, logger)
+    temperature.start()
+
+    def guard():
+        # The fans run slow for minutes, the zone must not overheat meanwhile
+        value = temperature.read(zone=zone.Name)
+        if value is not None and value > zone.MaxTemp:
+            return 'zone {0} reached {1:.1f}C, above MaxTemp'.format(zone.Name, value)
+        return None
+
+    try:
+        await temperature.waitReady(snapshot.Temperature.MaxAge)
+        sweep = Sweep(logger, pwm, relay, tachometer, snapshot.Fan.TachoPulsesPerRev, step=args.step, samples=args.samples, settleTimeout=args.settle_timeout, tolerance=args.tolerance, guard=guard)
+        profile = await sweep.run(zone.Name)
+    finally:
+        await temperature.stop()
+        tachometer.shutdown()
+
+    output = args.output or parentdir + '/data/fans/{0}.json'.format(zone.Name)
+    profile.save(output)
+
+    print('{0:>6} {1:>8} {2:>8} {3:>8}'.format('Duty', 'RPM', 'StDev', 'Settled'))
+    for point in profile.getPoints():
+        print('{0:>5}% {1:>8.0f} {2:>8.1f} {3:>8}'.format(point['duty'], point['rpm'], point['stdev'], 'yes' if point['settled'] else 'no'))
+    print('')
+    print('Fans keep spinning down to {0}% and start from a stop at {1}, profile saved to {2}'.format(profile.getMinDuty(), 'n/a' if profile.getStartDuty() is None else '{0}%'.format(profile.getStartDuty()), output))
+    output = os.path.abspath(output)
+    print('Use it with [Fan] Profile = {0}'.format(os.path.relpath(output, parentdir) if output.startswith(parentdir + os.sep) else output))
+
+def main():
+    argParser = argparse.ArgumentParser(description='Raspberry PI : Fan Controller - Characterizes the fans of a zone: duty cycle -> RPM curve, stall & start duty cycles. Stop the daemon first, the fans are driven directly')
+    argParser.add_argument('--config', dest='config', default=parentdir + '/data/config/default.ini', help='Config file')
+    argParser.add_argument('--zone', dest='zone', default=None, help='Zone name, the first zone by default')
+    argParser.add_argument('--output', dest='output', default=None, help='Profile file, data/fans/<zone>.json by default')
+    argParser.add_argument('--step', dest='step', type=int, default=5, help='Duty cycle percent between steps')
+    argParser.add_argument('--samples', dest='samples', type=int, default=5, help='1 sec RPM measurements averaged per step once settled')
+    argParser.add_argument('--settle-timeout', dest='settle_timeout', type=float, default=20, help='Secs a step may take for the RPM to settle')
+    argParser.add_argument('--tolerance', dest='tolerance', type=float, default=0.05, help='Share of the RPM measurements may spread by once settled')
+    args = argParser.parse_args()
+    if not 1 <= args.step <= 50 or args.samples < 1:
+        argParser.error('--step must be between 1 and 50, --samples at least 1')
+
+    config = Config(args.config)
+    logger = Logger(parentdir + '/data/logs/', 'Characterize', verbose=True)
+
+    try:
+        asyncio.run(characterize(config, logger, args))
+    except (RuntimeError, OSError) as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        # The fans are left at full speed, as on the daemon startup
+        sys.exit(130)
+    finally:
+        Backends.shutdown()
+        logger.close()
+
+if __name__ == '__main__':
+    main()
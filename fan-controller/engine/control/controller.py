@@ -0,0 +1,84 @@
+from .pid import Pid
+from .predictive import Predictive
+
+class Controller:
+    """
+    Turns the zone temperature into a rotation percent, see [Control] Mode.
+
+    - curve: the rotation is read from the Bezier curve, reacting to the current temperature only;
+    - pid: a PID holds the zone at TargetTemp;
+    - pid+curve: the curve rotation is the feed-forward, the PID only corrects the error it leaves;
+    - mpc: the thermal model predicts the temperature over a horizon, the lowest rotation keeping it under a limit
+      is applied, see setModel();
+    """
+    MODES = ('curve', 'pid', 'pid+curve', 'mpc')
+
+    def __init__(self):
+        self.__mode = 'curve'
+        self.__targetTemp = None
+        self.__pid = Pid(0, 0, 0, 0, 0, 100, reverse=True)
+        self.__predictive = Predictive()
+
+    def configure(self, mode: str, targetTemp: float, kp: float, ki: float, kd: float, derivativeFilter: float, minRotation: float, maxRotation: float):
+        """
+        Parameters:
+        - mode (str): One of MODES;
+        - targetTemp (float): Temperature the PID holds, in degrees Celsius;
+        - kp, ki, kd (float): PID gains, in rotation percent per degree (per second for ki, per degree per second for kd);
+        - derivativeFilter (float): Time constant in seconds of the derivative low pass filter;
+        - minRotation, maxRotation (float): Rotation bounds in percentage;
+        """
+        if mode != self.__mode:
+            self.reset()
+        self.__mode = mode
+        self.__targetTemp = targetTemp
+        self.__pid.setTunings(kp, ki, kd, derivativeFilter)
+        self.__pid.setLimits(minRotation, maxRotation)
+        self.__predictive.setLimits(minRotation, maxRotation)
+        self.__minRotation = minRotation
+        self.__maxRotation = maxRotation
+
+    def setModel(self, model, limit: float, horizon: float, offsetFilter: float):
+        """
+        Sets the thermal model of the mpc mode, see Predictive.configure().
+        """
+        self.__predictive.configure(model, limit, horizon, offsetFilter)
+
+    def getMode(self):
+        return self.__mode
+
+    def usesCurve(self):
+        return self.__mode in ('curve', 'pid+curve')
+
+    def reset(self):
+        self.__pid.reset()
+        self.__predictive.reset()
+
+    def calculate(self, temperature: float, curveRotation: float, now: float):
+        """
+        Calculates the rotation to apply.
+
+        Parameters:
+        - temperature (float): Zone temperature in degrees Celsius;
+        - curveRotation (float): Rotation read from the curve for temperature, None if off the curve;
+        - now (float): Monotonic timestamp of the temperature reading in seconds;
+
+        Returns:
+        - float : Rotation in percentage, None if it cannot be calculated;
+        """
+        if self.__mode == 'curve':
+            return curveRotation
+        if self.__mode == 'mpc':
+            return self.__predictive.update(temperature, now)
+
+        bias = 0.0
+        if self.__mode == 'pid+curve':
+            # Off the curve, the feed-forward sticks to the bound the temperature is past
+            if curveRotation is not None:
+                bias = curveRotation
+            elif temperature > self.__targetTemp:
+                bias = self.__maxRotation
+            else:
+                bias = self.__minRotation
+
+        return self.__pid.update(self.__targetTemp, temperature, now, bias)
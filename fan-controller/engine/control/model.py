@@ -0,0 +1,70 @@
+from math import exp
+
+class ThermalModel:
+    """
+    A first or second order thermal model of a zone, fitted from its telemetry by telemetry/fit.py, see [Model]
+    config section.
+
+    The zone settles at ambient + heatInput - cooling * duty, duty being the fan duty cycle in percentage.
+
+    - First order (lag 0): the temperature approaches it with timeConstant;
+    - Second order: the chassis approaches it with timeConstant & the sensor follows the chassis with lag;
+    """
+
+    def __init__(self, ambient: float, heatInput: float, cooling: float, timeConstant: float, lag: float = 0.0):
+        """
+        Parameters:
+        - ambient (float): Room temperature in degrees Celsius;
+        - heatInput (float): Degrees above ambient the zone settles at with the fans stopped;
+        - cooling (float): Degrees removed per duty cycle percent;
+        - timeConstant (float): Seconds to cover 63% of a temperature change;
+        - lag (float): Seconds the sensor lags the chassis by, 0 for a first order model;
+        """
+        self.__ambient = ambient
+        self.__heatInput = heatInput
+        self.__cooling = cooling
+        self.__timeConstant = timeConstant
+        # Equal time constants would divide by zero below, the response is continuous around them
+        self.__lag = lag if abs(lag - timeConstant) > timeConstant * 1e-6 else timeConstant * (1 - 1e-6)
+
+    def getTimeConstant(self):
+        return self.__timeConstant
+
+    def getLag(self):
+        return self.__lag
+
+    def getSteadyTemperature(self, duty: float, offset: float = 0.0):
+        """
+        Parameters:
+        - duty (float): Fan duty cycle in percentage;
+        - offset (float): Degrees added to the heat input, e.g. an estimated load change;
+        """
+        return self.__ambient + self.__heatInput + offset - self.__cooling * duty
+
+    def predict(self, temperature: float, chassis: float, duty: float, elapsed: float, offset: float = 0.0):
+        """
+        Predicts the temperature, with the fans held at duty.
+
+        Parameters:
+        - temperature (float): Current sensor temperature in degrees Celsius;
+        - chassis (float): Current chassis temperature, ignored by first order models;
+        - duty (float): Fan duty cycle in percentage;
+        - elapsed (float): Seconds ahead;
+        - offset (float): Degrees added to the heat input;
+
+        Returns:
+        - float : Temperature in degrees Celsius;
+        """
+        steady = self.getSteadyTemperature(duty, offset)
+        slow = exp(-elapsed / self.__timeConstant)
+        if self.__lag <= 0:
+            return steady + (temperature - steady) * slow
+        fast = exp(-elapsed / self.__lag)
+        return steady + (temperature - steady) * fast + (chassis - steady) * self.__timeConstant / (self.__timeConstant - self.__lag) * (slow - fast)
+
+    def predictChassis(self, chassis: float, duty: float, elapsed: float, offset: float = 0.0):
+        """
+        Predicts the chassis temperature of a second order model, see predict().
+        """
+        steady = self.getSteadyTemperature(duty, offset)
+        return steady + (chassis - steady) * exp(-elapsed / self.__timeConstant)
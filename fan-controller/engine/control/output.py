@@ -0,0 +1,97 @@
+class Output:
+    """
+    Shapes the rotation before it is written to the PWM channel, so sensor noise does not turn into fan wobble.
+
+    - Deadbands: a new rotation is only taken once the temperature moved TempDeadband degrees and the rotation
+      DutyDeadband percent away from the last one taken, bounds always go through;
+    - Slew rate: the written duty cycle moves towards the rotation taken at SlewRate percent per second at most;
+    - Coalescing: writes are spaced at least WriteInterval seconds apart, the latest rotation wins;
+    """
+    __tempDeadband = 0.0
+    __dutyDeadband = 0
+    __slewRate = 0.0
+    __writeInterval = 0.0
+    __minRotation = 0
+    __maxRotation = 100
+
+    REASONS = ('deadband', 'slew', 'coalesced')
+
+    def __init__(self):
+        self.reset()
+
+    def configure(self, tempDeadband: float, dutyDeadband: int, slewRate: float, writeInterval: float, minRotation: int, maxRotation: int):
+        """
+        Parameters:
+        - tempDeadband (float): Degrees the temperature must move before the rotation changes;
+        - dutyDeadband (int): Smallest rotation change in percentage;
+        - slewRate (float): Maximum rotation change in percentage per second, 0 for none;
+        - writeInterval (float): Minimum seconds between writes, 0 for none;
+        - minRotation, maxRotation (int): Rotation bounds in percentage, always let through the deadbands;
+        """
+        self.__tempDeadband = tempDeadband
+        self.__dutyDeadband = dutyDeadband
+        self.__slewRate = slewRate
+        self.__writeInterval = writeInterval
+        self.__minRotation = minRotation
+        self.__maxRotation = maxRotation
+
+    def reset(self):
+        """
+        Forgets the written duty cycle, the next rotation is written right away.
+        """
+        self.__target = None
+        self.__targetTemperature = None
+        self.__written = None
+        self.__writtenTime = None
+
+    def update(self, rotation: int, temperature: float, now: float):
+        """
+        Decides on the duty cycle to write for a new rotation.
+
+        Parameters:
+        - rotation (int): Rotation calculated for temperature, in percentage;
+        - temperature (float): Zone temperature in degrees Celsius;
+        - now (float): Monotonic timestamp in seconds;
+
+        Returns:
+        - (int, str) : Duty cycle to write (None to keep the current one) & the REASONS entry a write was suppressed for (None if not);
+        """
+        if self.__written is None:
+            self.__take(rotation, temperature)
+            return self.__write(rotation, now), None
+
+        if rotation != self.__target and self.__accepts(rotation, temperature):
+            self.__take(rotation, temperature)
+
+        if self.__target == self.__written:
+            return None, 'deadband' if rotation != self.__written else None
+
+        elapsed = now - self.__writtenTime
+        if elapsed < self.__writeInterval:
+            return None, 'coalesced'
+
+        dutyCycle = self.__target
+        if self.__slewRate > 0:
+            # Rounded to whole percents, a step too small for the time elapsed waits for the next iteration
+            step = int(self.__slewRate * elapsed)
+            if step < 1:
+                return None, 'slew'
+            dutyCycle = self.__written + max(-step, min(step, self.__target - self.__written))
+
+        return self.__write(dutyCycle, now), None
+
+    def __accepts(self, rotation: int, temperature: float):
+        if rotation in (self.__minRotation, self.__maxRotation):
+            return True
+        if abs(rotation - self.__target) < self.__dutyDeadband:
+            return False
+        return abs(temperature - self.__targetTemperature) >= self.__tempDeadband
+
+    def __take(self, rotation: int, temperature: float):
+        self.__target = rotation
+        self.__targetTemperature = temperature
+
+    def __write(self, dutyCycle: int, now: float):
+        self.__written = dutyCycle
+        self.__writtenTime = now
+        return dutyCycle
@@ -0,0 +1,90 @@
+class Pid:
+    """
+    A PID controller with anti-windup and a filtered derivative.
+
+    - The derivative acts on the measurement rather than the error, so setpoint changes do not kick the output,
+      and is low pass filtered so sensor resolution steps do not read as spikes;
+    - The integral is clamped so it never pushes the output further into saturation, it recovers as soon as the
+      error changes sign instead of unwinding first;
+    - Reverse acting controllers (e.g. cooling) raise the output when the measurement is above the setpoint;
+    """
+    __integral = 0.0
+    __derivative = 0.0
+    __lastMeasurement = None
+    __lastTime = None
+
+    def __init__(self, kp: float, ki: float, kd: float, derivativeFilter: float, outputMin: float, outputMax: float, reverse: bool = False):
+        """
+        Parameters:
+        - kp (float): Proportional gain, output units per measurement unit;
+        - ki (float): Integral gain, output units per measurement unit and second;
+        - kd (float): Derivative gain, output units per measurement unit per second;
+        - derivativeFilter (float): Time constant in seconds of the derivative low pass filter, 0 disables it;
+        - outputMin (float): Lower output bound;
+        - outputMax (float): Upper output bound;
+        - reverse (bool): Whether the output must rise when the measurement is above the setpoint;
+        """
+        self.setTunings(kp, ki, kd, derivativeFilter)
+        self.setLimits(outputMin, outputMax)
+        self.__sign = -1 if reverse else 1
+
+    def setTunings(self, kp: float, ki: float, kd: float, derivativeFilter: float):
+        # The integral is kept in output units, so gain changes do not bump the output
+        self.__kp = kp
+        self.__ki = ki
+        self.__kd = kd
+        self.__derivativeFilter = derivativeFilter
+
+    def setLimits(self, outputMin: float, outputMax: float):
+        self.__outputMin = outputMin
+        self.__outputMax = outputMax
+
+    def getIntegral(self):
+        return self.__integral
+
+    def reset(self):
+        """
+        Forgets the integral and derivative state, e.g. after the fans were stopped.
+        """
+        self.__integral = 0.0
+        self.__derivative = 0.0
+        self.__lastMeasurement = None
+        self.__lastTime = None
+
+    def update(self, setpoint: float, measurement: float, now: float, bias: float = 0.0):
+        """
+        Computes the output for a new measurement.
+
+        Parameters:
+        - setpoint (float): Value the measurement should settle at;
+        - measurement (float): Measured value;
+        - now (float): Monotonic timestamp of the measurement in seconds;
+        - bias (float): Feed-forward added to the output, the PID only corrects what it leaves;
+
+        Returns:
+        - float : Output, within the limits;
+        """
+        error = self.__sign * (setpoint - measurement)
+        elapsed = now - self.__lastTime if self.__lastTime is not None else 0.0
+
+        if elapsed > 0:
+            rate = -self.__sign * (measurement - self.__lastMeasurement) / elapsed
+            alpha = elapsed / (self.__derivativeFilter + elapsed)
+            self.__derivative += alpha * (rate - self.__derivative)
+            integral = self.__integral + self.__ki * error * elapsed
+        else:
+            integral = self.__integral
+
+        self.__lastMeasurement = measurement
+        self.__lastTime = now
+
+        proportional = self.__kp * error
+        derivative = self.__kd * self.__derivative
+        base = bias + proportional + derivative
+
+        # Anti-windup: the integral may move back from saturation but never further into it
+        upper = self.__outputMax - base
+        lower = self.__outputMin - base
+        self.__integral = min(max(integral, min(lower, self.__integral)), max(upper, self.__integral))
+
+        return min(max(base + self.__integral, self.__outputMin), self.__outputMax)
@@ -0,0 +1,48 @@
+from math import exp
+
+class Plant:
+    """
+    A first order thermal model of a chassis cooled by fans.
+
+    Temperature settles towards ambient + heatLoad * (1 - coolingEfficiency * speed) with timeConstant, speed
+    being the fan duty cycle (0-1).
+    """
+
+    def __init__(self, ambient: float, heatLoad: float, coolingEfficiency: float, timeConstant: float, temperature: float = None):
+        """
+        Parameters:
+        - ambient (float): Room temperature in degrees Celsius;
+        - heatLoad (float): Degrees above ambient the chassis settles at with the fans stopped;
+        - coolingEfficiency (float): Share of the heat load removed at full speed (0-1);
+        - timeConstant (float): Seconds to cover 63% of a temperature change;
+        - temperature (float): Initial temperature, defaults to the fans stopped steady state;
+        """
+        self.__ambient = ambient
+        self.__heatLoad = heatLoad
+        self.__coolingEfficiency = coolingEfficiency
+        self.__timeConstant = timeConstant
+        self.__temperature = ambient + heatLoad if temperature is None else temperature
+
+    def getTemperature(self):
+        return self.__temperature
+
+    def setHeatLoad(self, heatLoad: float):
+        self.__heatLoad = heatLoad
+
+    def getSteadyTemperature(self, speed: float):
+        return self.__ambient + self.__heatLoad * (1 - self.__coolingEfficiency * speed)
+
+    def advance(self, speed: float, elapsed: float):
+        """
+        Advances the model, with the fans held at speed.
+
+        Parameters:
+        - speed (float): Fan duty cycle (0-1);
+        - elapsed (float): Seconds to advance;
+
+        Returns:
+        - float : Temperature in degrees Celsius;
+        """
+        target = self.getSteadyTemperature(speed)
+        self.__temperature = target + (self.__temperature - target) * exp(-elapsed / self.__timeConstant)
+        return self.__temperature
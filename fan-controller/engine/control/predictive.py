@@ -0,0 +1,97 @@
+from math import exp
+
+from .model import ThermalModel
+
+class Predictive:
+    """
+    A model predictive controller: picks the lowest duty cycle the thermal model predicts keeps the measurement at
+    or under a limit over the horizon.
+
+    - The model is checked against every measurement, the error is folded into a heat input offset, so a load
+      change raises the predicted steady temperature & the fans spin up before the temperature gets there;
+    - Predictions are linear in the duty cycle, the lowest duty cycle is solved for at a few points of the horizon
+      instead of searched for;
+    """
+    # Points of the horizon the prediction is checked at
+    POINTS = 12
+
+    __model = None
+    __lastMeasurement = None
+    __lastTime = None
+    __lastOutput = 0.0
+    __chassis = None
+    __offset = 0.0
+
+    def __init__(self, outputMin: float = 0, outputMax: float = 100):
+        self.setLimits(outputMin, outputMax)
+
+    def configure(self, model: ThermalModel, limit: float, horizon: float, offsetFilter: float):
+        """
+        Parameters:
+        - model (ThermalModel): Thermal model of the zone;
+        - limit (float): Temperature not to exceed, in degrees Celsius;
+        - horizon (float): Seconds ahead the temperature is predicted;
+        - offsetFilter (float): Time constant in seconds of the heat input offset low pass filter, 0 disables it;
+        """
+        self.__model = model
+        self.__limit = limit
+        self.__horizon = horizon
+        self.__offsetFilter = offsetFilter
+
+    def setLimits(self, outputMin: float, outputMax: float):
+        self.__outputMin = outputMin
+        self.__outputMax = outputMax
+
+    def getOffset(self):
+        return self.__offset
+
+    def reset(self):
+        """
+        Forgets the estimated state, e.g. after the fans were stopped.
+        """
+        self.__lastMeasurement = None
+        self.__lastTime = None
+        self.__lastOutput = 0.0
+        self.__chassis = None
+        self.__offset = 0.0
+
+    def update(self, measurement: float, now: float):
+        """
+        Computes the output for a new measurement.
+
+        Parameters:
+        - measurement (float): Measured temperature in degrees Celsius;
+        - now (float): Monotonic timestamp of the measurement in seconds;
+
+        Returns:
+        - float : Duty cycle in percentage, within the limits;
+        """
+        model = self.__model
+        elapsed = now - self.__lastTime if self.__lastTime is not None else 0.0
+
+        if elapsed > 0:
+            predicted = model.predict(self.__lastMeasurement, self.__chassis, self.__lastOutput, elapsed, self.__offset)
+            error = measurement - predicted
+            self.__chassis = model.predictChassis(self.__chassis, self.__lastOutput, elapsed, self.__offset) + error
+            # A heat input offset shows as (1 - e^-elapsed/tau) times itself over one step, low pass filtered
+            # since sensor noise is amplified just as much
+            alpha = elapsed / (self.__offsetFilter + elapsed)
+            self.__offset += alpha * error / (1 - exp(-elapsed / model.getTimeConstant()))
+        elif self.__chassis is None:
+            self.__chassis = measurement
+
+        self.__lastMeasurement = measurement
+        self.__lastTime = now
+
+        duty = self.__outputMin
+        for point in range(1, self.POINTS + 1):
+            ahead = self.__horizon * point / self.POINTS
+            free = model.predict(measurement, self.__chassis, 0, ahead, self.__offset)
+            cooled = model.predict(measurement, self.__chassis, 100, ahead, self.__offset)
+            # Degrees the fans take off per duty cycle percent by then
+            gain = (free - cooled) / 100
+            if gain > 0:
+                duty = max(duty, (free - self.__limit) / gain)
+
+        self.__lastOutput = min(max(duty, self.__outputMin), self.__outputMax)
+        return self.__lastOutput
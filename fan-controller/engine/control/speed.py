@@ -0,0 +1,100 @@
+from .pid import Pid
+
+class SpeedLoop:
+    """
+    Holds the fans at a target speed rather than a duty cycle, see [Fan] SpeedControl.
+
+    The rotation is read as a share of the target max RPM. The duty cycle is a feed-forward, from the fan profile
+    when there is one (the rotation itself otherwise), corrected by a PI on the tacho speed so fans that wore out,
+    gathered dust or run on a lower supply voltage still move the same air. The PI only runs on fresh tacho
+    measurements, the correction is held in between.
+    """
+    __profile = None
+    __maxRpm = 0
+
+    def __init__(self):
+        self.__pid = Pid(0, 0, 0, 0, 0, 100)
+        self.__minDuty = 0
+        self.__maxDuty = 100
+        self.__measured = None
+        self.reset()
+
+    def configure(self, kp: float, ki: float, maxRpm: int, minDuty: float, maxDuty: float):
+        """
+        Parameters:
+        - kp, ki (float): PI gains, in duty cycle percent per RPM (per second for ki);
+        - maxRpm (int): Speed of a 100% rotation, 0 to take the max speed of the fan profile;
+        - minDuty, maxDuty (float): Duty cycle bounds in percentage;
+        """
+        self.__pid.setTunings(kp, ki, 0, 0)
+        self.__pid.setLimits(minDuty, maxDuty)
+        self.__maxRpm = maxRpm
+        self.__minDuty = minDuty
+        self.__maxDuty = maxDuty
+
+    def setProfile(self, profile):
+        """
+        Sets the fan profile the feed-forward duty cycle is read from, None for none.
+        """
+        self.__profile = profile
+
+    def getMaxRpm(self):
+        """
+        Returns the speed of a 100% rotation, 0 when neither configured nor profiled.
+        """
+        if self.__maxRpm > 0:
+            return self.__maxRpm
+        return self.__profile.getMaxRpm() if self.__profile is not None else 0
+
+    def getTarget(self):
+        """
+        Returns the target speed of the last update in RPM, None before the first one.
+        """
+        return self.__target
+
+    def getError(self):
+        """
+        Returns the tracking error (measured minus target speed) of the last measurement in RPM, None before one.
+        """
+        return self.__error
+
+    def reset(self):
+        """
+        Forgets the correction, e.g. after the fans were stopped. The measurement in the tacho window is skipped,
+        it was taken before.
+        """
+        self.__pid.reset()
+        self.__correction = 0.0
+        self.__target = None
+        self.__error = None
+        self.__skipMeasured = True
+
+    def update(self, rotation: float, rpm: float, measured: float):
+        """
+        Calculates the duty cycle to apply.
+
+        Parameters:
+        - rotation (float): Rotation in percentage;
+        - rpm (float): Last speed measured by the tachometer, None if none;
+        - measured (float): Monotonic timestamp of the measurement in seconds, None if none;
+
+        Returns:
+        - float : Duty cycle in percentage, within the bounds;
+        """
+        target = rotation * self.getMaxRpm() / 100
+        feedForward = rotation
+        if self.__profile is not None:
+            duty = self.__profile.getDuty(target)
+            feedForward = rotation if duty is None else duty
+        self.__target = target
+
+        if measured is not None and measured != self.__measured:
+            self.__measured = measured
+            if self.__skipMeasured:
+                self.__skipMeasured = False
+            elif rpm is not None:
+                self.__error = rpm - target
+                duty = self.__pid.update(target, rpm, measured, feedForward)
+                self.__correction = duty - feedForward
+                return duty
+        return min(max(feedForward + self.__correction, self.__minDuty), self.__maxDuty)
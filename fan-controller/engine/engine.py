@@ -1,75 +1,166 @@
-from time import sleep, time
 from config.config import Config
 from log.logger import Logger
-from .failure.failure import Failures
 from .buzzer.buzzer import Buzzer
 from .rotation.rotation import Rotation
 from .tacho.tachometer import Tachometer
 from .temperature.temperature import Temperature
 from .relay.relay import Relay
 from .pwm.pwm import PWM
+from .zone.zone import Zone
+from .failure.monitor import Monitor
+from .scheduler.scheduler import Scheduler
+from metrics.instruments import Instruments
+from telemetry.recorder import Recorder
+from api.status import StatusPage
+from .hardware.backends import Backends
+from runtime.runtime import Runtime
 
 import os
-import threading
+import asyncio
 import traceback
 
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
 class Engine:
     __config = None
     __logger = None
-    __thread = None
-    __rotation = None
+    __task = None
     __temperature = None
     __buzzer = None
-    __relay = None
-    __pwm = None
-    __tachometer = None
     __running = False
-    __currentRotationPercent = -1
-    __fanShutdownGraceTime = 0
-    __fanShutdownTimeStamp = None
-    __fanShutdownIsStopped = False
-    __failureManifest = {}
+    __snapshot = None
+    __status = None
 
     def __init__(self, config: Config, logger: Logger):
         self.__config = config
         self.__logger = logger
+        self.__timings = {}
+        self.__iterated = asyncio.Event()
+        start = perf_counter()
+
+        # The backend is loaded once, ahead of the devices sharing it
+        self.__timed('backend', Backends.get, self.__config)
+        self.__scheduler = Scheduler(self.__config, self.__logger)
+
+        # Sensor discovery (kernel modules, 1-Wire bus scan), the telemetry file & the buzzer are initialized in
+        # the background while the zones take control of the fans
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix='engine-init') as executor:
+            temperature = executor.submit(self.__timed, 'temperature', Temperature, self.__config, self.__logger)
+            recorder = executor.submit(self.__timed, 'recorder', Recorder, self.__config, self.__logger)
+            buzzer = executor.submit(self.__timed, 'buzzer', Buzzer, self.__config, self.__logger)
+            devices = self.__timed('zones', self.__createDevices)
+
+            self.__temperature = temperature.result()
+            self.__recorder = recorder.result()
+            self.__buzzer = buzzer.result()
+
+        # Initialize zones
+        self.__snapshot = self.__config.getSnapshot()
+        self.__zones = []
+        self.__panicZones = set()
+        self.__faults = self.__timed('faults', Monitor, self.__config, self.__logger, self.__panic, self.__reset)
+        for name, rotation, pwm, relay, tachometer in devices:
+            zone = Zone(name, self.__logger, self.__temperature, rotation, pwm, relay, tachometer, self.__faults)
+            zone.applySnapshot(self.__snapshot)
+            self.__zones.append(zone)
+
+        self.__panicTests = {}
+        self.__silence = None
+        self.__status = self.__timed('status', self.__openStatus)
+
+        self.__timings['total'] = (perf_counter() - start) * 1000
+        self.__logger.info('Engine', message='Initialized in {0:.0f}ms: {1}'.format(self.__timings['total'], ', '.join('{0} [{1:.0f}ms]'.format(name, value) for name, value in self.__timings.items() if name != 'total')))
+
+    def __createDevices(self):
+        """
+        Opens the devices of every zone, relays & tachometers are shared by the zones using the same pin.
 
-        # Initialize configs
-        self.__minTemp = int(self.__config.get('Temperature', 'MinTemp'))
-        self.__minRotationPercent = int(self.__config.get('Fan', 'MinRotationPercent'))
-        self.__maxRotationPercent = int(self.__config.get('Fan', 'MaxRotationPercent'))
-        self.__fanShutdownGraceTime = int(self.__config.get('Fan', 'ShutdownGraceTime'))
-
-        # Initialize class modules
-        self.__failures = Failures()
-        self.__buzzer = Buzzer(self.__config,self.__logger)
-        self.__temperature = Temperature(self.__config, self.__logger)
-        self.__relay = Relay(self.__config, self.__logger)
-        self.__pwm = PWM(self.__config, self.__logger)
-        self.__rotation = Rotation(self.__config, self.__logger)
-        self.__tachometer = Tachometer(self.__config, self.__logger)
+        Returns:
+        - list : (name, rotation, pwm, relay, tachometer) per zone;
+        """
+        devices = []
+        relays = {}
+        tachometers = {}
+        for zoneConfig in self.__config.getSnapshot().getZones():
+            name = zoneConfig.Name
+            # PWM first, fans are set to full speed as soon as the channel is opened
+            pwm = PWM(self.__config, self.__logger, name)
+            if zoneConfig.RelayGPIOPin not in relays:
+                relays[zoneConfig.RelayGPIOPin] = Relay(self.__config, self.__logger, name)
+            if zoneConfig.TachoGPIOPin not in tachometers:
+                tachometers[zoneConfig.TachoGPIOPin] = Tachometer(self.__config, self.__logger, name)
+
+            devices.append((name, Rotation(self.__config, self.__logger, name), pwm, relays[zoneConfig.RelayGPIOPin], tachometers[zoneConfig.TachoGPIOPin]))
+
+        self.__relays = list(relays.values())
+        self.__tachometers = list(tachometers.values())
+        return devices
+
+    def __openStatus(self):
+        path = self.__config.getSnapshot().Api.StatusPath
+        if not path:
+            return None
+        try:
+            status = StatusPage(path)
+            self.__logger.info('Engine', message='Publishing live status to {0}'.format(path))
+            return status
+        except OSError as e:
+            self.__logger.error('Engine', message='Cannot create status page {0}, not publishing: {1}'.format(path, repr(e)))
+            return None
+
+    def __timed(self, name: str, factory, *args):
+        start = perf_counter()
+        try:
+            return factory(*args)
+        finally:
+            self.__timings[name] = (perf_counter() - start) * 1000
+
+    def getTimings(self):
+        """
+        Returns the time each initialization step took in milliseconds, by step name.
+        """
+        return dict(self.__timings)
 
     def start(self):
         self.__running = True
-        # Start the tachometer
-        self.__tachometer.start()
-        # Signal with buzzer
+        # Start the control loop first, it iterates as soon as the first temperature sample is in
+        self.__task = Runtime.spawn(self.__run(), 'engine', self.__logger)
+        self.__faults.start()
+        self.__temperature.start()
+        # Start the tachometers
+        for tachometer in self.__tachometers:
+            tachometer.start()
+        # Signal with buzzer, played in the background
         self.__buzzer.buzzOnce()
-        # Start the run thread
-        self.__thread = threading.Thread(target=self.__run)
-        self.__thread.start()
 
-    def stop(self):
-        self.__logger.info('Engine', message='Stop signal received, terminating engine thread...')
+    async def waitReady(self, timeout: float):
+        """
+        Waits for the first iteration to complete, once the fans are driven from the temperature.
+
+        Returns:
+        - bool : Whether an iteration completed within timeout;
+        """
+        return await Runtime.waitFor(self.__iterated, timeout)
+
+    async def stop(self):
+        self.__logger.info('Engine', message='Stop signal received, terminating engine loop...')
         self.__running = False
+        # Iterations never await, cancelling lands between two of them
+        await Runtime.cancel(self.__task)
+        for handle in list(self.__panicTests.values()) + [self.__silence]:
+            if handle is not None:
+                handle.cancel()
+        await asyncio.gather(self.__temperature.stop(), self.__buzzer.shutdown(), self.__faults.stop(), *[tachometer.stop() for tachometer in self.__tachometers])
         # Shutdown libs
-        self.__buzzer.shutdown()
-        self.__tachometer.shutdown()
+        self.__release()
 
     def isRunning(self):
         return self.__running
 
-    def __run(self):
+    async def __run(self):
+        # Give the sampler a chance to deliver a first reading, a missing one is handled as a fault
+        await self.__temperature.waitReady(timeout=5)
         while self.__running:
             try:
                 self.__iterate()
@@ -78,128 +169,130 @@ class Engine:
                 self.__logger.error('Engine',message='- Stack: {0}'.format(traceback.format_exc()))
                 self.__crash()
 
-            sleep(5)
+            self.__iterated.set()
+            await self.__scheduler.wait()
 
     def __iterate(self):
-        sensorTemp = self.__temperature.read()
-
-        # Check for good temperature reading, otherwise report a failure
-        faultId = 'temp_reading'
-        if sensorTemp is None:
-            # Report
-            if self.__failures.exists(faultId) == False:
-                self.__logger.warning('Engine',message='Temperature reading value is not valid...')
-                self.__failures.report(faultId)
-            # Create a new fault
-            fault = self.__failures.getFault(faultId)
-            if fault.getAge() > 60 and fault.isReported() == False:
-                self.__logger.error('Engine', message='Temperature could not be read for > 60 secs, entering PANIC mode.')
-                self.__panic()
-                fault.setReported()
-        elif self.__failures.exists(faultId):
-            # Get fault
-            fault = self.__failures.getFault(faultId)
-            if fault.isReported() == True:
-                self.__reset()
-            self.__failures.clear(faultId)
-
-        outputRotation,outputTemperature = [None,None] if sensorTemp is None else self.__rotation.calculate(sensorTemp)
-
-        # Check rotation was properly calculated, otherwise report a failure
-        faultId = 'rotation_calculation'
-        if outputRotation is None and (sensorTemp is not None and sensorTemp >= self.__minTemp):
-            # Report
-            if self.__failures.exists(faultId) == False:
-                self.__logger.warning('Engine', message='Rotation calculated value is not valid...')
-                self.__failures.report(faultId)
-            # Create a new fault
-            fault = self.__failures.getFault(faultId)
-            if fault.getAge() > 60 and fault.isReported() == False:
-                self.__logger.error('Engine', message='Rotation could not be calculated for > 60 secs, entering PANIC mode.')
-                self.__panic()
-                fault.setReported()
-        elif self.__failures.exists(faultId):
-            # Get fault
-            fault = self.__failures.getFault(faultId)
-            if fault.isReported() == True:
-                self.__reset()
-            self.__failures.clear(faultId)
-
-        # Check good value reading from tachometer, otherwise report failure
-        tachAvgPulses = self.__tachometer.getAvgPulses()
-        tachRepPulses = self.__tachometer.getRepeatedPulses()
-        faultId = 'rotation_tachometer'
-        if self.__fanShutdownIsStopped is False and self.__tachometer.isLikelyStopped():
-            # Report
-            if self.__failures.exists(faultId) == False:
-                self.__failures.report(faultId)
-            # Get fault
-            fault = self.__failures.getFault(faultId)
-            # Notify if more than 2 mins
-            if fault.getAge() > 120 and fault.isNotified() == False:
-                self.__logger.warning('Engine',message='Tachometer is reporting a possible fault with fan RPM...')
-                fault.setNotified()
-            if fault.getAge() > 300 and fault.isReported() == False:
-                self.__logger.error('Engine',message='Tachometer has reported a possible fan fault for over 5 mins, entering PANIC mode.')
-                self.__panic()
-                fault.setReported()
-        elif self.__failures.exists(faultId):
-            # Get fault
-            fault = self.__failures.getFault(faultId)
-            if fault.isReported() == True:
-                self.__reset()
-            self.__failures.clear(faultId)
-
-        # Apply rotation bounds
-        if outputRotation is not None:
-            outputRotation = int(outputRotation)
-            if outputRotation < self.__minRotationPercent:
-                outputRotation = self.__minRotationPercent
-            if outputRotation > self.__maxRotationPercent:
-                outputRotation = self.__maxRotationPercent
-
-        # Check for fan shutdown conditions
-        if sensorTemp is not None and sensorTemp < self.__minTemp:
-            # Assign shutdown start of grace period
-            if self.__fanShutdownTimeStamp is None:
-                self.__fanShutdownTimeStamp = int(time())
-                self.__logger.info('Engine', message='Fan shutdown conditions meet, starting grace period of {0} mins'.format(self.__fanShutdownGraceTime))
-            # Check if we can shut down the fans
-            if (int(time()) - self.__fanShutdownTimeStamp) / 60 >= self.__fanShutdownGraceTime and self.__fanShutdownIsStopped is False:
-                self.__fanShutdownIsStopped = True
-                self.__relay.off()
-                self.__logger.info('Engine', message='Fan shutdown grace period reached, stopping fans')
-        else:
-            # Check if the fans are shutdown, if so start them up
-            if self.__fanShutdownIsStopped is True:
-                self.__fanShutdownIsStopped = False
-                self.__relay.on()
-                self.__logger.info('Engine', message='Fan min temperature reached, re-starting fans')
-
-        # Set duty cycle if fans are running
-        if self.__fanShutdownIsStopped is False and outputRotation is not None and self.__currentRotationPercent != outputRotation:
-            self.__currentRotationPercent = outputRotation
-            self.__pwm.setDutyCycle(self.__currentRotationPercent)
-
-        self.__logger.info('Engine', message='Iteration measured: Temp [{0}C], RPM [{1}%], Tach [{2},{3}], Fan Status [{4}]'.format(sensorTemp, self.__currentRotationPercent, tachAvgPulses, tachRepPulses, 'ON' if self.__fanShutdownIsStopped is False else 'OFF'))
-
-    def __panic(self):
-        self.__logger.info('Engine', message='Panic mode requested, setting Relay [ON], Duty Cycle[MAX], Buzzer:[Intermittent]')
-        self.__relay.on()
-        self.__pwm.setDutyCycle(self.__maxRotationPercent)
+        # Pick up a reloaded config, one snapshot is used for the whole iteration
+        snapshot = self.__config.getSnapshot()
+        if snapshot is not self.__snapshot:
+            self.__snapshot = snapshot
+            self.__faults.applySnapshot(snapshot)
+            for zone in self.__zones:
+                zone.applySnapshot(snapshot)
+
+        for index, zone in enumerate(self.__zones):
+            zone.iterate()
+            self.__recorder.record(index, zone.getStatus())
+
+        # Pace the next iterations on the fastest changing zone
+        rates = [zone.getTemperatureRate() for zone in self.__zones if zone.getTemperatureRate() is not None]
+        period = self.__scheduler.adapt(max(rates) if rates else None, all(zone.isStopped() for zone in self.__zones))
+
+        if self.__status is not None:
+            self.__publish(period)
+
+    def __publish(self, period: float):
+        zones = []
+        for zone in self.__zones:
+            status = zone.getStatus()
+            zones.append({
+                'name': zone.getName(),
+                'temperature': status['temperature'],
+                'dutyCycle': status['dutyCycle'],
+                'rpm': status['rpm'],
+                'relayOn': status['relayOn'],
+                'fanOn': not zone.isStopped(),
+                'panic': zone.getName() in self.__panicZones,
+                'faults': status['faults'],
+                'iteration': zone.getLastIterationTime(),
+                'override': status['override'],
+            })
+        self.__status.publish(self.__faults.getFaultIds(), zones, self.__scheduler.getStats(), period)
+
+    def __panic(self, zone: Zone):
+        self.__logger.info('Engine', message='Panic mode requested by zone {0}, setting Relay [ON], Duty Cycle[MAX], Buzzer:[Intermittent]'.format(zone.getName()))
+        self.__panicZones.add(zone.getName())
+        Instruments.PANICS.labels(zone.getName()).inc()
+        zone.panic()
         self.__buzzer.buzzIntermittent()
 
-    def __reset(self):
-        self.__logger.info('Engine', message='Reset requested, engine values restored to default')
-        self.__fanShutdownIsStopped = False
-        self.__fanShutdownTimeStamp = None
-        self.__currentRotationPercent = -1
-        self.__relay.on()
-        self.__buzzer.stop()
-        self.__buzzer.buzzOnce()
+    def __reset(self, zone: Zone):
+        self.__logger.info('Engine', message='Reset requested by zone {0}, engine values restored to default'.format(zone.getName()))
+        self.__panicZones.discard(zone.getName())
+        Instruments.RESETS.labels(zone.getName()).inc()
+        zone.reset()
+        # Keep alerting while other zones are still in panic mode
+        if not self.__panicZones:
+            self.__buzzer.stop()
+            self.__buzzer.buzzOnce()
+
+    def getZones(self):
+        return list(self.__zones)
+
+    def getZone(self, name: str):
+        """
+        Returns a zone by name, None if not found.
+        """
+        for zone in self.__zones:
+            if zone.getName() == name:
+                return zone
+        return None
+
+    def testPanic(self, zone: Zone, duration: float):
+        """
+        Enters panic mode on request, e.g. to check the alarm, the zone is reset after duration secs.
+        """
+        self.__logger.warning('Engine', message='Panic test of zone {0} requested for {1:g} secs'.format(zone.getName(), duration))
+        if zone.getName() in self.__panicTests:
+            self.__panicTests.pop(zone.getName()).cancel()
+        self.__panic(zone)
+        self.__panicTests[zone.getName()] = asyncio.get_running_loop().call_later(duration, self.__endPanicTest, zone)
+
+    def silenceBuzzer(self, duration: float):
+        """
+        Keeps the buzzer quiet for duration secs, 0 lifts the silence. The alarm resumes afterwards if a zone is still in panic mode.
+        """
+        if self.__silence is not None:
+            self.__silence.cancel()
+            self.__silence = None
+        self.__buzzer.silence(duration)
+        if duration > 0:
+            self.__logger.warning('Engine', message='Buzzer silenced for {0:g} secs'.format(duration))
+            self.__silence = asyncio.get_running_loop().call_later(duration, self.__resumeBuzzer)
+        else:
+            self.__logger.info('Engine', message='Buzzer silence lifted')
+            self.__resumeBuzzer()
+
+    def __endPanicTest(self, zone: Zone):
+        self.__panicTests.pop(zone.getName(), None)
+        # A fault that panicked the zone in the meantime keeps it in panic mode
+        if any(fault.isReported() for fault in self.__faults.getActive(zone)):
+            self.__logger.info('Engine', message='Panic test of zone {0} ended, panic mode kept for an active fault'.format(zone.getName()))
+            return
+        self.__logger.info('Engine', message='Panic test of zone {0} ended'.format(zone.getName()))
+        self.__reset(zone)
+
+    def __resumeBuzzer(self):
+        self.__silence = None
+        if self.__panicZones:
+            self.__buzzer.buzzIntermittent()
+
+    def __release(self):
+        for tachometer in self.__tachometers:
+            tachometer.shutdown()
+        Backends.shutdown()
+        self.__recorder.close()
+        if self.__status is not None:
+            # Readers tell a stopped daemon by the missing page
+            self.__status.close(unlink=True)
+            self.__status = None
 
     def __crash(self):
-        self.__relay.on()
-        self.__pwm.setDutyCycle(self.__maxRotationPercent)
-        self.stop()
+        for zone in self.__zones:
+            zone.panic()
+        # The process exits right away, tasks are left behind and only devices are released
+        self.__running = False
+        self.__release()
+        self.__logger.close()
         os._exit(1)
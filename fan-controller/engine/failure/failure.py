@@ -19,4 +19,7 @@ class Failures:
         return faultId in self.__collection
 
     def clear(self, faultId: str):
-        self.__collection.pop(faultId)
\ No newline at end of file
+        self.__collection.pop(faultId)
+
+    def getFaults(self):
+        return list(self.__collection.values())
\ No newline at end of file
@@ -1,15 +1,32 @@
-from time import time
+from time import time, monotonic
 
 class Fault:
 
     def __init__(self, type: str):
         self.__type = type
-        self.__timeStamp = int(time())
+        self.__timeStamp = time()
+        # Escalation deadlines are counted on the monotonic clock, unaffected by clock changes
+        self.__start = monotonic()
         self.__isNotified = False
         self.__isReported = False
 
+    def getType(self):
+        return self.__type
+
+    def getTimeStamp(self):
+        """
+        Returns when the fault was reported, in secs since the epoch.
+        """
+        return self.__timeStamp
+
+    def getStart(self):
+        """
+        Returns when the fault was reported, in monotonic secs.
+        """
+        return self.__start
+
     def getAge(self):
-        return int(time()) - self.__timeStamp
+        return int(monotonic() - self.__start)
 
     def isNotified(self):
         return self.__isNotified
@@ -21,4 +38,4 @@ class Fault:
         return self.__isReported
 
     def setReported(self):
-        self.__isReported = True
\ No newline at end of file
+        self.__isReported = True
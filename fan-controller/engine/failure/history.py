@@ -0,0 +1,62 @@
+import os
+import json
+
+class History:
+    """
+    Fault history, persisted as JSON lines, see [Faults] config section.
+
+    One line is appended per fault event (reported, notified, panic, cleared). Once the file exceeds maxBytes it is
+    moved to <path>.1, so at most twice maxBytes are kept.
+    """
+
+    EVENTS = ('reported', 'notified', 'panic', 'cleared')
+
+    def __init__(self, path: str, maxBytes: int = 1048576):
+        self.__path = path
+        self.__maxBytes = maxBytes
+        folder = os.path.dirname(self.__path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.__file = open(self.__path, 'a')
+
+    def getPath(self):
+        return self.__path
+
+    def setMaxBytes(self, maxBytes: int):
+        self.__maxBytes = maxBytes
+
+    def append(self, timestamp: float, zone: str, faultId: str, event: str, age: float):
+        """
+        Parameters:
+        - timestamp (float): Event time, in secs since the epoch;
+        - event (str): One of EVENTS;
+        - age (float): Secs since the fault was reported;
+        """
+        self.__file.write(json.dumps({'time': round(timestamp, 3), 'zone': zone, 'fault': faultId, 'event': event, 'age': round(age, 3)}) + '\n')
+        self.__file.flush()
+
+        if self.__maxBytes > 0 and self.__file.tell() > self.__maxBytes:
+            self.__file.close()
+            os.replace(self.__path, self.__path + '.1')
+            self.__file = open(self.__path, 'a')
+
+    def read(self):
+        """
+        Reads the events kept, oldest first.
+
+        Returns:
+        - generator : dict per event, see append();
+        """
+        for path in (self.__path + '.1', self.__path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # A line cut short by a power loss
+                        continue
+
+    def close(self):
+        self.__file.close()
@@ -0,0 +1,235 @@
+import heapq
+import asyncio
+
+from time import time, monotonic
+
+from config.config import Config
+from log.logger import Logger
+from metrics.instruments import Instruments
+from .failure import Failures
+from .history import History
+from .rule import Rule
+
+class Monitor:
+    """
+    Fault engine, evaluates the fault rules of every zone & escalates persisting faults, see [Fault:<id>] config sections.
+
+    Zones only report their iteration values, rules decide which faults are active. Escalations (notify & panic)
+    are pushed on a deadline heap when a fault is reported and fire on a timer of the event loop, on time rather
+    than on the next iteration. Cleared faults leave their entries behind, they are dropped once popped.
+    """
+    __config = None
+    __logger = None
+    __history = None
+    __loop = None
+    __timer = None
+
+    def __init__(self, config: Config, logger: Logger, onPanic, onReset):
+        """
+        Parameters:
+        - onPanic (callable): Invoked with the zone when a fault reaches its panic delay;
+        - onReset (callable): Invoked with the zone when the last fault that panicked it clears, for reset recovery;
+        """
+        self.__config = config
+        self.__logger = logger
+        self.__onPanic = onPanic
+        self.__onReset = onReset
+        self.__rules = []
+        self.__sections = None
+        self.__failures = {}
+        self.__gauges = {}
+        # (deadline, sequence, generation, zone, fault, action), the sequence keeps entries of equal deadline ordered
+        self.__deadlines = []
+        self.__sequence = 0
+        # Bumped when rules change, entries pushed for the previous rules are dropped
+        self.__generation = 0
+
+        snapshot = self.__config.getSnapshot()
+        try:
+            self.__history = History(snapshot.Faults.HistoryPath, snapshot.Faults.HistoryMaxBytes)
+        except OSError as e:
+            self.__logger.error('Engine', message='Cannot open fault history {0}, not persisting: {1}'.format(snapshot.Faults.HistoryPath, repr(e)))
+        self.applySnapshot(snapshot)
+
+    def applySnapshot(self, snapshot):
+        if self.__history is not None:
+            self.__history.setMaxBytes(snapshot.Faults.HistoryMaxBytes)
+        sections = [dict(section.items()) for section in snapshot.getFaults()]
+        if sections == self.__sections:
+            return
+
+        self.__sections = sections
+        self.__rules = [Rule.fromSection(section) for section in snapshot.getFaults()]
+        ids = self.getFaultIds()
+        self.__generation += 1
+        for zone, failures in self.__failures.values():
+            for fault in failures.getFaults():
+                # Faults of removed rules are cleared, the others are escalated on their new delays
+                rule = self.__getRule(fault.getType())
+                if rule is None:
+                    self.__clear(zone, failures, fault, None)
+                else:
+                    self.__schedule(zone, fault, rule)
+            for faultId in ids:
+                self.__getGauge(zone, faultId)
+        self.__arm()
+
+    def getFaultIds(self):
+        """
+        Returns the fault ids in rule order, the order of the zone status fault bits.
+        """
+        return [rule.getId() for rule in self.__rules]
+
+    def register(self, zone):
+        """
+        Starts monitoring a zone, fault gauges are exported at 0 right away.
+        """
+        self.__failures[zone.getName()] = (zone, Failures())
+        for rule in self.__rules:
+            self.__getGauge(zone, rule.getId())
+
+    def getActive(self, zone):
+        """
+        Returns the faults currently reported for a zone.
+
+        Returns:
+        - list : Fault per active fault;
+        """
+        return self.__failures[zone.getName()][1].getFaults()
+
+    def getBits(self, zone):
+        """
+        Returns the active faults of a zone as bits, one per rule in getFaultIds() order.
+        """
+        failures = self.__failures[zone.getName()][1]
+        return sum(1 << bit for bit, rule in enumerate(self.__rules) if failures.exists(rule.getId()))
+
+    def evaluate(self, zone, values: dict):
+        """
+        Evaluates the rules against the values of a zone iteration, reporting & clearing faults.
+
+        Parameters:
+        - values (dict): Zone iteration values, see Rule.matches();
+        """
+        now = monotonic()
+        # Without a running timer (e.g. iterations driven by a benchmark) escalations are caught up on here
+        if self.__timer is None:
+            self.__fire(now)
+
+        failures = self.__failures[zone.getName()][1]
+        for rule in self.__rules:
+            faultId = rule.getId()
+            if rule.matches(values):
+                if not failures.exists(faultId):
+                    self.__report(zone, failures, rule)
+            elif failures.exists(faultId):
+                self.__clear(zone, failures, failures.getFault(faultId), rule)
+
+    def start(self):
+        """
+        Starts firing escalations on their deadlines, on the timer of the running loop.
+        """
+        self.__loop = asyncio.get_running_loop()
+        self.__arm()
+
+    async def stop(self):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        self.__loop = None
+        if self.__history is not None:
+            self.__history.close()
+            self.__history = None
+
+    def __getRule(self, faultId: str):
+        for rule in self.__rules:
+            if rule.getId() == faultId:
+                return rule
+        return None
+
+    def __getGauge(self, zone, faultId: str):
+        key = (zone.getName(), faultId)
+        if key not in self.__gauges:
+            self.__gauges[key] = Instruments.FAULT_ACTIVE.labels(zone.getName(), faultId)
+            self.__gauges[key].set(0)
+        return self.__gauges[key]
+
+    def __report(self, zone, failures: Failures, rule: Rule):
+        failures.report(rule.getId())
+        fault = failures.getFault(rule.getId())
+        self.__getGauge(zone, rule.getId()).set(1)
+        self.__record(zone, fault, 'reported')
+
+        message = 'Fault {0} of zone {1} reported: {2}'.format(rule.getId(), zone.getName(), rule.getDescription())
+        if rule.getNotifyDelay() == 0:
+            self.__logger.warning('Engine', message=message)
+            fault.setNotified()
+        else:
+            self.__logger.info('Engine', message=message)
+
+        self.__schedule(zone, fault, rule)
+        self.__arm()
+
+    def __clear(self, zone, failures: Failures, fault, rule: Rule):
+        faultId = fault.getType()
+        failures.clear(faultId)
+        self.__getGauge(zone, faultId).set(0)
+        self.__record(zone, fault, 'cleared')
+
+        manual = fault.isReported() and rule is not None and rule.getRecovery() == 'manual'
+        self.__logger.info('Engine', message='Fault {0} of zone {1} cleared after {2} secs{3}'.format(faultId, zone.getName(), fault.getAge(), ', panic mode kept until restart (manual recovery)' if manual else ''))
+        # The zone stays in panic mode while another of its faults still holds it there
+        if fault.isReported() and not manual and not any(other.isReported() for other in failures.getFaults()):
+            self.__onReset(zone)
+
+    def __schedule(self, zone, fault, rule: Rule):
+        for action, delay, done in (('notify', rule.getNotifyDelay(), fault.isNotified()), ('panic', rule.getPanicDelay(), fault.isReported())):
+            if delay >= 0 and not done:
+                self.__sequence += 1
+                heapq.heappush(self.__deadlines, (fault.getStart() + delay, self.__sequence, self.__generation, zone, fault, action))
+
+    def __arm(self):
+        """
+        Sets the loop timer on the earliest deadline, fired & stale entries are popped first.
+        """
+        self.__fire(monotonic())
+        if self.__loop is None:
+            return
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        if self.__deadlines:
+            # The loop clock is the monotonic clock deadlines are counted on
+            self.__timer = self.__loop.call_at(self.__deadlines[0][0], self.__onTimer)
+
+    def __onTimer(self):
+        self.__timer = None
+        self.__arm()
+
+    def __fire(self, now: float):
+        while self.__deadlines and self.__deadlines[0][0] <= now:
+            deadline, sequence, generation, zone, fault, action = heapq.heappop(self.__deadlines)
+            failures = self.__failures[zone.getName()][1]
+            if generation != self.__generation or failures.getFault(fault.getType()) is not fault:
+                continue
+            self.__escalate(zone, fault, self.__getRule(fault.getType()), action)
+
+    def __escalate(self, zone, fault, rule: Rule, action: str):
+        if action == 'notify' and not fault.isNotified():
+            fault.setNotified()
+            self.__record(zone, fault, 'notified')
+            self.__logger.warning('Engine', message='Fault {0} of zone {1} still active after {2:g} secs: {3}'.format(rule.getId(), zone.getName(), rule.getNotifyDelay(), rule.getDescription()))
+        elif action == 'panic' and not fault.isReported():
+            fault.setReported()
+            self.__record(zone, fault, 'panic')
+            self.__logger.error('Engine', message='Fault {0} of zone {1} still active after {2:g} secs, entering PANIC mode.'.format(rule.getId(), zone.getName(), rule.getPanicDelay()))
+            self.__onPanic(zone)
+
+    def __record(self, zone, fault, event: str):
+        if self.__history is None:
+            return
+        try:
+            self.__history.append(time(), zone.getName(), fault.getType(), event, monotonic() - fault.getStart())
+        except OSError as e:
+            self.__logger.error('Engine', message='Cannot write fault history, not persisting: {0}'.format(repr(e)))
+            self.__history = None
@@ -0,0 +1,61 @@
+class Rule:
+    """
+    A fault rule, see [Fault:<id>] config sections.
+
+    The condition is looked up by name in CONDITIONS and evaluated against the values measured by a zone iteration,
+    escalations are scheduled from the time the fault is reported.
+    """
+
+    # Condition name -> (description, predicate of the zone values & the rule threshold)
+    CONDITIONS = {
+        'temperature_invalid': ('temperature could not be read', lambda values, threshold: values['temperature'] is None),
+        'rotation_invalid': ('rotation could not be calculated', lambda values, threshold: values['rotation'] is None and values['temperature'] is not None and values['temperature'] >= values['minTemp']),
+        'tacho_stalled': ('tachometer is reporting a possible fault with fan RPM', lambda values, threshold: not values['stopped'] and values['tachLikelyStopped']),
+        'temperature_above': ('temperature is above threshold', lambda values, threshold: values['temperature'] is not None and values['temperature'] > threshold),
+        'rpm_below': ('fan speed is below threshold', lambda values, threshold: not values['stopped'] and values['rpm'] is not None and values['rpm'] < threshold),
+    }
+
+    def __init__(self, faultId: str, condition: str, threshold: float = 0, notifyDelay: float = 0, panicDelay: float = -1, recovery: str = 'reset'):
+        """
+        Parameters:
+        - faultId (str): Fault id, as logged & exported;
+        - condition (str): Name of the condition in CONDITIONS;
+        - threshold (float): Value the threshold conditions compare against;
+        - notifyDelay (float): Secs after which a warning is logged, 0 logs the report itself as a warning, -1 never;
+        - panicDelay (float): Secs after which the zone enters panic mode, -1 never;
+        - recovery (str): What clearing the fault after a panic does: reset restores the zone, manual keeps panic mode until restart;
+        """
+        self.__id = faultId
+        self.__description, self.__predicate = self.CONDITIONS[condition]
+        self.__threshold = threshold
+        self.__notifyDelay = notifyDelay
+        self.__panicDelay = panicDelay
+        self.__recovery = recovery
+
+    @classmethod
+    def fromSection(cls, section):
+        return cls(section.Name, section.Condition, section.Threshold, section.NotifyDelay, section.PanicDelay, section.Recovery)
+
+    def getId(self):
+        return self.__id
+
+    def getDescription(self):
+        return self.__description
+
+    def getNotifyDelay(self):
+        return self.__notifyDelay
+
+    def getPanicDelay(self):
+        return self.__panicDelay
+
+    def getRecovery(self):
+        return self.__recovery
+
+    def matches(self, values: dict):
+        """
+        Whether the fault condition holds for the values of a zone iteration.
+
+        Parameters:
+        - values (dict): temperature, rotation, minTemp, stopped, tachLikelyStopped & rpm;
+        """
+        return self.__predicate(values, self.__threshold)
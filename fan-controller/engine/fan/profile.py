@@ -0,0 +1,122 @@
+import os
+import json
+import time
+
+class Profile:
+    """
+    A fan characterization, measured by engine/characterize.py: duty cycle -> RPM curve, the lowest duty cycle the
+    fan keeps spinning at & the lowest it starts from a stop at. See [Fan] Profile config key.
+    """
+
+    VERSION = 1
+
+    def __init__(self, zone: str, pulsesPerRev: int, points: list, minDuty: int, startDuty: int = None, created: float = None):
+        """
+        Parameters:
+        - zone (str): Zone the fans were measured on;
+        - pulsesPerRev (int): Tacho pulses per revolution the speeds were measured with;
+        - points (list): dict per duty cycle step: duty, rpm (mean), stdev, samples & settled;
+        - minDuty (int): Lowest duty cycle the fan reliably kept spinning at, sweeping down;
+        - startDuty (int): Lowest duty cycle that started the fan from a stop, None if not measured;
+        - created (float): Measurement time in secs since the epoch, defaults to now;
+        """
+        self.__zone = zone
+        self.__pulsesPerRev = pulsesPerRev
+        self.__points = sorted(points, key=lambda point: point['duty'])
+        self.__minDuty = minDuty
+        self.__startDuty = startDuty
+        self.__created = time.time() if created is None else created
+
+    def getZone(self):
+        return self.__zone
+
+    def getPoints(self):
+        return self.__points
+
+    def getMinDuty(self):
+        return self.__minDuty
+
+    def getStartDuty(self):
+        return self.__startDuty
+
+    def getCreated(self):
+        return self.__created
+
+    def getMaxRpm(self):
+        return max((point['rpm'] for point in self.__points), default=0)
+
+    def getSafeMinDuty(self, margin: int):
+        """
+        Returns the lowest duty cycle to run the fan at, margin points above the one it stalled under.
+        """
+        return min(self.__minDuty + margin, 100)
+
+    def getRpm(self, duty: float):
+        """
+        Returns the RPM expected at a duty cycle, interpolated between the measured points.
+        """
+        points = self.__points
+        if not points:
+            return None
+        if duty <= points[0]['duty']:
+            return points[0]['rpm']
+        for lower, upper in zip(points, points[1:]):
+            if duty <= upper['duty']:
+                share = (duty - lower['duty']) / (upper['duty'] - lower['duty'])
+                return lower['rpm'] + share * (upper['rpm'] - lower['rpm'])
+        return points[-1]['rpm']
+
+    def getDuty(self, rpm: float):
+        """
+        Returns the duty cycle expected to run the fan at an RPM, interpolated between the measured points the fan
+        spun at. Speeds past the measured ones get the nearest bound.
+        """
+        points = [point for point in self.__points if point['rpm'] > 0]
+        if not points:
+            return None
+        if rpm <= points[0]['rpm']:
+            return points[0]['duty']
+        for lower, upper in zip(points, points[1:]):
+            if rpm <= upper['rpm']:
+                if upper['rpm'] <= lower['rpm']:
+                    return upper['duty']
+                share = (rpm - lower['rpm']) / (upper['rpm'] - lower['rpm'])
+                return lower['duty'] + share * (upper['duty'] - lower['duty'])
+        return points[-1]['duty']
+
+    def save(self, path: str):
+        """
+        Writes the profile as JSON, replacing any previous one at once.
+        """
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({
+                'version': self.VERSION,
+                'zone': self.__zone,
+                'created': round(self.__created, 3),
+                'pulsesPerRev': self.__pulsesPerRev,
+                'minDuty': self.__minDuty,
+                'startDuty': self.__startDuty,
+                'maxRpm': round(self.getMaxRpm()),
+                'points': self.__points,
+            }, f, indent=2)
+            f.write('\n')
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Raises:
+        - OSError : When the profile cannot be read;
+        - ValueError : When the file is not a profile (or an unsupported version);
+        """
+        with open(path, 'r') as f:
+            values = json.load(f)
+        if not isinstance(values, dict) or values.get('version') != cls.VERSION:
+            raise ValueError('Not a fan profile (or an unsupported version): {0}'.format(path))
+        try:
+            return cls(values['zone'], values['pulsesPerRev'], values['points'], values['minDuty'], values.get('startDuty'), values.get('created'))
+        except (KeyError, TypeError) as e:
+            raise ValueError('Incomplete fan profile {0}: {1}'.format(path, repr(e)))
@@ -0,0 +1,148 @@
+import asyncio
+
+from statistics import mean, pstdev
+
+from log.logger import Logger
+from engine.pwm.pwm import PWM
+from engine.relay.relay import Relay
+from engine.tacho.tachometer import Tachometer
+from .profile import Profile
+
+class Sweep:
+    """
+    Characterizes the fans of a zone: steps the duty cycle down from full speed, waiting at each step for the RPM to
+    settle, until the fans stall. Then stops them with the relay & starts them again at increasing duty cycles, to
+    find the lowest one that starts them.
+
+    Speeds are measured over 1 sec windows, a step is settled once the last SETTLE_SAMPLES measurements are within
+    tolerance of each other.
+    """
+    # Measurements a step must hold steady over
+    SETTLE_SAMPLES = 3
+
+    # Secs the fans get to stop with the relay off, & to start before being measured
+    STOP_TIMEOUT = 30
+    START_TIME = 3
+
+    def __init__(self, logger: Logger, pwm: PWM, relay: Relay, tachometer: Tachometer, pulsesPerRev: int, step: int = 5, samples: int = 5, settleTimeout: float = 20, tolerance: float = 0.05, guard = None):
+        """
+        Parameters:
+        - step (int): Duty cycle percent between steps;
+        - samples (int): Measurements averaged per step once settled;
+        - settleTimeout (float): Secs a step may take to settle, it is recorded as unsettled past them;
+        - tolerance (float): Share of the RPM measurements may spread by once settled;
+        - guard (callable): Returns a reason to abort the sweep (e.g. too hot), None to go on. Checked every step;
+        """
+        self.__logger = logger
+        self.__pwm = pwm
+        self.__relay = relay
+        self.__tachometer = tachometer
+        self.__pulsesPerRev = pulsesPerRev
+        self.__step = step
+        self.__samples = samples
+        self.__settleTimeout = settleTimeout
+        self.__tolerance = tolerance
+        self.__guard = guard
+        # 1 sec windows only tell speeds apart by a pulse
+        self.__resolution = 60 / pulsesPerRev
+
+    async def run(self, zone: str):
+        """
+        Runs the sweep, leaving the fans powered at full speed.
+
+        Returns:
+        - Profile : The fan characterization;
+
+        Raises:
+        - RuntimeError : When aborted by the guard or the fans do not spin at full speed;
+        """
+        try:
+            points, minDuty = await self.__sweepDown()
+            startDuty = await self.__findStart(minDuty)
+        finally:
+            self.__relay.on()
+            self.__pwm.setDutyCycle(100)
+        return Profile(zone, self.__pulsesPerRev, points, minDuty, startDuty)
+
+    async def __sweepDown(self):
+        self.__relay.on()
+        points = []
+        minDuty = None
+        duties = list(range(100, 0, -self.__step)) + [0]
+
+        for duty in duties:
+            self.__check()
+            self.__pwm.setDutyCycle(duty)
+            point = await self.__settle(duty)
+            points.append(point)
+            self.__logger.info('Characterize', message='Duty cycle [{0}%]: RPM [{1:.0f}], StDev [{2:.1f}], Settled [{3}]'.format(duty, point['rpm'], point['stdev'], point['settled']))
+
+            if not point['spinning']:
+                break
+            minDuty = duty
+
+        if minDuty is None:
+            raise RuntimeError('Fans do not spin at full speed, check the wiring and [Fan] TachoGPIOPin')
+        self.__logger.info('Characterize', message='Fans keep spinning down to {0}% duty cycle'.format(minDuty))
+        return points, minDuty
+
+    async def __findStart(self, minDuty: int):
+        for duty in range(minDuty, 101, self.__step):
+            self.__check()
+            if not await self.__stop():
+                self.__logger.warning('Characterize', message='Fans did not stop with the relay off within {0} secs, start duty cycle not measured'.format(self.STOP_TIMEOUT))
+                return None
+
+            self.__pwm.setDutyCycle(duty)
+            self.__relay.on()
+            await asyncio.sleep(self.START_TIME)
+            speeds = [await self.__tachometer.measureRpm() for sample in range(2)]
+            if all(speed > 0 for speed in speeds):
+                self.__logger.info('Characterize', message='Fans start from a stop at {0}% duty cycle'.format(duty))
+                return duty
+            self.__logger.info('Characterize', message='Fans did not start at {0}% duty cycle'.format(duty))
+
+        self.__logger.warning('Characterize', message='Fans did not start from a stop at any duty cycle')
+        return None
+
+    async def __stop(self):
+        self.__relay.off()
+        stopped = 0
+        for second in range(self.STOP_TIMEOUT):
+            stopped = stopped + 1 if await self.__tachometer.measureRpm() == 0 else 0
+            if stopped >= 2:
+                return True
+        return False
+
+    async def __settle(self, duty: int):
+        speeds = []
+        settled = False
+        elapsed = 0
+
+        while elapsed < self.__settleTimeout:
+            speeds.append(await self.__tachometer.measureRpm())
+            elapsed += 1
+            recent = speeds[-self.SETTLE_SAMPLES:]
+            if len(recent) == self.SETTLE_SAMPLES and max(recent) - min(recent) <= max(self.__tolerance * mean(recent), 2 * self.__resolution):
+                settled = True
+                break
+
+        # Settled steps are measured afresh, unsettled ones keep their last measurements
+        if settled:
+            speeds = [await self.__tachometer.measureRpm() for sample in range(self.__samples)]
+        else:
+            speeds = speeds[-self.__samples:]
+
+        return {
+            'duty': duty,
+            'rpm': round(mean(speeds), 1),
+            'stdev': round(pstdev(speeds), 1),
+            'samples': len(speeds),
+            'settled': settled,
+            'spinning': all(speed > 0 for speed in speeds),
+        }
+
+    def __check(self):
+        reason = self.__guard() if self.__guard is not None else None
+        if reason is not None:
+            raise RuntimeError('Sweep aborted: {0}'.format(reason))
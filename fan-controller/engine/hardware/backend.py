@@ -0,0 +1,118 @@
+class DigitalOutput:
+    """
+    A GPIO pin driven HIGH (1) or LOW (0), e.g. a relay or a buzzer.
+    """
+
+    def write(self, value: int):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class EdgeInput:
+    """
+    A pulled up GPIO pin reporting falling edges, e.g. a fan tacho signal.
+    """
+
+    def enable(self, callback):
+        """
+        Starts reporting edges, callback(pin) is invoked once per falling edge.
+        """
+        raise NotImplementedError
+
+    def disable(self):
+        raise NotImplementedError
+
+    def close(self):
+        self.disable()
+
+class PwmOutput:
+    """
+    A PWM channel driving the fans, duty cycle in percentage.
+    """
+
+    def start(self, dutyCycle: float):
+        raise NotImplementedError
+
+    def setDutyCycle(self, dutyCycle: float):
+        raise NotImplementedError
+
+    def setFrequency(self, frequency: float):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+class TemperatureInput:
+    """
+    A temperature sensor.
+    """
+
+    def getName(self):
+        raise NotImplementedError
+
+    def setResolution(self, bits: int):
+        """
+        Sets the sensor resolution in bits, when supported.
+        """
+        pass
+
+    def readConverted(self):
+        """
+        Reads the result of a conversion started with Backend.triggerConversion(), see read().
+        """
+        return self.read()
+
+    def read(self):
+        """
+        Reads the sensor.
+
+        Returns:
+        - float : Temperature in degrees Celsius, None if the reading is not valid;
+
+        Raises:
+        - IOError : When the sensor cannot be accessed;
+        """
+        raise NotImplementedError
+
+class Backend:
+    """
+    Creates the devices of a hardware platform, see Backends for the available implementations.
+    """
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def digitalOutput(self, pin: int, initial: int = 0) -> DigitalOutput:
+        raise NotImplementedError
+
+    def edgeInput(self, pin: int) -> EdgeInput:
+        raise NotImplementedError
+
+    def pwmOutput(self, chip: int, channel: int, frequency: float) -> PwmOutput:
+        raise NotImplementedError
+
+    def temperatureInputs(self, pattern: str, file: str) -> list:
+        """
+        Discovers temperature sensors.
+
+        Parameters:
+        - pattern (str): Glob pattern of the sensor device folders;
+        - file (str): Sensor file within each device folder;
+
+        Returns:
+        - list : TemperatureInput per sensor found, may be empty;
+        """
+        raise NotImplementedError
+
+    def triggerConversion(self, sensors: list):
+        """
+        Starts a temperature conversion on all sensors at once, when supported.
+
+        Returns:
+        - bool : Whether a conversion was triggered, results are then read with readConverted();
+        """
+        return False
+
+    def shutdown(self):
+        pass
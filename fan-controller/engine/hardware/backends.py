@@ -0,0 +1,41 @@
+import importlib
+import threading
+
+from config.config import Config
+
+class Backends:
+    """
+    Loads the hardware backend selected by [Hardware] Backend, one shared instance per process.
+
+    Backend modules are only imported when selected, so platform libraries (RPi.GPIO, lgpio, ...) are not
+    required to import the engine on other boards or off the Raspberry PI.
+    """
+
+    AVAILABLE = {
+        'rpigpio': ('engine.hardware.rpigpio', 'RPiGPIOBackend'),
+        'native': ('engine.hardware.native', 'NativeBackend'),
+        'hwmon': ('engine.hardware.hwmon', 'HwmonBackend'),
+        'simulated': ('engine.hardware.simulated', 'SimulatedBackend'),
+    }
+
+    __instances = {}
+    __lock = threading.Lock()
+
+    @staticmethod
+    def get(config: Config):
+        snapshot = config.getSnapshot()
+        name = snapshot.Hardware.Backend
+
+        with Backends.__lock:
+            if name not in Backends.__instances:
+                module, className = Backends.AVAILABLE[name]
+                Backends.__instances[name] = getattr(importlib.import_module(module), className)(snapshot)
+
+            return Backends.__instances[name]
+
+    @staticmethod
+    def shutdown():
+        with Backends.__lock:
+            for backend in Backends.__instances.values():
+                backend.shutdown()
+            Backends.__instances = {}
@@ -0,0 +1,74 @@
+import os
+import glob
+
+from .backend import PwmOutput, TemperatureInput
+from .native import NativeBackend
+
+class Hwmon:
+    """
+    Locates kernel hwmon devices by driver name.
+    """
+
+    @staticmethod
+    def find(name: str):
+        devices = []
+        for path in sorted(glob.glob('/sys/class/hwmon/hwmon*')):
+            try:
+                with open(path + '/name') as f:
+                    if f.read().strip() == name:
+                        devices.append(path)
+            except OSError:
+                continue
+        return devices
+
+class HwmonPwm(PwmOutput):
+    """
+    A fan driven by the kernel pwm-fan driver, duty cycle is scaled to the 0-255 hwmon range.
+    """
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__pwmFd = os.open(self.__path + '/pwm1', os.O_WRONLY)
+
+    def start(self, dutyCycle: float):
+        # Manual fan speed control
+        if os.path.exists(self.__path + '/pwm1_enable'):
+            with open(self.__path + '/pwm1_enable', 'w') as f:
+                f.write('1')
+        self.setDutyCycle(dutyCycle)
+
+    def setDutyCycle(self, dutyCycle: float):
+        os.pwrite(self.__pwmFd, str(int(round(dutyCycle * 255 / 100))).encode(), 0)
+
+    def setFrequency(self, frequency: float):
+        # Frequency is set on the device tree overlay for pwm-fan
+        pass
+
+    def stop(self):
+        os.close(self.__pwmFd)
+
+class HwmonTemperature(TemperatureInput):
+
+    def __init__(self, path: str):
+        self.__path = path
+
+    def getName(self):
+        return os.path.basename(os.path.realpath(self.__path + '/device'))
+
+    def read(self):
+        with open(self.__path + '/temp1_input') as f:
+            return int(f.read()) / 1000.0
+
+class HwmonBackend(NativeBackend):
+    """
+    Kernel hwmon for PWM (pwm-fan) and temperature (e.g. w1_slave_temp), lgpio for the remaining pins.
+    """
+
+    def pwmOutput(self, chip: int, channel: int, frequency: float):
+        devices = Hwmon.find(self._snapshot.Hardware.HwmonFan)
+        if not devices:
+            raise IOError('No hwmon fan device named {0}'.format(self._snapshot.Hardware.HwmonFan))
+        return HwmonPwm(devices[0])
+
+    def temperatureInputs(self, pattern: str, file: str):
+        return [HwmonTemperature(path) for path in Hwmon.find(self._snapshot.Hardware.HwmonTemp)]
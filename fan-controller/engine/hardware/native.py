@@ -0,0 +1,64 @@
+import lgpio
+
+from .backend import Backend, DigitalOutput, EdgeInput
+from .sysfs import SysfsPwm
+from .w1 import W1Temperature
+
+class LgpioOutput(DigitalOutput):
+
+    def __init__(self, handle, pin: int, initial: int):
+        self.__handle = handle
+        self.__pin = pin
+        lgpio.gpio_claim_output(self.__handle, self.__pin, 1 if initial == 1 else 0)
+
+    def write(self, value: int):
+        lgpio.gpio_write(self.__handle, self.__pin, 1 if value == 1 else 0)
+
+    def close(self):
+        lgpio.gpio_free(self.__handle, self.__pin)
+
+class LgpioEdgeInput(EdgeInput):
+
+    def __init__(self, handle, pin: int):
+        self.__handle = handle
+        self.__pin = pin
+        self.__callback = None
+
+    def enable(self, callback):
+        lgpio.gpio_claim_alert(self.__handle, self.__pin, lgpio.FALLING_EDGE, lgpio.SET_PULL_UP)
+        self.__callback = lgpio.callback(self.__handle, self.__pin, lgpio.FALLING_EDGE, lambda chip, gpio, level, tick: callback(gpio))
+
+    def disable(self):
+        if self.__callback is not None:
+            self.__callback.cancel()
+            self.__callback = None
+            lgpio.gpio_free(self.__handle, self.__pin)
+
+class NativeBackend(Backend):
+    """
+    lgpio on the GPIO character device for pins, sysfs for PWM and w1 sysfs for temperature.
+
+    Talks to the kernel directly, skipping the RPi.GPIO compatibility layer (rpi-lgpio on the PI 5).
+    """
+
+    def __init__(self, snapshot):
+        super().__init__(snapshot)
+        self.__handle = lgpio.gpiochip_open(snapshot.Hardware.GPIOChip)
+
+    def digitalOutput(self, pin: int, initial: int = 0):
+        return LgpioOutput(self.__handle, pin, initial)
+
+    def edgeInput(self, pin: int):
+        return LgpioEdgeInput(self.__handle, pin)
+
+    def pwmOutput(self, chip: int, channel: int, frequency: float):
+        return SysfsPwm(chip, channel, frequency)
+
+    def temperatureInputs(self, pattern: str, file: str):
+        return W1Temperature.discover(pattern, file, self._snapshot.Temperature.ReadRetries)
+
+    def triggerConversion(self, sensors: list):
+        return W1Temperature.triggerBulk(sensors)
+
+    def shutdown(self):
+        lgpio.gpiochip_close(self.__handle)
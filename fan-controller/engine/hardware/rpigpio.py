@@ -0,0 +1,74 @@
+import RPi.GPIO as GPIO
+
+from rpi_hardware_pwm import HardwarePWM
+
+from .backend import Backend, DigitalOutput, EdgeInput, PwmOutput
+from .w1 import W1Temperature
+
+class RPiGPIOOutput(DigitalOutput):
+
+    def __init__(self, pin: int, initial: int):
+        self.__pin = pin
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(self.__pin, GPIO.OUT, initial=GPIO.HIGH if initial == 1 else GPIO.LOW)
+
+    def write(self, value: int):
+        GPIO.output(self.__pin, GPIO.HIGH if value == 1 else GPIO.LOW)
+
+    def close(self):
+        GPIO.cleanup(self.__pin)
+
+class RPiGPIOEdgeInput(EdgeInput):
+
+    def __init__(self, pin: int):
+        self.__pin = pin
+        self.__enabled = False
+
+    def enable(self, callback):
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(self.__pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        GPIO.add_event_detect(self.__pin, GPIO.FALLING, callback=callback)
+        self.__enabled = True
+
+    def disable(self):
+        # Removing the event detection releases the pin, edge callbacks are CPU intensive
+        if self.__enabled:
+            GPIO.cleanup(self.__pin)
+            self.__enabled = False
+
+class RPiHardwarePwm(PwmOutput):
+
+    def __init__(self, chip: int, channel: int, frequency: float):
+        self.__pwm = HardwarePWM(pwm_channel=channel, hz=frequency, chip=chip)
+
+    def start(self, dutyCycle: float):
+        self.__pwm.start(dutyCycle)
+
+    def setDutyCycle(self, dutyCycle: float):
+        self.__pwm.change_duty_cycle(dutyCycle)
+
+    def setFrequency(self, frequency: float):
+        self.__pwm.change_frequency(frequency)
+
+    def stop(self):
+        self.__pwm.stop()
+
+class RPiGPIOBackend(Backend):
+    """
+    RPi.GPIO (or the rpi-lgpio shim) for GPIO pins, rpi-hardware-pwm for PWM and w1 sysfs for temperature.
+    """
+
+    def digitalOutput(self, pin: int, initial: int = 0):
+        return RPiGPIOOutput(pin, initial)
+
+    def edgeInput(self, pin: int):
+        return RPiGPIOEdgeInput(pin)
+
+    def pwmOutput(self, chip: int, channel: int, frequency: float):
+        return RPiHardwarePwm(chip, channel, frequency)
+
+    def temperatureInputs(self, pattern: str, file: str):
+        return W1Temperature.discover(pattern, file, self._snapshot.Temperature.ReadRetries)
+
+    def triggerConversion(self, sensors: list):
+        return W1Temperature.triggerBulk(sensors)
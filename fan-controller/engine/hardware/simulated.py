@@ -0,0 +1,172 @@
+import random
+import threading
+import time
+
+from .backend import Backend, DigitalOutput, EdgeInput, PwmOutput, TemperatureInput
+from engine.control.plant import Plant
+
+class World:
+    """
+    A simulated chassis: a first order thermal model cooled by the fans.
+
+    Temperature settles towards Ambient + HeatLoad * (1 - CoolingEfficiency * speed) with TimeConstant,
+    speed being the mean fan duty cycle (0-1) of the zones whose relay powers the fans. Time runs TimeScale
+    times faster. Fans stall under StallDuty & only start from a stop at StartDuty.
+    """
+
+    def __init__(self, snapshot):
+        self.__simulation = snapshot.Simulation
+        self.__relayOnLevel = 1 if snapshot.Relay.OnState == 1 else 0
+        # PWM channel -> (relay pin, tacho pin) of the zone it drives
+        self.__channels = {(zone.PWMChipNo, zone.PWMChannel): (zone.RelayGPIOPin, zone.TachoGPIOPin) for zone in snapshot.getZones()}
+        self.__lock = threading.Lock()
+        self.__outputs = {}
+        self.__dutyCycles = {}
+        self.__spinning = {}
+        self.__plant = Plant(self.__simulation.Ambient, self.__simulation.HeatLoad, self.__simulation.CoolingEfficiency, self.__simulation.TimeConstant)
+        self.__clock = time.monotonic()
+
+    def setOutput(self, pin: int, value: int):
+        with self.__lock:
+            self.__advance()
+            self.__outputs[pin] = value
+
+    def getOutput(self, pin: int):
+        return self.__outputs.get(pin)
+
+    def setDutyCycle(self, channel: tuple, dutyCycle: float):
+        with self.__lock:
+            self.__advance()
+            self.__dutyCycles[channel] = dutyCycle
+
+    def getDutyCycle(self, channel: tuple):
+        return self.__dutyCycles.get(channel, 0.0)
+
+    def getRpm(self, tachoPin: int = None):
+        """
+        Returns the fan speed of the zones reporting on a tacho pin, of all zones when no pin is given.
+        """
+        return self.__getSpeed(tachoPin) * self.__simulation.MaxRPM
+
+    def getTemperature(self):
+        with self.__lock:
+            self.__advance()
+            # DS18B20 power-on & bus error values
+            if random.random() < self.__simulation.Glitches:
+                return random.choice((85.0, -127.0))
+            # DS18B20 12 bit resolution
+            return round((self.__plant.getTemperature() + random.gauss(0, self.__simulation.Noise)) * 16) / 16
+
+    def __getSpeed(self, tachoPin: int = None):
+        speeds = []
+        for channel, (relayPin, channelTachoPin) in self.__channels.items():
+            if tachoPin is not None and channelTachoPin != tachoPin:
+                continue
+            powered = self.__outputs.get(relayPin, self.__relayOnLevel) == self.__relayOnLevel
+            dutyCycle = self.__dutyCycles.get(channel, 0.0)
+            if not powered or dutyCycle < self.__simulation.StallDuty:
+                self.__spinning[channel] = False
+            elif dutyCycle >= self.__simulation.StartDuty:
+                self.__spinning[channel] = True
+            # Fans start spinning at full speed
+            speeds.append(dutyCycle / 100 if self.__spinning.get(channel, True) else 0.0)
+        return sum(speeds) / len(speeds) if speeds else 0.0
+
+    def __advance(self):
+        now = time.monotonic()
+        elapsed = (now - self.__clock) * self.__simulation.TimeScale
+        self.__clock = now
+
+        self.__plant.advance(self.__getSpeed(), elapsed)
+
+class SimulatedOutput(DigitalOutput):
+
+    def __init__(self, world: World, pin: int, initial: int):
+        self.__world = world
+        self.__pin = pin
+        self.__world.setOutput(self.__pin, initial)
+
+    def write(self, value: int):
+        self.__world.setOutput(self.__pin, value)
+
+class SimulatedEdgeInput(EdgeInput):
+    """
+    Emits tacho edges matching the simulated fan speed, in batches every 100 ms.
+    """
+
+    def __init__(self, world: World, pin: int, pulsesPerRev: int):
+        self.__world = world
+        self.__pin = pin
+        self.__pulsesPerRev = pulsesPerRev
+        self.__stopped = threading.Event()
+        self.__thread = None
+
+    def enable(self, callback):
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.__run, args=(callback,), daemon=True)
+        self.__thread.start()
+
+    def disable(self):
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self, callback):
+        pending = 0.0
+        while not self.__stopped.wait(0.1):
+            pending += self.__world.getRpm(self.__pin) * self.__pulsesPerRev / 60 * 0.1
+            while pending >= 1:
+                callback(self.__pin)
+                pending -= 1
+
+class SimulatedPwm(PwmOutput):
+
+    def __init__(self, world: World, chip: int, channel: int):
+        self.__world = world
+        self.__channel = (chip, channel)
+
+    def start(self, dutyCycle: float):
+        self.__world.setDutyCycle(self.__channel, dutyCycle)
+
+    def setDutyCycle(self, dutyCycle: float):
+        self.__world.setDutyCycle(self.__channel, dutyCycle)
+
+    def setFrequency(self, frequency: float):
+        pass
+
+class SimulatedTemperature(TemperatureInput):
+
+    def __init__(self, world: World, name: str):
+        self.__world = world
+        self.__name = name
+
+    def getName(self):
+        return self.__name
+
+    def read(self):
+        return self.__world.getTemperature()
+
+class SimulatedBackend(Backend):
+    """
+    Fully simulated hardware, for running & profiling the engine off the Raspberry PI.
+    """
+
+    def __init__(self, snapshot):
+        super().__init__(snapshot)
+        self.__world = World(snapshot)
+
+    def getWorld(self):
+        return self.__world
+
+    def digitalOutput(self, pin: int, initial: int = 0):
+        return SimulatedOutput(self.__world, pin, initial)
+
+    def edgeInput(self, pin: int):
+        return SimulatedEdgeInput(self.__world, pin, self._snapshot.Fan.TachoPulsesPerRev)
+
+    def pwmOutput(self, chip: int, channel: int, frequency: float):
+        return SimulatedPwm(self.__world, chip, channel)
+
+    def temperatureInputs(self, pattern: str, file: str):
+        return [SimulatedTemperature(self.__world, 'simulated-{0}'.format(i)) for i in range(self._snapshot.Simulation.Sensors)]
@@ -0,0 +1,57 @@
+import os
+import time
+
+from .backend import PwmOutput
+
+class SysfsPwm(PwmOutput):
+    """
+    A PWM channel driven through /sys/class/pwm, keeping the duty cycle file open between writes.
+    """
+
+    def __init__(self, chip: int, channel: int, frequency: float):
+        self.__chipPath = '/sys/class/pwm/pwmchip{0}'.format(chip)
+        self.__path = '{0}/pwm{1}'.format(self.__chipPath, channel)
+        self.__dutyCycle = 0
+        self.__period = 0
+        self.__dutyFd = None
+
+        if not os.path.isdir(self.__path):
+            self.__write(self.__chipPath + '/export', channel)
+            # Wait for udev to set the channel permissions
+            for _ in range(50):
+                if os.access(self.__path + '/period', os.W_OK):
+                    break
+                time.sleep(0.02)
+
+        self.__dutyFd = os.open(self.__path + '/duty_cycle', os.O_WRONLY)
+        self.setFrequency(frequency)
+
+    def start(self, dutyCycle: float):
+        self.setDutyCycle(dutyCycle)
+        self.__write(self.__path + '/enable', 1)
+
+    def setDutyCycle(self, dutyCycle: float):
+        self.__dutyCycle = dutyCycle
+        os.pwrite(self.__dutyFd, str(int(self.__period * dutyCycle / 100)).encode(), 0)
+
+    def setFrequency(self, frequency: float):
+        period = int(1_000_000_000 / frequency)
+        # Duty cycle must not exceed the period at any time
+        if period < self.__period:
+            self.__period = period
+            self.setDutyCycle(self.__dutyCycle)
+            self.__write(self.__path + '/period', period)
+        else:
+            self.__write(self.__path + '/period', period)
+            self.__period = period
+            self.setDutyCycle(self.__dutyCycle)
+
+    def stop(self):
+        self.__write(self.__path + '/enable', 0)
+        if self.__dutyFd is not None:
+            os.close(self.__dutyFd)
+            self.__dutyFd = None
+
+    def __write(self, path, value):
+        with open(path, 'w') as f:
+            f.write(str(value))
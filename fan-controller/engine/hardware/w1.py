@@ -0,0 +1,101 @@
+import os
+import glob
+import time
+import subprocess
+
+from .backend import TemperatureInput
+
+class W1Temperature(TemperatureInput):
+    """
+    A DS18B20 sensor read through the w1-therm sysfs interface.
+    """
+
+    def __init__(self, device: str, retries: int = 3):
+        self.__device = device
+        self.__folder = os.path.dirname(device)
+        self.__retries = retries
+
+    def getName(self):
+        return os.path.basename(self.__folder)
+
+    def getMaster(self):
+        """
+        Returns the sysfs folder of the bus master the sensor is attached to.
+        """
+        return os.path.dirname(os.path.realpath(self.__folder))
+
+    def setResolution(self, bits: int):
+        with open(self.__folder + '/resolution', 'w') as f:
+            f.write(str(bits))
+
+    def read(self):
+        # Bad CRC reads are retried a bounded number of times
+        for attempt in range(self.__retries + 1):
+            lines = self.__readTempRaw()
+            if lines and lines[0].strip()[-3:] == 'YES':
+                break
+            if attempt < self.__retries:
+                time.sleep(0.2)
+        else:
+            return None
+
+        equals_pos = lines[1].find('t=')
+        if equals_pos == -1:
+            return None
+
+        return float(lines[1][equals_pos + 2:]) / 1000.0
+
+    def readConverted(self):
+        # After a bulk conversion the temperature attribute returns the converted value right away
+        with open(self.__folder + '/temperature', 'r') as f:
+            value = f.read().strip()
+
+        if not value:
+            return None
+
+        return int(value) / 1000.0
+
+    def __readTempRaw(self):
+        f = open(self.__device, 'r')
+        lines = f.readlines()
+        f.close()
+        return lines
+
+    # Kernel modules the sensors are read through, as listed in /sys/module
+    MODULES = ('w1_gpio', 'w1_therm')
+
+    @staticmethod
+    def loadModules():
+        """
+        Loads the w1 kernel modules, only forking modprobe for the ones not loaded yet.
+        """
+        for module in W1Temperature.MODULES:
+            if not os.path.isdir('/sys/module/' + module):
+                subprocess.run(['modprobe', module], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    @staticmethod
+    def discover(pattern: str, file: str, retries: int = 3):
+        W1Temperature.loadModules()
+
+        return [W1Temperature(folder + file, retries) for folder in sorted(glob.glob(pattern))]
+
+    @staticmethod
+    def triggerBulk(sensors: list):
+        """
+        Starts a conversion on every bus master the sensors are attached to, through therm_bulk_read.
+
+        Returns:
+        - bool : Whether every bus master accepted the trigger;
+        """
+        masters = set(sensor.getMaster() for sensor in sensors if isinstance(sensor, W1Temperature))
+        if not masters:
+            return False
+
+        try:
+            for master in masters:
+                with open(master + '/therm_bulk_read', 'w') as f:
+                    f.write('trigger')
+        except OSError:
+            return False
+
+        return True
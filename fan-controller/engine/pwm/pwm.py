@@ -1,29 +1,32 @@
-from rpi_hardware_pwm import HardwarePWM
-
 from config.config import Config
 from log.logger import Logger
+from engine.hardware.backends import Backends
 
 class PWM:
     __config = None
     __logger = None
     __pwm = None
 
-    def __init__(self, config: Config, logger: Logger):
+    def __init__(self, config: Config, logger: Logger, zone: str = None):
         self.__config = config
         self.__logger = logger
 
-        self.__pwmChannel = int(self.__config.get('PWM', 'Channel'))
-        self.__pwmChipNo = int(self.__config.get('PWM', 'ChipNo'))
-        self.__pwmFrequency = int(self.__config.get('PWM', 'Frequency'))
+        snapshot = self.__config.getSnapshot()
+        zone = snapshot.getZone(zone)
+        self.__zone = zone.Name
+        self.__pwmChannel = zone.PWMChannel
+        self.__pwmChipNo = zone.PWMChipNo
+        self.__pwmFrequency = snapshot.PWM.Frequency
 
-        self.__pwm = HardwarePWM(pwm_channel=self.__pwmChannel, hz=60, chip=self.__pwmChipNo)
-        self.setFrequency(self.__pwmFrequency)
+        # Opened at the configured frequency straight away, fans run at full speed until the first iteration
+        self.__pwm = Backends.get(self.__config).pwmOutput(self.__pwmChipNo, self.__pwmChannel, self.__pwmFrequency)
         self.__pwm.start(100) # full duty cycle
+        self.__logger.info('PWM', message='Initializing PWM of zone {0}: Chip [{1}], Channel [{2}], Frequency [{3}]'.format(self.__zone, self.__pwmChipNo, self.__pwmChannel, self.__pwmFrequency))
 
     def setDutyCycle(self, dutyCycle: int):
-        self.__pwm.change_duty_cycle(dutyCycle)
-        self.__logger.info('PWM', message='Setting duty cycle to {0}'.format(dutyCycle))
+        self.__pwm.setDutyCycle(dutyCycle)
+        self.__logger.info('PWM', message='Setting duty cycle of zone {zone} to {dutyCycle}', zone=self.__zone, dutyCycle=dutyCycle)
 
     def setFrequency(self, frequency: float):
-        self.__pwm.change_frequency(frequency)
-        self.__logger.info('PWM', message='Setting frequency to {0}'.format(frequency))
\ No newline at end of file
+        self.__pwm.setFrequency(frequency)
+        self.__logger.info('PWM', message='Setting frequency of zone {0} to {1}'.format(self.__zone, frequency))
\ No newline at end of file
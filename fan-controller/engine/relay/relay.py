@@ -1,35 +1,79 @@
-import RPi.GPIO as GPIO
-
 from config.config import Config
 from log.logger import Logger
+from engine.hardware.backends import Backends
+from metrics.instruments import Instruments
 
 class Relay:
+    """
+    A relay powering the fans, possibly shared by several zones.
+
+    Zones sharing a relay register with it, the fans are only powered off once every registered zone asked to.
+    """
     __config = None
     __initialState = None
     __onState = None
 
-    def __init__(self, config: Config, logger: Logger):
+    def __init__(self, config: Config, logger: Logger, zone: str = None):
         self.__config = config
         self.__logger = logger
 
-        self.__devicePin = int(self.__config.get('Relay', 'GPIOPin'))
-        self.__initialState = int(self.__config.get('Relay', 'InitialState'))
-        self.__onState = int(self.__config.get('Relay', 'OnState'))
-
-        if self.__initialState == 1:
-            state = GPIO.HIGH
-        else:
-            state = GPIO.LOW
+        snapshot = self.__config.getSnapshot()
+        self.__devicePin = snapshot.getZone(zone).RelayGPIOPin
+        self.__initialState = snapshot.Relay.InitialState
+        self.__onState = snapshot.Relay.OnState
+        self.__zones = set()
+        self.__idleZones = set()
+        self.__state = None
 
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.__devicePin, GPIO.OUT, initial=state)
+        self.__output = Backends.get(self.__config).digitalOutput(self.__devicePin, 1 if self.__initialState == 1 else 0)
 
         self.__logger.info('Relay', message='Initializing Relay: GPIOPin [{0}], InitialState [{1}], OnState [{2}]'.format(self.__devicePin, self.__initialState, self.__onState))
 
-    def on(self):
-        GPIO.output(self.__devicePin, GPIO.HIGH if self.__onState == 1 else GPIO.LOW)
-        self.__logger.info('Relay', message='Setting state to ON')
+    def getPin(self):
+        return self.__devicePin
+
+    def isOn(self):
+        """
+        Whether the fans are powered, as last set (initially, as per InitialState).
+        """
+        if self.__state is None:
+            return self.__initialState == self.__onState
+        return self.__state == 'on'
+
+    def register(self, zone: str):
+        self.__zones.add(zone)
+
+    def on(self, zone: str = None):
+        """
+        Powers the fans on, on behalf of a zone or of every zone when none is given.
+        """
+        if zone is None:
+            self.__idleZones.clear()
+        else:
+            self.__idleZones.discard(zone)
+        self.__output.write(1 if self.__onState == 1 else 0)
+        self.__count('on')
+        self.__logger.info('Relay', message='Setting state of GPIOPin [{0}] to ON'.format(self.__devicePin))
+
+    def off(self, zone: str = None):
+        """
+        Powers the fans off, on behalf of a zone or of every zone when none is given.
+
+        Returns:
+        - bool : Whether the fans were powered off, False while other zones still need them;
+        """
+        if zone is None:
+            self.__idleZones.update(self.__zones)
+        else:
+            self.__idleZones.add(zone)
+            if not self.__idleZones >= self.__zones:
+                return False
+        self.__output.write(0 if self.__onState == 1 else 1)
+        self.__count('off')
+        self.__logger.info('Relay', message='Setting state of GPIOPin [{0}] to OFF'.format(self.__devicePin))
+        return True
 
-    def off(self):
-        GPIO.output(self.__devicePin, GPIO.LOW if self.__onState == 1 else GPIO.HIGH)
-        self.__logger.info('Relay', message='Setting state to OFF')
\ No newline at end of file
+    def __count(self, state: str):
+        if state != self.__state:
+            Instruments.RELAY_TOGGLES.labels(self.__devicePin, state).inc()
+            self.__state = state
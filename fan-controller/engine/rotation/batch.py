@@ -0,0 +1,66 @@
+import numpy as np
+
+class BatchCurve:
+    """
+    A NumPy vectorized evaluator for many quadratic Bézier fan curves at once.
+
+    Every curve parameter may be a scalar or a 1-D array, arrays are broadcast against each other so
+    a set of N curves is evaluated over T temperatures in a single pass, yielding a (N, T) result.
+    """
+
+    def __init__(self, minTemp, maxTemp, minRotationPercent, maxRotationPercent, controlPointTemp, controlPointRotationPercent):
+        """
+        Parameters:
+        - minTemp, maxTemp (float|array): Temperature bounds of the curves, in degrees Celsius;
+        - minRotationPercent, maxRotationPercent (float|array): Rotation bounds of the curves, in percentage;
+        - controlPointTemp, controlPointRotationPercent (float|array): Bézier control points (temp,rotation);
+        """
+        params = np.broadcast_arrays(*[np.atleast_1d(np.asarray(value, dtype=float)) for value in (minTemp, maxTemp, minRotationPercent, maxRotationPercent, controlPointTemp, controlPointRotationPercent)])
+
+        # Params as column vectors, so they broadcast against a row of temperatures
+        self.__minTemp, self.__maxTemp, self.__minRot, self.__maxRot, self.__cntTemp, self.__cntRot = [param.reshape(-1, 1) for param in params]
+
+    def getCount(self):
+        """
+        Returns the number of curves being evaluated.
+        """
+        return self.__minTemp.shape[0]
+
+    def calculate(self, temperatures):
+        """
+        Calculates the rotation of every curve for every temperature.
+
+        Parameters:
+        - temperatures (array): Temperatures in degrees Celsius, shape (T,).
+
+        Returns:
+        - ndarray : Rotation percentages, shape (N, T), NaN where a temperature is off a curve;
+        """
+        temps = np.asarray(temperatures, dtype=float).reshape(1, -1)
+
+        normTemp = self.__tempToNorm(temps)
+
+        return (1 - normTemp) ** 2 * self.__minRot + 2 * (1 - normTemp) * normTemp * self.__cntRot + normTemp ** 2 * self.__maxRot
+
+    def __tempToNorm(self, temps):
+        # Coefficients for the quadratic equation
+        a = self.__maxTemp - 2 * self.__cntTemp + self.__minTemp
+        b = 2 * (self.__cntTemp - self.__minTemp)
+        c = self.__minTemp - temps
+
+        a, b, c = np.broadcast_arrays(a, b, c)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrtDiscriminant = np.sqrt(b ** 2 - 4 * a * c)
+            t1 = (-b + sqrtDiscriminant) / (2 * a)
+            t2 = (-b - sqrtDiscriminant) / (2 * a)
+            # Control point sits midway, the curve is linear on temperature
+            linear = -c / b
+
+        t1 = np.where((t1 >= 0) & (t1 <= 1), t1, np.nan)
+        t2 = np.where((t2 >= 0) & (t2 <= 1), t2, np.nan)
+        t = np.where(np.isnan(t1), t2, t1)
+
+        t = np.where(a == 0, np.where((linear >= 0) & (linear <= 1), linear, np.nan), t)
+
+        return t
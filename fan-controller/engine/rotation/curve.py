@@ -0,0 +1,173 @@
+from array import array
+from math import sqrt, isnan, ceil
+
+class Curve:
+    """
+    A compiled quadratic Bézier fan curve, answering temperature to rotation lookups from a precomputed table.
+    """
+
+    def __init__(self, minTemp: float, maxTemp: float, minRotationPercent: float, maxRotationPercent: float, controlPointTemp: float, controlPointRotationPercent: float, resolution: float = 0.01):
+        """
+        Compiles the curve into a dense temperature -> rotation table.
+
+        Parameters:
+        - minTemp, maxTemp (float): Temperature bounds of the curve, in degrees Celsius;
+        - minRotationPercent, maxRotationPercent (float): Rotation bounds of the curve, in percentage;
+        - controlPointTemp, controlPointRotationPercent (float): Bézier control point (temp,rotation);
+        - resolution (float): Temperature step between table entries, in degrees Celsius;
+        """
+        if resolution <= 0:
+            raise ValueError('Curve resolution must be greater than 0, got {0}'.format(resolution))
+
+        self.__params = (float(minTemp), float(maxTemp), float(minRotationPercent), float(maxRotationPercent), float(controlPointTemp), float(controlPointRotationPercent), float(resolution))
+
+        self.__minTemp = float(minTemp)
+        self.__maxTemp = float(maxTemp)
+        self.__resolution = float(resolution)
+        self.__scale = 1 / self.__resolution
+
+        self.__minRpmTemp = (float(minRotationPercent), float(minTemp))
+        self.__cntRpmTemp = (float(controlPointRotationPercent), float(controlPointTemp))
+        self.__maxRpmTemp = (float(maxRotationPercent), float(maxTemp))
+
+        self.__table = self.__compile()
+
+        # The last step is narrower than the resolution when it does not divide the range
+        self.__lastIndex = len(self.__table) - 2
+        self.__lastStep = self.__maxTemp - (self.__minTemp + self.__lastIndex * self.__resolution)
+
+    def getParams(self):
+        """
+        Returns the parameters the curve was compiled with, in constructor order.
+        """
+        return self.__params
+
+    def getSize(self):
+        """
+        Returns the number of entries in the lookup table.
+        """
+        return len(self.__table)
+
+    def calculate(self, temperature: float):
+        """
+        Looks up the rotation for a temperature, interpolating linearly between table entries.
+
+        Parameters:
+        - temperature (float): Temperature in degrees Celsius.
+
+        Returns:
+        - (float, float) : The (rotationPercent, temperature) point on the curve, or [None,None] if temperature is off the curve;
+        """
+        if temperature < self.__minTemp or temperature > self.__maxTemp:
+            return [None, None]
+
+        position = (temperature - self.__minTemp) * self.__scale
+        index = int(position)
+        table = self.__table
+
+        if index > self.__lastIndex:
+            rotation = table[-1]
+        elif index == self.__lastIndex:
+            fraction = (temperature - self.__minTemp - index * self.__resolution) / self.__lastStep
+            rotation = table[index] + (table[index + 1] - table[index]) * fraction
+        else:
+            rotation = table[index] + (table[index + 1] - table[index]) * (position - index)
+
+        # Entries the curve cannot be solved for are stored as NaN
+        if isnan(rotation):
+            return [None, None]
+
+        return rotation, temperature
+
+    def calculateMany(self, temperatures):
+        """
+        Looks up the rotation for a batch of temperatures.
+
+        Parameters:
+        - temperatures (iterable): Temperatures in degrees Celsius.
+
+        Returns:
+        - list : One (rotationPercent, temperature) point per temperature, see calculate();
+        """
+        calculate = self.calculate
+        return [calculate(float(temperature)) for temperature in temperatures]
+
+    def solve(self, temperature: float):
+        """
+        Solves the curve analytically for a temperature, bypassing the lookup table.
+
+        Parameters:
+        - temperature (float): Temperature in degrees Celsius.
+
+        Returns:
+        - (float, float) : The (rotationPercent, temperature) point on the curve, or [None,None] if temperature is off the curve;
+        """
+        normTemp = self.__tempToNorm(temperature)
+
+        if normTemp is None:
+            return [None, None]
+
+        return self.__quadratic_bezier(normTemp)
+
+    def __compile(self):
+        # Table covers [minTemp, maxTemp] in resolution steps, the last entry being pinned to maxTemp
+        steps = max(1, ceil((self.__maxTemp - self.__minTemp) * self.__scale - 1e-9))
+        table = array('d', bytes(8 * (steps + 1)))
+
+        for i in range(steps + 1):
+            rotation = self.solve(min(self.__minTemp + i * self.__resolution, self.__maxTemp))[0]
+            table[i] = float('nan') if rotation is None else rotation
+
+        return table
+
+    def __quadratic_bezier(self, normTemp):
+        """
+        Calculate a point on a quadratic Bézier curve at a specific parameter t.
+
+        Parameters:
+        - normTemp (float): Normalized temperature param between 0 and 1;
+
+        Returns:
+        - (float, float): The (x,y)(rotationPercent, temperature) coordinates of the point on the curve at parameter t.
+        """
+        minRpmTemp, cntRpmTemp, maxRpmTemp = self.__minRpmTemp, self.__cntRpmTemp, self.__maxRpmTemp
+
+        x = (1 - normTemp) ** 2 * minRpmTemp[0] + 2 * (1 - normTemp) * normTemp * cntRpmTemp[0] + normTemp ** 2 * maxRpmTemp[0]
+        y = (1 - normTemp) ** 2 * minRpmTemp[1] + 2 * (1 - normTemp) * normTemp * cntRpmTemp[1] + normTemp ** 2 * maxRpmTemp[1]
+
+        return x, y
+
+    def __tempToNorm(self, temp):
+        minTemp, cntTemp, maxTemp = self.__minTemp, self.__cntRpmTemp[1], self.__maxTemp
+
+        # Coefficients for the quadratic equation
+        a = maxTemp - 2 * cntTemp + minTemp
+        b = 2 * (cntTemp - minTemp)
+        c = minTemp - temp
+
+        # Control point sits midway, the curve is linear on temperature
+        if a == 0:
+            if b == 0:
+                return None
+            t = -c / b
+            return t if 0 <= t <= 1 else None
+
+        # Calculate the discriminant
+        discriminant = b ** 2 - 4 * a * c
+
+        # Check if there are real solutions
+        if discriminant < 0:
+            return None
+
+        # Calculate the two possible values for t
+        sqrt_discriminant = sqrt(discriminant)
+        t1 = (-b + sqrt_discriminant) / (2 * a)
+        t2 = (-b - sqrt_discriminant) / (2 * a)
+
+        # Filter and return only positive t values within the range [0, 1]
+        if 0 <= t1 <= 1:
+            return t1
+        elif 0 <= t2 <= 1:
+            return t2
+        else:
+            return None
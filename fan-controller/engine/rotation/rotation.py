@@ -1,86 +1,80 @@
-from math import sqrt
 from config.config import Config
 from log.logger import Logger
+from .curve import Curve
 
 class Rotation:
+    __curve = None
 
-    def __init__(self, config: Config, logger: Logger):
+    def __init__(self, config: Config, logger: Logger, zone: str = None):
         self.__config = config
         self.__logger = logger
+        self.__zone = zone
 
-    def calculate(self, currentTemperature: float):
+        self.refresh()
+
+    def refresh(self, snapshot = None, minRotation: float = None):
         """
-        Calculates the rotation based on temperature.
+        Reads the curve parameters of the zone from a config snapshot, compiling a new curve only when they changed.
 
         Parameters:
-        - currentTemperature (float): Temperature in degrees Celsius.
+        - snapshot (Snapshot): Config snapshot to read from, defaults to the current one;
+        - minRotation (float): Lowest rotation of the curve, defaults to the zone MinRotationPercent (e.g. a fan profile sets it);
 
         Returns:
-        - int : Returns in percentage the rpm to apply;
+        - bool : Whether the curve was rebuilt;
         """
+        if snapshot is None:
+            snapshot = self.__config.getSnapshot()
 
-        minTemp = float(self.__config.get('Temperature', 'MinTemp'))
-        maxTemp = float(self.__config.get('Temperature', 'MaxTemp'))
+        # Zones are only added or removed on restart, keep the current curve meanwhile
+        zone = snapshot.getZone(self.__zone)
+        if zone is None:
+            return False
 
-        minRotationPercent = float(self.__config.get('Fan', 'MinRotationPercent'))
-        maxRotationPercent = float(self.__config.get('Fan', 'MaxRotationPercent'))
+        params = (
+            float(zone.MinTemp),
+            float(zone.MaxTemp),
+            float(zone.MinRotationPercent if minRotation is None else minRotation),
+            float(zone.MaxRotationPercent),
+            float(zone.ControlPointTemp),
+            float(zone.ControlPointRotationPercent),
+            float(snapshot.Temperature.CurveResolution),
+        )
 
-        controlPointTemp = float(self.__config.get('Temperature', 'ControlPointTemp'))
-        controlPointRotationPercent = float(self.__config.get('Fan', 'ControlPointRotationPercent'))
+        if self.__curve is not None and self.__curve.getParams() == params:
+            return False
 
-        minRpmTemp = (minRotationPercent, minTemp)
-        cntRpmTemp = (controlPointRotationPercent, controlPointTemp)
-        maxRpmTemp = (maxRotationPercent, maxTemp)
+        self.__curve = Curve(*params)
+        self.__logger.info('Rotation', message='Compiled curve of zone ' + zone.Name + ': minTemp,maxTemp[{0},{1}], minRot,maxRot[{2},{3}], control[{4},{5}], resolution[{6}], entries[{7}]'.format(*params, self.__curve.getSize()))
 
-        normTemp = self.__tempToNorm(currentTemperature, minTemp, controlPointTemp, maxTemp)
+        return True
 
-        if normTemp == None:
-            return [None,None]
+    def getCurve(self):
+        return self.__curve
 
-        output = self.__quadratic_bezier(normTemp, minRpmTemp, cntRpmTemp, maxRpmTemp)
+    def calculate(self, currentTemperature: float):
+        """
+        Calculates the rotation based on temperature.
 
-        self.__logger.debug('Rotation', message='Calculation: minTemp,maxTemp[{0},{1}], minRot,maxRot[{2},{3}], maxTemp-minTemp[{4}], curTemp[{5}], normTemp[{6}] output[{7},{8}]'.format(minTemp, maxTemp, minRotationPercent, maxRotationPercent, maxTemp - minTemp, currentTemperature, normTemp, output[0],output[1]))
+        Parameters:
+        - currentTemperature (float): Temperature in degrees Celsius.
 
+        Returns:
+        - int : Returns in percentage the rpm to apply;
+        """
+        output = self.__curve.calculate(currentTemperature)
+        # Positional arguments: the cheapest call to drop, this runs on every iteration
+        self.__logger.debug('Rotation', 'Calculation: curTemp[{0}] output[{1},{2}]', currentTemperature, output[0], output[1])
         return output
 
-    def __quadratic_bezier(self, normTemp, minRpmTemp, cntRpmTemp, maxRpmTemp):
+    def calculateMany(self, temperatures):
         """
-        Calculate a point on a quadratic Bézier curve at a specific parameter t.
+        Calculates the rotation for a batch of temperatures.
 
         Parameters:
-        - normTemp (float): Normalized temperature param between 0 and 1;
-        - minRpmTemp, cntRpmTemp, maxRpmTemp (tuple): Control points, each defined as (x, y).
+        - temperatures (iterable): Temperatures in degrees Celsius.
 
         Returns:
-        - (float, float): The (x,y)(rotationPercent, temperature) coordinates of the point on the curve at parameter t.
+        - list : One (rotationPercent, temperature) point per temperature;
         """
-        x = (1 - normTemp) ** 2 * minRpmTemp[0] + 2 * (1 - normTemp) * normTemp * cntRpmTemp[0] + normTemp ** 2 * maxRpmTemp[0]
-        y = (1 - normTemp) ** 2 * minRpmTemp[1] + 2 * (1 - normTemp) * normTemp * cntRpmTemp[1] + normTemp ** 2 * maxRpmTemp[1]
-
-        return x, y
-
-    def __tempToNorm(self, temp, minTemp, cntTemp, maxTemp):
-        # Coefficients for the quadratic equation
-        a = maxTemp - 2 * cntTemp + minTemp
-        b = 2 * (cntTemp - minTemp)
-        c = minTemp - temp
-
-        # Calculate the discriminant
-        discriminant = b ** 2 - 4 * a * c
-
-        # Check if there are real solutions
-        if discriminant < 0:
-            return None
-
-        # Calculate the two possible values for t
-        sqrt_discriminant = sqrt(discriminant)
-        t1 = (-b + sqrt_discriminant) / (2 * a)
-        t2 = (-b - sqrt_discriminant) / (2 * a)
-
-        # Filter and return only positive t values within the range [0, 1]
-        if 0 <= t1 <= 1:
-            return t1
-        elif 0 <= t2 <= 1:
-            return t2
-        else:
-            return None
\ No newline at end of file
+        return self.__curve.calculateMany(temperatures)
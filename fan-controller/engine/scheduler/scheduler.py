@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+from config.config import Config
+from log.logger import Logger
+from metrics.instruments import Instruments
+
+class Scheduler:
+    """
+    Paces the engine iterations on monotonic clock deadlines, see [Scheduler] config section.
+
+    Deadlines advance by a fixed period from the previous deadline rather than from the end of the iteration,
+    so the time spent iterating does not add up to the period. In adaptive mode the period is shortened as soon
+    as temperature changes quickly, and gradually stretched while it is stable or the fans are off.
+    """
+    __config = None
+    __logger = None
+
+    # Factor the period is stretched by per iteration, shortening is immediate
+    STRETCH_FACTOR = 1.25
+
+    def __init__(self, config: Config, logger: Logger):
+        self.__config = config
+        self.__logger = logger
+        self.__period = self.__config.getSnapshot().Scheduler.Interval
+        self.__deadline = None
+        self.__iterationStart = None
+        # Since start, as published in the status page
+        self.__totalIterations = 0
+        self.__totalOverruns = 0
+        self.__lastJitter = 0.0
+        self.__lastWork = 0.0
+        self.__resetStats()
+
+    def getPeriod(self):
+        """
+        Returns the current period between iterations in seconds.
+        """
+        return self.__period
+
+    def getStats(self):
+        """
+        Returns the loop statistics since start.
+
+        Returns:
+        - dict : iterations, overruns, jitter (secs, of the last wake up) & work (secs, of the last iteration);
+        """
+        return {'iterations': self.__totalIterations, 'overruns': self.__totalOverruns, 'jitter': self.__lastJitter, 'work': self.__lastWork}
+
+    def adapt(self, rate: float, idle: bool):
+        """
+        Picks the period of the next iterations, in adaptive mode only.
+
+        Parameters:
+        - rate (float): Fastest temperature change across zones in degrees per minute, None if unknown;
+        - idle (bool): Whether the fans of every zone are off;
+
+        Returns:
+        - float : The period in seconds;
+        """
+        scheduler = self.__config.getSnapshot().Scheduler
+
+        if not scheduler.Adaptive:
+            target = scheduler.Interval
+        elif rate is not None and rate >= scheduler.FastRate:
+            target = scheduler.MinInterval
+        elif idle or (rate is not None and rate <= scheduler.StableRate):
+            target = scheduler.MaxInterval
+        else:
+            target = scheduler.Interval
+
+        # React to heat spikes right away, back off gradually so a single quiet reading does not stretch the period
+        if target > self.__period:
+            target = min(target, self.__period * self.STRETCH_FACTOR)
+
+        if target != self.__period and self.__logger.isDebug():
+            self.__logger.debug('Scheduler', message='Period changed from {0:.2f}s to {1:.2f}s: rate [{2}C/min], idle [{3}]'.format(self.__period, target, 'n/a' if rate is None else '{0:.2f}'.format(rate), idle))
+
+        self.__period = target
+        Instruments.SCHEDULER_PERIOD.labels().set(self.__period)
+        return self.__period
+
+    async def wait(self):
+        """
+        Sleeps until the next iteration deadline, shutdown cancels the wait.
+        """
+        now = time.monotonic()
+        if self.__deadline is None:
+            self.__deadline = now
+        if self.__iterationStart is not None:
+            work = now - self.__iterationStart
+            self.__lastWork = work
+            self.__workTotal += work
+            self.__workMax = max(self.__workMax, work)
+
+        self.__deadline += self.__period
+
+        # Missed deadlines are skipped rather than caught up with back to back iterations
+        if now > self.__deadline:
+            self.__overruns += 1
+            self.__totalOverruns += 1
+            Instruments.SCHEDULER_OVERRUNS.labels().inc()
+            self.__deadline = now
+
+        await asyncio.sleep(self.__deadline - now)
+
+        woke = time.monotonic()
+        jitter = woke - self.__deadline
+        self.__iterations += 1
+        self.__totalIterations += 1
+        self.__lastJitter = jitter
+        self.__jitterTotal += jitter
+        self.__jitterMax = max(self.__jitterMax, jitter)
+        Instruments.SCHEDULER_JITTER_SECONDS.labels().observe(jitter)
+        self.__iterationStart = woke
+
+        if woke - self.__statsStart >= self.__config.getSnapshot().Scheduler.StatsInterval:
+            self.__reportStats(woke)
+
+    def __reportStats(self, now: float):
+        if self.__iterations > 0:
+            self.__logger.info('Scheduler', message='Loop stats over {0:.0f}s: Iterations [{1}], Period [{2:.2f}s], Overruns [{3}], Jitter avg,max [{4:.2f}ms,{5:.2f}ms], Work avg,max [{6:.2f}ms,{7:.2f}ms]'.format(
+                now - self.__statsStart, self.__iterations, self.__period, self.__overruns,
+                self.__jitterTotal / self.__iterations * 1000, self.__jitterMax * 1000,
+                self.__workTotal / self.__iterations * 1000, self.__workMax * 1000))
+        self.__resetStats(now)
+
+    def __resetStats(self, now: float = None):
+        self.__statsStart = time.monotonic() if now is None else now
+        self.__iterations = 0
+        self.__overruns = 0
+        self.__jitterTotal = 0.0
+        self.__jitterMax = 0.0
+        self.__workTotal = 0.0
+        self.__workMax = 0.0
@@ -1,62 +1,167 @@
 import os
 import sys
 import inspect
+import argparse
+import itertools
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
 
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(os.path.dirname(currentdir))
 
 sys.path.insert(0, parentdir + '/fan-controller')
 
-from engine.rotation.rotation import Rotation
+from engine.rotation.curve import Curve
+from engine.rotation.batch import BatchCurve
 from config.config import Config
 from log.logger import Logger
 
-config = Config(parentdir + '/data/config/default.ini')
-logger = Logger(parentdir + '/data/logs/', 'Simulate')
-rotation = Rotation(config, logger)
-
-# Set min max temp and rotation
-minTemp = float(config.get('Temperature', 'MinTemp'))
-maxTemp = float(config.get('Temperature', 'MaxTemp'))
-
-minRotationPercent = float(config.get('Fan', 'MinRotationPercent'))
-maxRotationPercent = float(config.get('Fan', 'MaxRotationPercent'))
-
-controlPointTemp = float(config.get('Temperature', 'ControlPointTemp'))
-controlPointRotationPercent = float(config.get('Fan', 'ControlPointRotationPercent'))
-
-# Plotting calculated curve
-num_points = 100
-t_values = np.linspace(minTemp, maxTemp, num_points)
-x_values = []
-y_values = []
-for t in t_values:
-    x, y = rotation.calculate(t)
-    x_values.append(x)
-    y_values.append(y)
-plt.plot(x_values, y_values, color='green', label='Calculated Curve')
-
-# Plotting Min and Max Temperature lines
-x1, y1 = [0, 175], [minTemp, minTemp]
-plt.plot(x1, y1, color='blue', label='Min Temp [{0}º]'.format(minTemp))
-
-x1, y1 = [0, 175], [maxTemp, maxTemp]
-plt.plot(x1, y1, color='red', label='Max Temp [{0}º]'.format(maxTemp))
-
-# Plotting Min and Max Rotation lines
-x1, y1 = [minRotationPercent, minRotationPercent], [-5, 40]
-plt.plot(x1, y1, color='cyan', label='Min RPM [{0}%]'.format(minRotationPercent))
-
-x1, y1 = [maxRotationPercent, maxRotationPercent], [-5, 40]
-plt.plot(x1, y1, color='yellow', label='Max RPM [{0}%]'.format(maxRotationPercent))
-
-plt.scatter([controlPointTemp], [controlPointRotationPercent], color='orange', label='Control Point TempXRot')
-
-plt.legend()
-plt.xlabel('RPM (%)')
-plt.ylabel('Temperature (cº)')
-plt.title('Fan Controller - Cubic Bezier Curve')
-plt.grid(True)
-plt.show()
\ No newline at end of file
+# Curve params, as (arg, config section, config key)
+PARAMS = [
+    ('min_temp', 'Temperature', 'MinTemp'),
+    ('max_temp', 'Temperature', 'MaxTemp'),
+    ('min_rotation', 'Fan', 'MinRotationPercent'),
+    ('max_rotation', 'Fan', 'MaxRotationPercent'),
+    ('control_temp', 'Temperature', 'ControlPointTemp'),
+    ('control_rotation', 'Fan', 'ControlPointRotationPercent'),
+]
+
+def parseRange(value):
+    """
+    Parses a sweep range, either a single value or an inclusive "start:stop:step".
+    """
+    parts = [float(part) for part in str(value).split(':')]
+    if len(parts) == 1:
+        return np.array(parts)
+    if len(parts) != 3 or parts[2] <= 0:
+        raise argparse.ArgumentTypeError('Range must be "value" or "start:stop:step", got {0}'.format(value))
+    start, stop, step = parts
+    return np.arange(start, stop + step / 2, step)
+
+def plotBounds(plt, minTemp, maxTemp, minRotationPercent, maxRotationPercent):
+    # Plotting Min and Max Temperature lines
+    x1, y1 = [0, 175], [minTemp, minTemp]
+    plt.plot(x1, y1, color='blue', label='Min Temp [{0}º]'.format(minTemp))
+
+    x1, y1 = [0, 175], [maxTemp, maxTemp]
+    plt.plot(x1, y1, color='red', label='Max Temp [{0}º]'.format(maxTemp))
+
+    # Plotting Min and Max Rotation lines
+    x1, y1 = [minRotationPercent, minRotationPercent], [-5, 40]
+    plt.plot(x1, y1, color='cyan', label='Min RPM [{0}%]'.format(minRotationPercent))
+
+    x1, y1 = [maxRotationPercent, maxRotationPercent], [-5, 40]
+    plt.plot(x1, y1, color='yellow', label='Max RPM [{0}%]'.format(maxRotationPercent))
+
+def savePlot(plt, output, name, formats):
+    for format in formats:
+        plt.savefig(os.path.join(output, '{0}.{1}'.format(name, format)), format=format)
+    plt.close()
+
+def simulate(args, config, plt):
+    # Set min max temp and rotation
+    minTemp, maxTemp, minRotationPercent, maxRotationPercent, controlPointTemp, controlPointRotationPercent = [float(getattr(args, arg)[0]) for arg, section, key in PARAMS]
+
+    curve = Curve(minTemp, maxTemp, minRotationPercent, maxRotationPercent, controlPointTemp, controlPointRotationPercent, float(config.get('Temperature', 'CurveResolution') or 0.01))
+
+    # Plotting calculated curve
+    t_values = np.linspace(minTemp, maxTemp, args.points)
+    x_values, y_values = zip(*curve.calculateMany(t_values))
+    plt.plot(x_values, y_values, color='green', label='Calculated Curve')
+
+    plotBounds(plt, minTemp, maxTemp, minRotationPercent, maxRotationPercent)
+
+    plt.scatter([controlPointTemp], [controlPointRotationPercent], color='orange', label='Control Point TempXRot')
+
+    plt.legend()
+    plt.xlabel('RPM (%)')
+    plt.ylabel('Temperature (cº)')
+    plt.title('Fan Controller - Cubic Bezier Curve')
+    plt.grid(True)
+
+    if args.output is None:
+        plt.show()
+        return
+
+    savePlot(plt, args.output, 'curve', args.formats)
+    np.savetxt(os.path.join(args.output, 'curve.csv'), np.column_stack([t_values, [np.nan if x is None else x for x in x_values]]), delimiter=',', fmt='%.4f', header='Temperature,RotationPercent', comments='')
+
+def sweep(args, plt):
+    from matplotlib.collections import LineCollection
+
+    ranges = [getattr(args, arg) for arg, section, key in PARAMS]
+    temps = np.linspace(ranges[0].min(), ranges[1].max(), args.points)
+
+    header = ','.join(['Curve', 'Plot'] + [key for arg, section, key in PARAMS] + ['T{0:.2f}'.format(temp) for temp in temps])
+
+    curves = 0
+    with open(os.path.join(args.output, 'sweep.csv'), 'w') as table:
+        table.write(header + '\n')
+
+        # Curves sharing the same bounds are evaluated (and plotted) together
+        for plot, bounds in enumerate(itertools.product(*ranges[:4])):
+            grid = np.array(list(itertools.product(*ranges[4:]))).reshape(-1, 2)
+            minTemp, maxTemp, minRotationPercent, maxRotationPercent = bounds
+
+            output = BatchCurve(minTemp, maxTemp, minRotationPercent, maxRotationPercent, grid[:, 0], grid[:, 1]).calculate(temps)
+
+            count = output.shape[0]
+            params = np.column_stack([np.arange(curves, curves + count), np.full(count, plot), np.tile(bounds, (count, 1)), grid])
+            np.savetxt(table, np.hstack([params, output]), delimiter=',', fmt=['%d', '%d'] + ['%g'] * len(PARAMS) + ['%.4f'] * len(temps))
+            curves += count
+
+            # Plotting calculated curves, colored by control point rotation
+            drawn = output[:args.max_plot_curves]
+            segments = [np.column_stack([rotations, temps]) for rotations in drawn]
+            lines = LineCollection(segments, cmap='viridis', linewidths=0.5, alpha=0.6)
+            lines.set_array(grid[:len(drawn), 1])
+
+            figure, axes = plt.subplots()
+            axes.add_collection(lines)
+            figure.colorbar(lines, ax=axes, label='Control Point Rotation (%)')
+            plotBounds(plt, minTemp, maxTemp, minRotationPercent, maxRotationPercent)
+            axes.autoscale()
+            plt.legend()
+            plt.xlabel('RPM (%)')
+            plt.ylabel('Temperature (cº)')
+            plt.title('Fan Controller - Curve Sweep [{0} curves]'.format(count))
+            plt.grid(True)
+            savePlot(plt, args.output, 'sweep_{0:04d}'.format(plot), args.formats)
+
+    return curves
+
+def main():
+    config = Config(parentdir + '/data/config/default.ini')
+    logger = Logger(parentdir + '/data/logs/', 'Simulate')
+
+    argParser = argparse.ArgumentParser(description='Raspberry PI : Fan Controller - Simulates & plots the fan curve')
+    argParser.add_argument('--output', dest='output', default=None, help='Directory to write plots & CSV tables to, runs without a display')
+    argParser.add_argument('--format', dest='format', default='png', help='Comma separated plot formats, e.g. png,svg')
+    argParser.add_argument('--points', dest='points', type=int, default=100, help='Number of temperature points per curve')
+    argParser.add_argument('--max-plot-curves', dest='max_plot_curves', type=int, default=2000, help='Max curves drawn per sweep plot, all curves are written to CSV')
+    for arg, section, key in PARAMS:
+        argParser.add_argument('--' + arg.replace('_', '-'), dest=arg, type=parseRange, default=parseRange(config.get(section, key)), help='[{0}][{1}] value or "start:stop:step" sweep range'.format(section, key))
+
+    args = argParser.parse_args()
+    args.formats = [format.strip() for format in args.format.split(',') if format.strip()]
+
+    isSweep = any(len(getattr(args, arg)) > 1 for arg, section, key in PARAMS)
+
+    if isSweep and args.output is None:
+        argParser.error('Sweeps require --output')
+
+    # Render off-screen when writing files
+    if args.output is not None:
+        matplotlib.use('Agg')
+        os.makedirs(args.output, exist_ok=True)
+
+    import matplotlib.pyplot as plt
+
+    if isSweep:
+        curves = sweep(args, plt)
+        logger.info('Simulate', message='Sweep completed: {0} curves written to {1}'.format(curves, args.output))
+    else:
+        simulate(args, config, plt)
+
+if __name__ == '__main__':
+    main()
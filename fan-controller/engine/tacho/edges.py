@@ -0,0 +1,121 @@
+import multiprocessing
+import time
+
+from math import sqrt
+
+class EdgeCounter:
+    """
+    Continuously counts tacho edges in a dedicated worker process.
+
+    Edges are timestamped by the kernel and buffered on the line request (libgpiod v2), the worker drains
+    the buffer in batches instead of running a Python callback per edge. Stats are published once per
+    window into a shared memory array readable without any IPC round-trip.
+    """
+
+    # Shared memory slots
+    RPM = 0
+    PERIOD = 1
+    JITTER = 2
+    PULSES = 3
+    UPDATED = 4
+
+    def __init__(self, chip: str, pin: int, pulsesPerRev: int, window: float = 1.0, bufferSize: int = 1024):
+        """
+        Parameters:
+            chip (str): GPIO chip device path, e.g. /dev/gpiochip0;
+            pin (int): Line offset of the tacho signal on the chip;
+            pulsesPerRev (int): Fan tacho pulses per revolution;
+            window (float): Seconds between published stats;
+            bufferSize (int): Kernel edge event buffer size;
+        """
+        self.__chip = chip
+        self.__pin = pin
+        self.__pulsesPerRev = pulsesPerRev
+        self.__window = window
+        self.__bufferSize = bufferSize
+
+        self.__context = multiprocessing.get_context('spawn')
+        self.__stats = self.__context.Array('d', 5)
+        self.__running = self.__context.Event()
+        self.__process = None
+
+    def start(self):
+        if self.isAlive():
+            return
+        self.__running.set()
+        self.__process = self.__context.Process(target=EdgeCounter.work, args=(self.__chip, self.__pin, self.__pulsesPerRev, self.__window, self.__bufferSize, self.__stats, self.__running), name='fan-controller-tacho', daemon=True)
+        self.__process.start()
+
+    def stop(self, timeout: float = 2.0):
+        self.__running.clear()
+        if self.__process is not None:
+            self.__process.join(timeout)
+            if self.__process.is_alive():
+                self.__process.terminate()
+            self.__process = None
+
+    def isAlive(self):
+        return self.__process is not None and self.__process.is_alive()
+
+    def read(self):
+        """
+        Returns the last published stats.
+
+        Returns:
+            list: [rpm, period (s), jitter (s), pulses (per s), updated (monotonic s)], see slot constants.
+        """
+        with self.__stats.get_lock():
+            return self.__stats[:]
+
+    @staticmethod
+    def work(chip, pin, pulsesPerRev, window, bufferSize, stats, running):
+        import gpiod
+        from gpiod.line import Bias, Edge
+
+        settings = gpiod.LineSettings(edge_detection=Edge.FALLING, bias=Bias.PULL_UP)
+        windowNs = int(window * 1_000_000_000)
+
+        with gpiod.request_lines(chip, consumer='fan-controller-tacho', config={pin: settings}, event_buffer_size=bufferSize) as request:
+            windowStart = time.monotonic_ns()
+            lastEdge = None
+            pulses = 0
+            intervals = 0
+            intervalSum = 0
+            intervalSqSum = 0
+
+            while running.is_set():
+                # Sleep in the kernel until edges are buffered or the window closes
+                if request.wait_edge_events(window / 4):
+                    for event in request.read_edge_events(bufferSize):
+                        pulses += 1
+                        if lastEdge is not None:
+                            interval = event.timestamp_ns - lastEdge
+                            intervals += 1
+                            intervalSum += interval
+                            intervalSqSum += interval * interval
+                        lastEdge = event.timestamp_ns
+
+                now = time.monotonic_ns()
+                if now - windowStart < windowNs:
+                    continue
+
+                rpm = period = jitter = 0.0
+                if intervals > 0:
+                    mean = intervalSum / intervals
+                    period = mean / 1e9
+                    jitter = sqrt(max(intervalSqSum / intervals - mean * mean, 0)) / 1e9
+                    rpm = 60 / (period * pulsesPerRev)
+
+                with stats.get_lock():
+                    stats[EdgeCounter.RPM] = rpm
+                    stats[EdgeCounter.PERIOD] = period
+                    stats[EdgeCounter.JITTER] = jitter
+                    stats[EdgeCounter.PULSES] = pulses * 1e9 / (now - windowStart)
+                    stats[EdgeCounter.UPDATED] = now / 1e9
+
+                # A stopped fan produces no edges, don't measure a period across windows
+                if pulses == 0:
+                    lastEdge = None
+
+                windowStart = now
+                pulses = intervals = intervalSum = intervalSqSum = 0
@@ -1,6 +1,12 @@
+from array import array
+from collections import deque
+
 class Stack:
     """
-    A stack with a maximum size that supports adding integers and calculating the average.
+    A fixed size window over the latest pushed integers, backed by a ring buffer.
+
+    Statistics are kept incrementally as values enter and leave the window, so pushing and reading
+    the average, variance, min, max or repeated count are O(1) regardless of the window size.
     """
 
     def __init__(self, maxSize: int):
@@ -10,8 +16,22 @@ class Stack:
         Parameters:
             maxSize (int): The maximum number of elements the stack can hold.
         """
-        self.__stack = []
+        if maxSize < 1:
+            raise ValueError('Stack size must be at least 1, got {0}'.format(maxSize))
+
         self.__maxSize = maxSize
+        self.__buffer = array('q', bytes(8 * maxSize))
+        self.__head = 0
+        self.__count = 0
+        self.__pushed = 0
+        self.__sum = 0
+        self.__sqSum = 0
+        # Value histogram & number of values occurring more than once
+        self.__histogram = {}
+        self.__repeated = 0
+        # Monotonic queues of (pushIndex, value) for window min & max
+        self.__minQueue = deque()
+        self.__maxQueue = deque()
 
     def push(self, num):
         """
@@ -20,9 +40,41 @@ class Stack:
         Parameters:
             num (int): The number to add to the stack.
         """
-        self.__stack.append(num)
-        if len(self.__stack) > self.__maxSize:
-            self.__stack.pop(0)  # Remove the oldest element (FIFO behavior)
+        num = int(num)
+
+        # Evict the oldest element (FIFO behavior)
+        if self.__count == self.__maxSize:
+            self.__forget(self.__buffer[self.__head])
+        else:
+            self.__count += 1
+
+        self.__buffer[self.__head] = num
+        self.__head = (self.__head + 1) % self.__maxSize
+
+        self.__sum += num
+        self.__sqSum += num * num
+
+        occurrences = self.__histogram.get(num, 0) + 1
+        self.__histogram[num] = occurrences
+        if occurrences == 2:
+            self.__repeated += 1
+
+        # Drop queued values that can no longer be the window min / max
+        index = self.__pushed
+        self.__pushed += 1
+        oldest = self.__pushed - self.__count
+
+        while self.__minQueue and self.__minQueue[-1][1] >= num:
+            self.__minQueue.pop()
+        self.__minQueue.append((index, num))
+        while self.__minQueue[0][0] < oldest:
+            self.__minQueue.popleft()
+
+        while self.__maxQueue and self.__maxQueue[-1][1] <= num:
+            self.__maxQueue.pop()
+        self.__maxQueue.append((index, num))
+        while self.__maxQueue[0][0] < oldest:
+            self.__maxQueue.popleft()
 
     def getAverage(self):
         """
@@ -31,7 +83,31 @@ class Stack:
         Returns:
             float: The average of the stack elements. Returns 0 if the stack is empty.
         """
-        return sum(self.__stack) / len(self.__stack) if self.__stack else 0
+        return self.__sum / self.__count if self.__count else 0
+
+    def getVariance(self):
+        """
+        Returns the population variance of the elements in the stack.
+
+        Returns:
+            float: The variance of the stack elements. Returns 0 if the stack is empty.
+        """
+        if not self.__count:
+            return 0
+        mean = self.__sum / self.__count
+        return max(self.__sqSum / self.__count - mean * mean, 0)
+
+    def getMin(self):
+        """
+        Returns the smallest element in the stack, None if the stack is empty.
+        """
+        return self.__minQueue[0][1] if self.__count else None
+
+    def getMax(self):
+        """
+        Returns the largest element in the stack, None if the stack is empty.
+        """
+        return self.__maxQueue[0][1] if self.__count else None
 
     def getRepeated(self):
         """
@@ -40,17 +116,14 @@ class Stack:
         Returns:
             int: The number of repeated values in the stack.
         """
-        from collections import Counter
-        counter = Counter(self.__stack)
-        # Count how many values occur more than once
-        return sum(count > 1 for count in counter.values())
+        return self.__repeated
 
     def getCount(self):
         """
         Returns stack count
         :return:
         """
-        return len(self.__stack)
+        return self.__count
 
     def getRepeatedAsPer(self):
         """
@@ -64,4 +137,16 @@ class Stack:
         Gets the number of elements in the stack as percentage.
         :return:
         """
-        return self.getCount() == self.__maxSize
\ No newline at end of file
+        return self.getCount() == self.__maxSize
+
+    def __forget(self, num):
+        self.__sum -= num
+        self.__sqSum -= num * num
+
+        occurrences = self.__histogram[num] - 1
+        if occurrences == 0:
+            del self.__histogram[num]
+        else:
+            self.__histogram[num] = occurrences
+        if occurrences == 1:
+            self.__repeated -= 1
@@ -1,10 +1,12 @@
-import RPi.GPIO as GPIO
 import time
-import threading
+import asyncio
 
 from config.config import Config
 from log.logger import Logger
+from engine.hardware.backends import Backends
+from runtime.runtime import Runtime
 from .stack import Stack
+from .edges import EdgeCounter
 
 class Tachometer:
     __config = None
@@ -14,24 +16,43 @@ class Tachometer:
     __pulsesCounter = 0
     __pulsesMin = 0
     __isRunning = False
+    __task = None
+    # Speed & monotonic time of the last sampled mode measurement
+    __lastRpm = None
+    __lastMeasured = None
 
-    def __init__(self, config: Config, logger: Logger):
+    # Seconds between sampled mode readings, GPIO edge detection is CPU intensive and only enabled to read
+    SAMPLED_IDLE_TIME = 16
+
+    def __init__(self, config: Config, logger: Logger, zone: str = None):
 
         self.__config = config
         self.__logger = logger
 
-        self.__devicePin = int(self.__config.get('Fan', 'TachoGPIOPin'))
-        self.__pulsesPerRev = int(self.__config.get('Fan', 'TachoPulsesPerRev'))
-        self.__maxRepeatedPulses = int(self.__config.get('Fan', 'TachoMaxRepeatedPulsesAsPer'))
-        self.__pulseStack = Stack(15)
+        self.__snapshot = self.__config.getSnapshot()
+        self.__devicePin = self.__snapshot.getZone(zone).TachoGPIOPin
+        self.__pulsesPerRev = self.__snapshot.Fan.TachoPulsesPerRev
+        self.__maxRepeatedPulses = self.__snapshot.Fan.TachoMaxRepeatedPulsesAsPer
+        self.__mode = self.__snapshot.Fan.TachoMode
+        self.__pulseStack = Stack(self.__snapshot.Fan.TachoWindowSize)
+
+        # Continuous mode counts edges from the kernel buffer in a worker process
+        self.__edgeCounter = None
+        self.__edgeInput = None
+        if self.__mode == 'continuous':
+            self.__edgeCounter = EdgeCounter(self.__snapshot.Fan.TachoGPIOChip, self.__devicePin, self.__pulsesPerRev)
+        else:
+            self.__edgeInput = Backends.get(self.__config).edgeInput(self.__devicePin)
 
-        self.__internalClock = 0
-        self.__thread = threading.Thread(target=self.__run)
+        self.__config.subscribe(self.__onConfigReload)
+
+    def getPin(self):
+        return self.__devicePin
 
     def start(self):
         if self.__isRunning == False:
             self.__isRunning = True
-            self.__thread.start()
+            self.__task = Runtime.spawn(self.__run(), 'tachometer-{0}'.format(self.__devicePin), self.__logger)
 
     def getAvgPulses(self):
         return int(self.__pulseStack.getAverage())
@@ -39,6 +60,63 @@ class Tachometer:
     def getRepeatedPulses(self):
         return self.__pulseStack.getRepeated()
 
+    def getRpm(self):
+        """
+        Returns the fan speed in revolutions per minute.
+        """
+        if self.__edgeCounter is not None:
+            return int(self.__edgeCounter.read()[EdgeCounter.RPM])
+        # Sampled pulses are counted over a 1 sec window
+        return int(self.__pulseStack.getAverage() * 60 / self.__pulsesPerRev)
+
+    def getLastRpm(self):
+        """
+        Returns the latest speed measurement, rather than the window average, for closed loop speed control.
+
+        Returns:
+        - (float, float) : Speed in revolutions per minute & monotonic time it was measured at, None & None before any;
+        """
+        if self.__edgeCounter is not None:
+            stats = self.__edgeCounter.read()
+            if stats[EdgeCounter.UPDATED] == 0:
+                return None, None
+            return stats[EdgeCounter.RPM], stats[EdgeCounter.UPDATED]
+        return self.__lastRpm, self.__lastMeasured
+
+    def getPeriod(self):
+        """
+        Returns the mean time between pulses in seconds, continuous mode only.
+        """
+        if self.__edgeCounter is None:
+            return None
+        return self.__edgeCounter.read()[EdgeCounter.PERIOD]
+
+    def getJitter(self):
+        """
+        Returns the standard deviation of the time between pulses in seconds, continuous mode only.
+        """
+        if self.__edgeCounter is None:
+            return None
+        return self.__edgeCounter.read()[EdgeCounter.JITTER]
+
+    async def measureRpm(self, duration: float = 1):
+        """
+        Measures the fan speed right away, rather than reading the sampled window, e.g. while the fan is
+        characterized. Not to be used on a started tachometer in sampled mode, both would count the same pin.
+
+        Parameters:
+        - duration (float): Seconds to count pulses over, sampled mode only;
+
+        Returns:
+        - float : Fan speed in revolutions per minute;
+        """
+        if self.__edgeCounter is not None:
+            self.__edgeCounter.start()
+            await asyncio.sleep(duration)
+            return self.__edgeCounter.read()[EdgeCounter.RPM]
+        pulses = await self.__countPulses(duration)
+        return pulses * 60 / duration / self.__pulsesPerRev
+
     def isLikelyStopped(self):
         if not self.__pulseStack.isFull():
             return False
@@ -46,40 +124,68 @@ class Tachometer:
             return True
         return False
 
-    def stop(self):
+    async def stop(self):
         self.__isRunning = False
+        # A measurement in progress is cancelled, the pin is released on the way out
+        await Runtime.cancel(self.__task)
+        self.__task = None
 
     def shutdown(self):
-        self.stop()
-        time.sleep(3)  # Wait for two secs
-        GPIO.cleanup(self.__devicePin)
+        """
+        Releases the tacho pin or edge counter worker, once stopped.
+        """
+        self.__isRunning = False
+        if self.__edgeCounter is not None:
+            self.__edgeCounter.stop()
+            return
+        self.__edgeInput.close()
 
-    def __run(self):
+    async def __run(self):
+        if self.__edgeCounter is not None:
+            await self.__runContinuous()
+            return
         try:
             while self.__isRunning:
                 # GPIO method add_event_detect() is a CPU intensive task, and since we are interested in measure fan idle in a timely manner
                 # we dont need to continuously count RPM. Measure RPM in a 5 min interval is acceptable.
-                if self.__internalClock <= 15:
-                    self.__internalClock += 1
-                    time.sleep(1)
-                    continue
-                # Enable pin reading
-                GPIO.setmode(GPIO.BCM)
-                GPIO.setup(self.__devicePin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-                GPIO.add_event_detect(self.__devicePin, GPIO.FALLING, callback=self.__countPulse)
-                # Read pulses
-                self.__measurePulses()
-                # Remove event from pin since its a CPU intensive task
-                GPIO.cleanup(self.__devicePin)
-                # Reset clock and sleep until next iteration
-                self.__internalClock = 0
+                await asyncio.sleep(self.SAMPLED_IDLE_TIME)
+                await self.__measurePulses()
         except Exception as e:
             self.__logger.error('Tachometer', message='Error while reading FAN pulses: {0}'.format(repr(e)))
 
-    def __measurePulses(self):
+    def __onConfigReload(self, snapshot, previous):
+        self.__maxRepeatedPulses = snapshot.Fan.TachoMaxRepeatedPulsesAsPer
+        # Resizing the window starts a fresh one
+        if snapshot.Fan.TachoWindowSize != previous.Fan.TachoWindowSize:
+            self.__pulseStack = Stack(snapshot.Fan.TachoWindowSize)
+
+    async def __runContinuous(self):
+        self.__edgeCounter.start()
+        self.__logger.info('Tachometer', message='Counting pulses continuously: GPIOPin [{0}], PulsesPerRev [{1}]'.format(self.__devicePin, self.__pulsesPerRev))
+        while self.__isRunning:
+            await asyncio.sleep(1)
+            if not self.__edgeCounter.isAlive():
+                self.__logger.error('Tachometer', message='Edge counter worker exited, no longer reading FAN pulses')
+                return
+            # Keep the pulse window fed so stop detection works as in sampled mode
+            self.__pulseStack.push(int(round(self.__edgeCounter.read()[EdgeCounter.PULSES])))
+
+    async def __measurePulses(self):
+        pulses = await self.__countPulses(1)
+        self.__pulseStack.push(pulses)
+        self.__lastRpm = pulses * 60 / self.__pulsesPerRev
+        self.__lastMeasured = time.monotonic()
+
+    async def __countPulses(self, duration: float):
         self.__pulsesCounter = 0  # Reset pulse count
-        time.sleep(1)  # Wait for one sec
-        self.__pulseStack.push(self.__pulsesCounter)
+        # Edges are counted by the GPIO library thread between enable & disable, the count is only read once disabled
+        self.__edgeInput.enable(self.__countPulse)
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            # Remove event from pin since its a CPU intensive task
+            self.__edgeInput.disable()
+        return self.__pulsesCounter
 
     def __countPulse(self,channel):
         self.__pulsesCounter += 1
\ No newline at end of file
@@ -0,0 +1,142 @@
+from collections import deque
+
+class Filter:
+    """
+    Filters the readings of a sensor before they reach the zones, see [Filter] config section.
+
+    Stages, each O(1) per reading:
+    - gate: rejects readings outside the sensor range, moving faster than MaxRate from the last accepted one, or
+      known glitch values (DS18B20 85C power-on value, -127C bus error) that are not close to it;
+    - median: the median of the last Median accepted readings, single sample spikes the gate let through never
+      reach the output;
+    - kalman: a constant rate Kalman filter smoothing quantization noise, that also estimates the temperature rate;
+    """
+    # Degrees a reading may move past MaxRate, so sensor resolution steps are never rejected
+    GATE_SLACK = 0.5
+
+    REASONS = ('range', 'rate', 'glitch')
+
+    def __init__(self, median: int = 3, minValid: float = -55, maxValid: float = 125, maxRate: float = 1, glitchValues: tuple = (85, -127), kalman: bool = True, sensorNoise: float = 0.1, processNoise: float = 0.0001):
+        """
+        Parameters:
+        - median (int): Readings the median is taken over, 1 disables the stage;
+        - minValid, maxValid (float): Sensor range in degrees Celsius;
+        - maxRate (float): Degrees per second the temperature can move at, 0 disables the rate check;
+        - glitchValues (tuple): Values the sensor reports on errors, rejected unless close to the last accepted reading;
+        - kalman (bool): Whether to apply the Kalman filter;
+        - sensorNoise (float): Standard deviation of the reading noise in degrees;
+        - processNoise (float): How fast the temperature rate may drift, in (degrees per second)^2 per second;
+        """
+        self.__minValid = minValid
+        self.__maxValid = maxValid
+        self.__maxRate = maxRate
+        self.__glitchValues = tuple(glitchValues)
+        self.__window = deque(maxlen=max(median, 1))
+        self.__kalman = kalman
+        self.__measurementVariance = sensorNoise ** 2
+        self.__processNoise = processNoise
+        self.reset()
+
+    @classmethod
+    def fromSection(cls, section):
+        """
+        Builds a filter from the [Filter] config section.
+        """
+        return cls(section.Median, section.MinValid, section.MaxValid, section.MaxRate, cls.parseValues(section.GlitchValues), section.Kalman, section.SensorNoise, section.ProcessNoise)
+
+    @staticmethod
+    def parseValues(values: str):
+        """
+        Parses comma separated glitch values.
+
+        Raises:
+        - ValueError : When a value is not a number;
+        """
+        return tuple(float(value) for value in values.split(',') if value.strip())
+
+    def reset(self):
+        self.__window.clear()
+        self.__lastValue = None
+        self.__lastTime = None
+        # Kalman state: temperature, rate & their covariance
+        self.__temperature = None
+        self.__rate = 0.0
+        self.__p00 = self.__p01 = self.__p11 = 0.0
+        self.__filterTime = None
+
+    def getRate(self):
+        """
+        Returns the estimated temperature rate in degrees per second, None without the Kalman filter or a reading.
+        """
+        if not self.__kalman or self.__temperature is None:
+            return None
+        return self.__rate
+
+    def update(self, value: float, now: float):
+        """
+        Filters a new reading.
+
+        Parameters:
+        - value (float): Reading in degrees Celsius;
+        - now (float): Monotonic timestamp of the reading in seconds;
+
+        Returns:
+        - (float, str) : Filtered temperature & None, or None & the rejection reason (one of REASONS);
+        """
+        reason = self.__gate(value, now)
+        if reason is not None:
+            return None, reason
+
+        self.__lastValue = value
+        self.__lastTime = now
+
+        window = self.__window
+        window.append(value)
+        if len(window) > 2:
+            value = sorted(window)[len(window) // 2]
+
+        if not self.__kalman:
+            return value, None
+        return round(self.__filter(value, now), 3), None
+
+    def __gate(self, value: float, now: float):
+        if not self.__minValid <= value <= self.__maxValid:
+            return 'range'
+        if self.__lastValue is None:
+            return 'glitch' if value in self.__glitchValues else None
+
+        # The allowance grows while readings are rejected, a real change gets through eventually
+        if abs(value - self.__lastValue) <= self.__maxRate * (now - self.__lastTime) + self.GATE_SLACK:
+            return None
+        if value in self.__glitchValues:
+            return 'glitch'
+        return 'rate' if self.__maxRate > 0 else None
+
+    def __filter(self, value: float, now: float):
+        if self.__temperature is None:
+            self.__temperature = value
+            self.__p00 = self.__measurementVariance
+            self.__p11 = self.__processNoise
+            self.__filterTime = now
+            return value
+
+        # Predict with a constant rate, the rate drifting as a random walk
+        dt = now - self.__filterTime
+        self.__filterTime = now
+        q = self.__processNoise
+        temperature = self.__temperature + self.__rate * dt
+        p00 = self.__p00 + dt * (2 * self.__p01 + dt * self.__p11) + q * dt ** 3 / 3
+        p01 = self.__p01 + dt * self.__p11 + q * dt ** 2 / 2
+        p11 = self.__p11 + q * dt
+
+        # Correct with the reading
+        innovation = value - temperature
+        s = p00 + self.__measurementVariance
+        k0 = p00 / s
+        k1 = p01 / s
+        self.__temperature = temperature + k0 * innovation
+        self.__rate += k1 * innovation
+        self.__p00 = (1 - k0) * p00
+        self.__p01 = (1 - k0) * p01
+        self.__p11 = p11 - k1 * p01
+        return self.__temperature
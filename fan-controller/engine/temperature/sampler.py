@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from log.logger import Logger
+from engine.hardware.backend import Backend
+from runtime.runtime import Runtime
+from metrics.instruments import Instruments
+from .filter import Filter
+
+class Sampler:
+    """
+    Samples temperature sensors ahead of time, as a task of the event loop.
+
+    Conversions are triggered on all sensors at once when the backend supports it (w1 therm_bulk_read),
+    otherwise sensors are read concurrently. Blocking sysfs reads run on an executor, one worker per sensor, while
+    results are only stored by the loop. Readers get the latest value immediately, together with its timestamp,
+    and never wait on the sensor bus. Readings go through the sensor Filter first, rejected readings are not
+    stored, so the latest value ages until MaxAge like on a failed read.
+    """
+
+    def __init__(self, backend: Backend, sensors: list, logger: Logger, interval: float = 2, resolution: int = 12, bulk: bool = True, filters: list = None):
+        """
+        Parameters:
+        - backend (Backend): Hardware backend the sensors belong to;
+        - sensors (list): TemperatureInput to sample;
+        - interval (float): Seconds between sampling rounds;
+        - resolution (int): Sensor resolution in bits (9-12);
+        - bulk (bool): Whether to trigger conversions on all sensors at once;
+        - filters (list): Filter per sensor, readings are stored as read when None;
+        """
+        self.__backend = backend
+        self.__sensors = sensors
+        self.__logger = logger
+        self.__interval = interval
+        self.__resolution = resolution
+        self.__bulk = bulk
+        # DS18B20 conversion takes 750 ms at 12 bits, halving per bit less
+        self.__conversionTime = 0.75 / (2 ** (12 - resolution))
+        # Latest (value, monotonic timestamp) per sensor
+        self.__latest = [(None, None)] * len(sensors)
+        self.__failures = [0] * len(sensors)
+        self.__filters = filters
+        self.__rejections = [0] * len(sensors)
+        self.__readSeconds = [Instruments.SENSOR_READ_SECONDS.labels(sensor.getName()) for sensor in sensors]
+        self.__readErrors = [Instruments.SENSOR_READ_ERRORS.labels(sensor.getName()) for sensor in sensors]
+        self.__rejected = [{reason: Instruments.SENSOR_READINGS_REJECTED.labels(sensor.getName(), reason) for reason in Filter.REASONS} for sensor in sensors]
+        self.__temperatureGauges = [Instruments.SENSOR_TEMPERATURE.labels(sensor.getName()) for sensor in sensors]
+        self.__ready = asyncio.Event()
+        self.__task = None
+        # A sampling round lasts as long as the slowest sensor rather than the sum of them, zones may match no sensor
+        self.__executor = ThreadPoolExecutor(max_workers=max(1, len(sensors)), thread_name_prefix='temperature-read')
+
+    def start(self):
+        self.__task = Runtime.spawn(self.__run(), 'temperature-sampler', self.__logger)
+
+    async def stop(self):
+        await Runtime.cancel(self.__task)
+        # A read in progress is not waited for, its result is dropped
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    async def waitReady(self, timeout: float):
+        """
+        Waits for the first sampling round to complete.
+
+        Returns:
+        - bool : Whether a sampling round completed within timeout;
+        """
+        return await Runtime.waitFor(self.__ready, timeout)
+
+    def getConversionTime(self):
+        return self.__conversionTime
+
+    def getLatest(self, index: int = 0):
+        """
+        Returns the latest reading of a sensor.
+
+        Returns:
+        - (float, float, float) : value (Celsius), timestamp (monotonic secs) and age (secs), (None, None, None) if never read;
+        """
+        value, timestamp = self.__latest[index]
+        if timestamp is None:
+            return None, None, None
+        return value, timestamp, time.monotonic() - timestamp
+
+    def getRate(self, index: int = 0):
+        """
+        Returns the temperature rate of a sensor estimated by its filter in degrees per second, None if not estimated.
+        """
+        if self.__filters is None:
+            return None
+        return self.__filters[index].getRate()
+
+    async def __run(self):
+        # Sensors are configured by the task rather than on start, so the control loop is not held up by them
+        await asyncio.get_running_loop().run_in_executor(self.__executor, self.__setResolution)
+
+        while True:
+            start = time.monotonic()
+
+            try:
+                await self.__sample()
+            except Exception as e:
+                self.__logger.error('Temperature', message='Error while sampling sensors: {0}'.format(repr(e)))
+
+            self.__ready.set()
+            await asyncio.sleep(max(self.__interval - (time.monotonic() - start), 0))
+
+    def __setResolution(self):
+        for sensor in self.__sensors:
+            try:
+                sensor.setResolution(self.__resolution)
+            except OSError as e:
+                self.__logger.warning('Temperature', message='Cannot set resolution of sensor {0}: {1}'.format(sensor.getName(), repr(e)))
+
+    async def __sample(self):
+        loop = asyncio.get_running_loop()
+        bulk = self.__bulk and await loop.run_in_executor(self.__executor, self.__backend.triggerConversion, self.__sensors)
+
+        if bulk:
+            await asyncio.sleep(self.__conversionTime)
+
+        results = await asyncio.gather(*[loop.run_in_executor(self.__executor, self.__read, index, bulk) for index in range(len(self.__sensors))])
+
+        for index, (sensor, (value, error)) in enumerate(zip(self.__sensors, results)):
+            if error is not None and self.__failures[index] == 0:
+                self.__logger.warning('Temperature', message='Cannot read sensor {0}: {1}'.format(sensor.getName(), repr(error)))
+
+            if value is None:
+                self.__failures[index] += 1
+                self.__readErrors[index].inc()
+                continue
+
+            if self.__failures[index] > 0:
+                self.__logger.info('Temperature', message='Sensor {0} recovered after {1} failed reads'.format(sensor.getName(), self.__failures[index]))
+                self.__failures[index] = 0
+
+            now = time.monotonic()
+            if self.__filters is not None:
+                value, reason = self.__filters[index].update(value, now)
+                if reason is not None:
+                    self.__rejected[index][reason].inc()
+                    if self.__rejections[index] == 0:
+                        self.__logger.warning('Temperature', message='Rejected reading of sensor {0}: {1}'.format(sensor.getName(), reason))
+                    self.__rejections[index] += 1
+                    continue
+                if self.__rejections[index] > 0:
+                    self.__logger.info('Temperature', message='Sensor {0} readings accepted again after {1} rejected'.format(sensor.getName(), self.__rejections[index]))
+                    self.__rejections[index] = 0
+
+            self.__latest[index] = (value, now)
+            self.__temperatureGauges[index].set(value)
+
+    def __read(self, index: int, bulk: bool):
+        sensor = self.__sensors[index]
+        try:
+            with self.__readSeconds[index].time():
+                return sensor.readConverted() if bulk else sensor.read(), None
+        except (IOError, ValueError) as e:
+            return None, e
@@ -1,60 +1,136 @@
-import os
-import glob
-import time
-import sys
+import fnmatch
 
 from config.config import Config
 from log.logger import Logger
+from engine.hardware.backends import Backends
+from .filter import Filter
+from .sampler import Sampler
 
 class Temperature:
+    """
+    Reads the temperature sensors of every zone, see Sampler.
+
+    Sensors are discovered once and sampled together, zones pick theirs by name with [Zone:<name>] Sensors.
+    """
     __config = None
     __logger = None
-    __device = None
+    __sampler = None
 
     def __init__(self, config: Config, logger: Logger):
         self.__config = config
         self.__logger = logger
+        self.__zones = {}
 
-        os.system('modprobe w1-gpio')
-        os.system('modprobe w1-therm')
+        snapshot = self.__config.getSnapshot()
+        self.__maxAge = snapshot.Temperature.MaxAge
 
-        devicePath = self.__config.get('Temperature', 'DevicePath') + self.__config.get('Temperature', 'DeviceFolder')
-        deviceFolder = glob.glob(devicePath)
+        devicePath = snapshot.Temperature.DevicePath + snapshot.Temperature.DeviceFolder
+        backend = Backends.get(self.__config)
+        sensors = backend.temperatureInputs(devicePath, snapshot.Temperature.DeviceFile)
 
-        if not deviceFolder:
+        if not sensors:
             self.__logger.error('Temperature',message='Cannot open temperature device folder: {0}'.format(devicePath))
             return
 
-        self.__device = deviceFolder[0] + self.__config.get('Temperature', 'DeviceFile')
+        for zone in snapshot.getZones():
+            self.__zones[zone.Name] = self.__match(sensors, zone.Sensors)
+            if not self.__zones[zone.Name]:
+                self.__logger.error('Temperature', message='No sensor matches [Zone:{0}] Sensors: {1}'.format(zone.Name, zone.Sensors))
+            else:
+                self.__logger.info('Temperature', message='Zone {0} reads sensors: {1}'.format(zone.Name, ', '.join(sensors[index].getName() for index in self.__zones[zone.Name])))
+
+        # Only sensors used by a zone are sampled
+        used = sorted(set(index for indexes in self.__zones.values() for index in indexes))
+        self.__zones = {name: [used.index(index) for index in indexes] for name, indexes in self.__zones.items()}
+
+        filters = [Filter.fromSection(snapshot.Filter) for index in used] if snapshot.Filter.Enabled else None
+        self.__sampler = Sampler(backend, [sensors[index] for index in used], self.__logger, interval=snapshot.Temperature.SampleInterval, resolution=snapshot.Temperature.Resolution, bulk=snapshot.Temperature.BulkRead, filters=filters)
+
+    def start(self):
+        if self.__sampler is not None:
+            self.__sampler.start()
+
+    async def stop(self):
+        if self.__sampler is not None:
+            await self.__sampler.stop()
+
+    async def waitReady(self, timeout: float):
+        return self.__sampler is not None and await self.__sampler.waitReady(timeout)
+
+    def getLatest(self, zone: str = None):
+        """
+        Returns the latest sampled reading of each zone sensor as (value, timestamp, age), see Sampler.getLatest().
+
+        Parameters:
+        - zone (str): Zone name, defaults to the first zone;
+
+        Returns:
+        - list : One (value, timestamp, age) per zone sensor;
+        """
+        if self.__sampler is None:
+            return []
+        return [self.__sampler.getLatest(index) for index in self.__getIndexes(zone)]
+
+    def read(self, scale = 'c', zone: str = None):
+        """
+        Reads the zone temperature, aggregating its sensors readings with [Zone:<name>] Aggregate.
 
-    def read(self, scale = 'c'):
-        if self.__device is None:
+        Parameters:
+        - scale (str): c (Celsius) or f (Fahrenheit);
+        - zone (str): Zone name, defaults to the first zone;
+
+        Returns:
+        - float : The zone temperature, None when none of its sensors has a valid reading;
+        """
+        # Readings older than MaxAge are no longer valid
+        values = [value for value, timestamp, age in self.getLatest(zone) if value is not None and age <= self.__maxAge]
+        if not values:
             return None
 
-        try:
-            lines = self.__readTempRaw()
-            while lines[0].strip()[-3:] != 'YES':
-                time.sleep(0.2)
-                lines = self.__readTempRaw()
-
-            equals_pos = lines[1].find('t=')
-            if equals_pos != -1:
-                temp_string = lines[1][equals_pos + 2:]
-                temp_c = float(temp_string) / 1000.0
-
-                if scale == 'c':
-                    return temp_c
-                if scale == 'f':
-                    return temp_c * 9.0 / 5.0 + 32.0
-        except IOError as e:
-            self.__logger.error('Temperature', message='Cannot read temp, I/O error({0}): {1}'.format(e.errno, e.strerror))
-        except:  # handle other exceptions such as attribute errors
-            self.__logger.error('Temperature',message='Cannot read temp, unknown error: {0}'.format(sys.exc_info()[0]))
+        if self.__config.getSnapshot().getZone(zone).Aggregate == 'mean':
+            temp_c = sum(values) / len(values)
+        else:
+            temp_c = max(values)
+
+        if scale == 'c':
+            return temp_c
+        if scale == 'f':
+            return temp_c * 9.0 / 5.0 + 32.0
 
         return None
 
-    def __readTempRaw(self):
-        f = open(self.__device, 'r')
-        lines = f.readlines()
-        f.close()
-        return lines
+    def getRate(self, zone: str = None):
+        """
+        Returns the zone temperature rate estimated by the sensor filters, following [Zone:<name>] Aggregate.
+
+        Parameters:
+        - zone (str): Zone name, defaults to the first zone;
+
+        Returns:
+        - float : Rate in degrees per second, None when not estimated (e.g. [Filter] Kalman off) or no reading is valid;
+        """
+        if self.__sampler is None:
+            return None
+        indexes = self.__getIndexes(zone)
+        readings = [(value, self.__sampler.getRate(index)) for index, (value, timestamp, age) in zip(indexes, self.getLatest(zone)) if value is not None and age <= self.__maxAge]
+        rates = [rate for value, rate in readings if rate is not None]
+        if not rates or len(rates) < len(readings):
+            return None
+
+        if self.__config.getSnapshot().getZone(zone).Aggregate == 'mean':
+            return sum(rates) / len(rates)
+        # The rate of the sensor the zone temperature is taken from
+        return max(readings)[1]
+
+    def __getIndexes(self, zone: str):
+        if zone is None:
+            zone = self.__config.getSnapshot().getZone().Name
+        return self.__zones.get(zone, [])
+
+    @staticmethod
+    def __match(sensors: list, patterns: str):
+        # Without patterns the zone reads the first sensor found
+        patterns = [pattern.strip() for pattern in patterns.split(',') if pattern.strip()]
+        if not patterns:
+            return [0]
+        return [index for index, sensor in enumerate(sensors) if any(fnmatch.fnmatch(sensor.getName(), pattern) for pattern in patterns)]
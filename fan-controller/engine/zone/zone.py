@@ -0,0 +1,369 @@
+from collections import deque
+from time import time, monotonic, perf_counter
+
+from log.logger import Logger
+from engine.failure.monitor import Monitor
+from engine.control.controller import Controller
+from engine.control.model import ThermalModel
+from engine.control.output import Output
+from engine.control.speed import SpeedLoop
+from engine.fan.profile import Profile
+from engine.rotation.rotation import Rotation
+from engine.tacho.tachometer import Tachometer
+from engine.temperature.temperature import Temperature
+from engine.relay.relay import Relay
+from engine.pwm.pwm import PWM
+from metrics.instruments import Instruments
+
+class Zone:
+    """
+    A control zone, see [Zone:<name>] config sections.
+
+    The zone temperature (its sensors aggregated) drives its own curve or PID & PWM channel. Relay & tachometer may
+    be shared with other zones, fans are only powered off once every zone on the relay allows it.
+    """
+    __currentRotationPercent = -1
+    __fanShutdownTimeStamp = None
+    __fanShutdownIsStopped = False
+    __lastIterationTime = 0
+    # (duty cycle, monotonic expiry, epoch expiry) of a duty cycle override, see setOverride()
+    __override = None
+    # Fan characterization, see [Fan] Profile
+    __profile = None
+    __profilePath = ''
+    # Whether the next duty cycle write must be at least the profile start duty cycle, fans were just powered on
+    __kickPending = False
+    # duty or rpm, see [Fan] SpeedControl
+    __speedControl = 'duty'
+
+    def __init__(self, name: str, logger: Logger, temperature: Temperature, rotation: Rotation, pwm: PWM, relay: Relay, tachometer: Tachometer, faults: Monitor):
+        """
+        Parameters:
+        - name (str): Zone name;
+        - temperature (Temperature): Shared temperature reader, the zone sensors are looked up by name;
+        - faults (Monitor): Shared fault engine, iteration values are evaluated against its rules;
+        """
+        self.__name = name
+        self.__logger = logger
+        self.__temperature = temperature
+        self.__rotation = rotation
+        self.__pwm = pwm
+        self.__relay = relay
+        self.__tachometer = tachometer
+        self.__faults = faults
+        self.__controller = Controller()
+        self.__output = Output()
+        self.__speedLoop = SpeedLoop()
+        # Recent (monotonic timestamp, temperature) readings the temperature rate is measured over
+        self.__history = deque()
+        self.__temperatureRate = None
+        self.__status = None
+
+        # Metric series are resolved once, iterations only record values
+        self.__stageSeconds = {stage: Instruments.STAGE_SECONDS.labels(self.__name, stage) for stage in ('temperature_read', 'rotation', 'tacho', 'pwm_write', 'relay_write', 'log')}
+        self.__iterationSeconds = Instruments.ITERATION_SECONDS.labels(self.__name)
+        self.__temperatureGauge = Instruments.TEMPERATURE.labels(self.__name)
+        self.__dutyCycleGauge = Instruments.DUTY_CYCLE.labels(self.__name)
+        self.__rpmGauge = Instruments.RPM.labels(self.__name)
+        self.__rpmTargetGauge = Instruments.RPM_TARGET.labels(self.__name)
+        self.__rpmErrorGauge = Instruments.RPM_ERROR.labels(self.__name)
+        self.__fanOnGauge = Instruments.FAN_ON.labels(self.__name)
+        # Counters are exported at 0 before the first panic, so rates can be computed right away
+        Instruments.PANICS.labels(self.__name)
+        Instruments.RESETS.labels(self.__name)
+        self.__pwmWrites = Instruments.PWM_WRITES.labels(self.__name)
+        self.__pwmWritesSuppressed = {reason: Instruments.PWM_WRITES_SUPPRESSED.labels(self.__name, reason) for reason in Output.REASONS}
+
+        self.__relay.register(self.__name)
+        self.__faults.register(self)
+
+    def getName(self):
+        return self.__name
+
+    def getTachometer(self):
+        return self.__tachometer
+
+    def getRelay(self):
+        return self.__relay
+
+    def getLastIterationTime(self):
+        """
+        Returns the duration of the last iteration in seconds.
+        """
+        return self.__lastIterationTime
+
+    def isStopped(self):
+        """
+        Whether the zone fans were stopped after the shutdown grace period.
+        """
+        return self.__fanShutdownIsStopped
+
+    def getStatus(self):
+        """
+        Returns the values measured & applied by the last iteration, None before the first one.
+
+        Returns:
+        - dict : temperature, dutyCycle (None until set), tachAvgPulses, tachRepeatedPulses, rpm, rpmTarget & rpmError (None unless in rpm speed control), relayOn, faults (a bit per Monitor.getFaultIds() entry) & override (see getOverride());
+        """
+        return self.__status
+
+    def setOverride(self, dutyCycle: int, duration: float):
+        """
+        Holds the duty cycle at a fixed value, in place of the calculated rotation, while the fans are powered.
+
+        Parameters:
+        - dutyCycle (int): Duty cycle in percentage, None clears the override;
+        - duration (float): Secs the override lasts for;
+        """
+        if dutyCycle is None:
+            self.__override = None
+            self.__logger.info('Engine', message='Duty cycle override of zone {0} cleared'.format(self.__name))
+        else:
+            self.__override = (int(dutyCycle), monotonic() + duration, time() + duration)
+            self.__logger.warning('Engine', message='Duty cycle of zone {0} overridden to {1}% for {2:g} secs'.format(self.__name, int(dutyCycle), duration))
+            # Applied right away rather than on the next iteration
+            if self.__fanShutdownIsStopped is False and self.__currentRotationPercent != self.__override[0]:
+                self.__currentRotationPercent = self.__override[0]
+                self.__pwmWrites.inc()
+                self.__pwm.setDutyCycle(self.__currentRotationPercent)
+        # The calculated rotation is written right away once the override ends
+        self.__output.reset()
+
+    def getOverride(self):
+        """
+        Returns the duty cycle override, None if not overridden.
+
+        Returns:
+        - (int, float) : Duty cycle in percentage & expiry in secs since the epoch;
+        """
+        if self.__override is None:
+            return None
+        return self.__override[0], self.__override[2]
+
+    def getTemperatureRate(self):
+        """
+        Returns how fast the zone temperature changes in degrees per minute (absolute value), None if unknown.
+        """
+        return self.__temperatureRate
+
+    def applySnapshot(self, snapshot):
+        zone = snapshot.getZone(self.__name)
+        if zone is None:
+            return
+        self.__minTemp = zone.MinTemp
+        self.__loadProfile(zone.FanProfile)
+        # The fan profile tells how slow the fans can run, in place of the configured guess
+        minRotation = zone.MinRotationPercent
+        if self.__profile is not None:
+            minRotation = min(self.__profile.getSafeMinDuty(snapshot.Fan.ProfileMargin), zone.MaxRotationPercent)
+        self.__minRotationPercent = minRotation
+        self.__maxRotationPercent = zone.MaxRotationPercent
+        self.__fanShutdownGraceTime = zone.ShutdownGraceTime
+        self.__rateWindow = snapshot.Scheduler.RateWindow
+        self.__rotation.refresh(snapshot, minRotation)
+
+        control = snapshot.Control
+        if zone.ControlMode != self.__controller.getMode():
+            self.__logger.info('Engine', message='Control mode of zone {0} set to {1}'.format(self.__name, zone.ControlMode))
+        self.__controller.configure(zone.ControlMode, zone.TargetTemp, control.Kp, control.Ki, control.Kd, control.DerivativeFilter, minRotation, zone.MaxRotationPercent)
+        model = snapshot.Model
+        self.__controller.setModel(ThermalModel(model.Ambient, model.HeatInput, model.Cooling, model.TimeConstant, model.Lag), zone.MaxTemp - model.Margin, model.Horizon, model.OffsetFilter)
+        self.__configureSpeedControl(snapshot, zone, minRotation)
+        # The PID & speed loop must keep correcting while the temperature holds, only the curve gets the temperature deadband
+        tempDeadband = snapshot.PWM.TempDeadband if zone.ControlMode == 'curve' and self.__speedControl == 'duty' else 0
+        self.__output.configure(tempDeadband, snapshot.PWM.DutyDeadband, snapshot.PWM.SlewRate, snapshot.PWM.WriteInterval, minRotation, zone.MaxRotationPercent)
+
+    def iterate(self):
+        start = perf_counter()
+
+        with self.__stageSeconds['temperature_read'].time():
+            sensorTemp = self.__temperature.read(zone=self.__name)
+            self.__updateTemperatureRate(sensorTemp)
+
+        with self.__stageSeconds['rotation'].time():
+            outputRotation,outputTemperature = [None,None] if sensorTemp is None or not self.__controller.usesCurve() else self.__rotation.calculate(sensorTemp)
+            if sensorTemp is not None:
+                outputRotation = self.__controller.calculate(sensorTemp, outputRotation, monotonic())
+
+        with self.__stageSeconds['tacho'].time():
+            tachAvgPulses = self.__tachometer.getAvgPulses()
+            tachRepPulses = self.__tachometer.getRepeatedPulses()
+            tachLikelyStopped = self.__tachometer.isLikelyStopped()
+            tachRpm = self.__tachometer.getRpm()
+            lastRpm, lastMeasured = self.__tachometer.getLastRpm() if self.__speedControl == 'rpm' else (None, None)
+
+        # Faults are reported, escalated & cleared by the fault rules
+        self.__faults.evaluate(self, {
+            'temperature': sensorTemp,
+            'rotation': outputRotation,
+            'minTemp': self.__minTemp,
+            'stopped': self.__fanShutdownIsStopped,
+            'tachLikelyStopped': tachLikelyStopped,
+            'rpm': tachRpm,
+        })
+
+        # Apply rotation bounds
+        if outputRotation is not None:
+            outputRotation = int(outputRotation)
+            if outputRotation < self.__minRotationPercent:
+                outputRotation = self.__minRotationPercent
+            if outputRotation > self.__maxRotationPercent:
+                outputRotation = self.__maxRotationPercent
+
+        # The rotation becomes a target speed, the duty cycle holding it is corrected from the tachometer
+        if outputRotation is not None and self.__speedControl == 'rpm' and self.__fanShutdownIsStopped is False:
+            outputRotation = int(round(self.__speedLoop.update(outputRotation, lastRpm, lastMeasured)))
+
+        # Check for fan shutdown conditions
+        if sensorTemp is not None and sensorTemp < self.__minTemp:
+            # Assign shutdown start of grace period
+            if self.__fanShutdownTimeStamp is None:
+                self.__fanShutdownTimeStamp = int(time())
+                self.__logger.info('Engine', message='Fan shutdown conditions of zone {0} meet, starting grace period of {1} mins'.format(self.__name, self.__fanShutdownGraceTime))
+            # Check if we can shut down the fans
+            if (int(time()) - self.__fanShutdownTimeStamp) / 60 >= self.__fanShutdownGraceTime and self.__fanShutdownIsStopped is False:
+                self.__fanShutdownIsStopped = True
+                with self.__stageSeconds['relay_write'].time():
+                    poweredOff = self.__relay.off(self.__name)
+                if poweredOff:
+                    self.__logger.info('Engine', message='Fan shutdown grace period of zone {0} reached, stopping fans'.format(self.__name))
+                else:
+                    self.__logger.info('Engine', message='Fan shutdown grace period of zone {0} reached, fans kept powered for the zones sharing the relay'.format(self.__name))
+        else:
+            # Check if the fans are shutdown, if so start them up
+            if self.__fanShutdownIsStopped is True:
+                self.__fanShutdownIsStopped = False
+                self.__kickPending = True
+                # The controllers ran against stopped fans, their state holds the missing cooling
+                self.__controller.reset()
+                self.__speedLoop.reset()
+                with self.__stageSeconds['relay_write'].time():
+                    self.__relay.on(self.__name)
+                self.__logger.info('Engine', message='Fan min temperature of zone {0} reached, re-starting fans'.format(self.__name))
+
+        if self.__override is not None and monotonic() >= self.__override[1]:
+            self.__override = None
+            self.__output.reset()
+            self.__logger.info('Engine', message='Duty cycle override of zone {0} expired'.format(self.__name))
+
+        # Set duty cycle if fans are running, deadbands, slew rate & coalescing may hold the change back
+        if self.__fanShutdownIsStopped is False and self.__override is not None:
+            dutyCycle, suppressed = self.__override[0], None
+        elif self.__fanShutdownIsStopped is False and outputRotation is not None:
+            dutyCycle, suppressed = self.__output.update(outputRotation, sensorTemp, monotonic())
+        else:
+            dutyCycle, suppressed = None, None
+        if suppressed is not None:
+            self.__pwmWritesSuppressed[suppressed].inc()
+        if dutyCycle is not None and self.__kickPending:
+            self.__kickPending = False
+            # Fans may keep spinning at a duty cycle they cannot start from a stop at
+            startDuty = self.__profile.getStartDuty() if self.__profile is not None else None
+            if startDuty is not None and dutyCycle < startDuty:
+                dutyCycle = startDuty
+                self.__output.reset()
+        if dutyCycle is not None and self.__currentRotationPercent != dutyCycle:
+            self.__currentRotationPercent = dutyCycle
+            self.__pwmWrites.inc()
+            with self.__stageSeconds['pwm_write'].time():
+                self.__pwm.setDutyCycle(self.__currentRotationPercent)
+
+        self.__lastIterationTime = perf_counter() - start
+
+        rpmTarget, rpmError = (self.__speedLoop.getTarget(), self.__speedLoop.getError()) if self.__speedControl == 'rpm' else (None, None)
+
+        with self.__stageSeconds['log'].time():
+            self.__logger.info('Engine', message='Iteration measured: Temp [{temperature}C], RPM [{dutyCycle}%], Tach [{tachAvgPulses},{tachRepeatedPulses}], Speed [{rpm}rpm], Fan Status [{fanStatus}], Zone [{zone}], Took [{took:.2f}ms]', temperature=sensorTemp, dutyCycle=self.__currentRotationPercent, tachAvgPulses=tachAvgPulses, tachRepeatedPulses=tachRepPulses, rpm=tachRpm, fanStatus='ON' if self.__fanShutdownIsStopped is False else 'OFF', zone=self.__name, took=self.__lastIterationTime * 1000)
+            if rpmTarget is not None:
+                self.__logger.info('Engine', message='Speed control of zone {zone}: Target [{rpmTarget:.0f}rpm], Error [{rpmError}rpm]', zone=self.__name, rpmTarget=rpmTarget, rpmError='n/a' if rpmError is None else round(rpmError))
+
+        self.__status = {
+            'temperature': sensorTemp,
+            'dutyCycle': self.__currentRotationPercent if self.__currentRotationPercent >= 0 else None,
+            'tachAvgPulses': tachAvgPulses,
+            'tachRepeatedPulses': tachRepPulses,
+            'rpm': tachRpm,
+            'rpmTarget': rpmTarget,
+            'rpmError': rpmError,
+            'relayOn': self.__relay.isOn(),
+            'faults': self.__faults.getBits(self),
+            'override': self.getOverride(),
+        }
+
+        self.__iterationSeconds.observe(self.__lastIterationTime)
+        self.__temperatureGauge.set(sensorTemp)
+        self.__dutyCycleGauge.set(self.__status['dutyCycle'])
+        self.__rpmGauge.set(tachRpm)
+        self.__rpmTargetGauge.set(rpmTarget)
+        self.__rpmErrorGauge.set(rpmError)
+        self.__fanOnGauge.set(0 if self.__fanShutdownIsStopped else 1)
+
+    def panic(self):
+        # On behalf of this zone only, zones sharing the relay that stopped their fans stay idle
+        self.__relay.on(self.__name)
+        self.__pwm.setDutyCycle(self.__maxRotationPercent)
+
+    def reset(self):
+        self.__fanShutdownIsStopped = False
+        self.__fanShutdownTimeStamp = None
+        self.__currentRotationPercent = -1
+        self.__controller.reset()
+        self.__output.reset()
+        self.__speedLoop.reset()
+        self.__relay.on(self.__name)
+
+    def __configureSpeedControl(self, snapshot, zone, minRotation: float):
+        fan = snapshot.Fan
+        self.__speedLoop.setProfile(self.__profile)
+        self.__speedLoop.configure(fan.SpeedKp, fan.SpeedKi, zone.TargetMaxRPM, minRotation, zone.MaxRotationPercent)
+
+        speedControl = zone.SpeedControl
+        if speedControl == 'rpm' and self.__speedLoop.getMaxRpm() <= 0:
+            self.__logger.error('Engine', message='Speed control of zone {0} needs [Fan] TargetMaxRPM or a fan profile, setting the duty cycle instead'.format(self.__name))
+            speedControl = 'duty'
+        if speedControl == self.__speedControl:
+            return
+
+        self.__speedControl = speedControl
+        self.__speedLoop.reset()
+        if speedControl == 'rpm':
+            self.__logger.info('Engine', message='Speed control of zone {0} set to rpm: rotation is a share of {1:.0f}rpm{2}'.format(self.__name, self.__speedLoop.getMaxRpm(), ', corrected once per tacho sample in sampled TachoMode' if fan.TachoMode == 'sampled' else ''))
+        else:
+            self.__logger.info('Engine', message='Speed control of zone {0} set to duty'.format(self.__name))
+
+    def __loadProfile(self, path: str):
+        if path == self.__profilePath:
+            return
+        self.__profilePath = path
+        self.__profile = None
+        if not path:
+            return
+        try:
+            self.__profile = Profile.load(path)
+            self.__logger.info('Engine', message='Zone {0} runs on fan profile {1}: fans spin down to {2}% & start at {3}'.format(self.__name, path, self.__profile.getMinDuty(), 'n/a' if self.__profile.getStartDuty() is None else '{0}%'.format(self.__profile.getStartDuty())))
+        except (OSError, ValueError) as e:
+            self.__logger.error('Engine', message='Cannot load fan profile {0} of zone {1}, using MinRotationPercent: {2}'.format(path, self.__name, repr(e)))
+
+    def __updateTemperatureRate(self, sensorTemp: float):
+        now = monotonic()
+        if sensorTemp is None:
+            self.__history.clear()
+            self.__temperatureRate = None
+            return
+
+        # The sensor filters estimate the rate from every reading, the window is only measured without them
+        rate = self.__temperature.getRate(zone=self.__name)
+        if rate is not None:
+            self.__temperatureRate = abs(rate) * 60
+            return
+
+        self.__history.append((now, sensorTemp))
+        # Measuring over a window keeps sensor resolution steps from reading as fast changes
+        while len(self.__history) > 2 and now - self.__history[1][0] >= self.__rateWindow:
+            self.__history.popleft()
+
+        oldest, oldestTemp = self.__history[0]
+        if now - oldest <= 0:
+            self.__temperatureRate = None
+            return
+        self.__temperatureRate = abs(sensorTemp - oldestTemp) / (now - oldest) * 60
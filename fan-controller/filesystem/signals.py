@@ -1,14 +1,27 @@
+import asyncio
 import signal
 
 class Signals:
+    """
+    Handles the shutdown signals (SIGINT & SIGTERM) on the running event loop.
+    """
     __isRunning = True
 
     def __init__(self):
-        signal.signal(signal.SIGINT, self.requestShutdown)
-        signal.signal(signal.SIGTERM, self.requestShutdown)
+        self.__stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGINT, self.requestShutdown)
+        loop.add_signal_handler(signal.SIGTERM, self.requestShutdown)
 
     def requestShutdown(self, *args):
         self.__isRunning = False
+        self.__stopped.set()
 
     def isRunning(self):
-        return self.__isRunning
\ No newline at end of file
+        return self.__isRunning
+
+    async def wait(self):
+        """
+        Waits for a shutdown signal.
+        """
+        await self.__stopped.wait()
\ No newline at end of file
@@ -0,0 +1,33 @@
+import os
+import socket
+
+class Systemd:
+    """
+    Reports the service state to systemd through the sd_notify protocol, see Type=notify services.
+
+    Does nothing when not started by systemd, i.e. NOTIFY_SOCKET is not set.
+    """
+
+    @staticmethod
+    def notify(*states):
+        """
+        Parameters:
+        - states (str): State assignments, e.g. READY=1 or STATUS=...;
+
+        Returns:
+        - bool : Whether the states were sent;
+        """
+        address = os.environ.get('NOTIFY_SOCKET')
+        if not address:
+            return False
+        # Abstract namespace sockets are given with a leading @
+        if address.startswith('@'):
+            address = '\0' + address[1:]
+
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                sock.connect(address)
+                sock.sendall('\n'.join(states).encode('utf-8'))
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,382 @@
+import os
+import re
+import sys
+import gzip
+import json
+import inspect
+import argparse
+
+from datetime import datetime
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+
+sys.path.insert(0, parentdir + '/fan-controller')
+
+from utils.utils import Utils
+
+# Log lines, as written by Logger, text or json
+LINE = re.compile(r'^\[(\d{4}-\d{2}-\d{2}-\d{2}:\d{2}:\d{2})\]\[([A-Z_]+)\]\[([A-Z]+)\] - (.*)$')
+FILENAME = re.compile(r'^Log_(.+)_(\d+)\.(?:log|jsonl)(\.gz)?$')
+
+# Engine messages, zones are optional for logs written before zones were introduced
+ZONE = r'(?: of zone (?P<zone>\S+?))?'
+ITERATION = re.compile(r'^Iteration measured: Temp \[(?P<temp>[-\d.]+|None)C\], RPM \[(?P<duty>-?\d+)%\], Tach \[(?P<tachAvg>-?\d+),(?P<tachRep>-?\d+)\](?:, Speed \[(?P<rpm>\d+)rpm\])?, Fan Status \[(?P<status>ON|OFF)\](?:, Zone \[(?P<zone>[^\]]+)\])?')
+# Fault starts of logs written before fault rules, since then every fault logs FAULT_REPORTED
+FAULT_STARTS = (
+	('temp_reading', re.compile(r'^Temperature reading value' + ZONE + r' is not valid')),
+	('rotation_calculation', re.compile(r'^Rotation calculated value' + ZONE + r' is not valid')),
+)
+FAULT_REPORTED = re.compile(r'^Fault (?P<fault>\w+) of zone (?P<zone>\S+) reported')
+FAULT_CLEARED = re.compile(r'^Fault (?P<fault>\w+) of zone (?P<zone>\S+) cleared after (?P<age>\d+) secs')
+PANIC = re.compile(r'^Panic mode requested(?: by zone (?P<zone>\S+?))?,')
+RESET = re.compile(r'^Reset requested(?: by zone (?P<zone>\S+?))?,')
+SHUTDOWN = re.compile(r'^Fan shutdown grace period' + ZONE + r' reached, stopping fans')
+RESTART = re.compile(r'^Fan min temperature' + ZONE + r' reached, re-starting fans')
+
+# Zone of logs written before zones were introduced
+DEFAULT_ZONE = 'Default'
+
+class Distribution:
+	"""
+	Fixed bins histogram, percentiles are exact to the bin width whatever the number of values.
+	"""
+
+	def __init__(self, low: float, high: float, width: float):
+		self.__low = low
+		self.__width = width
+		self.__bins = [0] * (int(round((high - low) / width)) + 1)
+		self.__count = 0
+		self.__min = None
+		self.__max = None
+
+	def add(self, value: float):
+		index = min(max(int((value - self.__low) / self.__width), 0), len(self.__bins) - 1)
+		self.__bins[index] += 1
+		self.__count += 1
+		self.__min = value if self.__min is None or value < self.__min else self.__min
+		self.__max = value if self.__max is None or value > self.__max else self.__max
+
+	def getCount(self):
+		return self.__count
+
+	def percentile(self, percent: float):
+		if self.__count == 0:
+			return None
+		rank = percent / 100 * (self.__count - 1)
+		seen = 0
+		for index, count in enumerate(self.__bins):
+			seen += count
+			if seen > rank:
+				return round(self.__low + index * self.__width, 6)
+		return self.__max
+
+	def summary(self, percents: tuple):
+		if self.__count == 0:
+			return None
+		summary = {'count': self.__count, 'min': self.__min, 'max': self.__max}
+		summary.update({'p{0:g}'.format(percent): self.percentile(percent) for percent in percents})
+		return summary
+
+class Span:
+	"""
+	Accumulates the time spent in a state (e.g. panic), entered & left at timestamps.
+	"""
+
+	def __init__(self):
+		self.__since = None
+		self.__count = 0
+		self.__total = 0
+		self.__longest = 0
+
+	def enter(self, timestamp: float):
+		if self.__since is None:
+			self.__since = timestamp
+			self.__count += 1
+
+	def leave(self, timestamp: float):
+		if self.__since is not None:
+			self.__add(timestamp - self.__since)
+			self.__since = None
+
+	def add(self, duration: float):
+		"""
+		Accounts for a whole stay of known duration.
+		"""
+		self.__count += 1
+		self.__add(duration)
+
+	def isIn(self):
+		return self.__since is not None
+
+	def summary(self, now: float = None):
+		total = self.__total + (now - self.__since if self.__since is not None and now is not None else 0)
+		return {'count': self.__count, 'total_secs': total, 'longest_secs': max(self.__longest, now - self.__since if self.__since is not None and now is not None else 0), 'open': self.__since is not None}
+
+	def __add(self, duration: float):
+		self.__total += max(duration, 0)
+		self.__longest = max(self.__longest, duration)
+
+class Analyzer:
+	"""
+	Single pass, constant memory analysis of engine log lines.
+
+	Memory depends on the number of zones & faults, never on the number of lines.
+	"""
+
+	PERCENTS = (50, 90, 95, 99)
+
+	def __init__(self, zone: str = None, start: float = None, end: float = None):
+		self.__zoneFilter = zone
+		self.__start = start
+		self.__end = end
+		self.__zones = {}
+		self.__lines = 0
+		self.__matched = 0
+		self.__first = None
+		self.__last = None
+		self.__runs = 0
+		self.__rid = None
+		self.__stampText = None
+		self.__stamp = None
+
+	def feed(self, rid: str, line: str):
+		self.__lines += 1
+
+		# Only engine lines are analysed, skip the others before any parsing
+		if line.startswith('{'):
+			if '"ENGINE"' not in line:
+				return
+			try:
+				record = json.loads(line)
+				timestamp, message = float(record['time']), record['message']
+			except (ValueError, KeyError, TypeError):
+				return
+			if record.get('section') != 'ENGINE':
+				return
+		else:
+			if '][ENGINE][' not in line:
+				return
+			match = LINE.match(line)
+			if match is None:
+				return
+			timestamp, message = self.__parseStamp(match.group(1)), match.group(4)
+
+		if (self.__start is not None and timestamp < self.__start) or (self.__end is not None and timestamp >= self.__end):
+			return
+
+		# A new run starts from scratch, states left open by the previous one end with it
+		if rid != self.__rid:
+			self.__closeRun()
+			self.__rid = rid
+			self.__runs += 1
+
+		self.__first = timestamp if self.__first is None else self.__first
+		self.__last = timestamp
+		self.__matched += 1
+		self.__parseMessage(timestamp, message)
+
+	def report(self):
+		zones = {}
+		for name, zone in sorted(self.__zones.items()):
+			zones[name] = {
+				'iterations': zone['temperature'].getCount(),
+				'invalid_temperature_readings': zone['invalidTemperature'],
+				'temperature': zone['temperature'].summary(self.PERCENTS),
+				'duty': zone['duty'].summary(self.PERCENTS),
+				'rpm': zone['rpm'].summary(self.PERCENTS),
+				'panic': zone['panic'].summary(self.__last),
+				'stopped': zone['stopped'].summary(self.__last),
+				'faults': {fault: span.summary(self.__last) for fault, span in sorted(zone['faults'].items())},
+			}
+
+		return {
+			'lines': self.__lines,
+			'engine_lines': self.__matched,
+			'runs': self.__runs,
+			'from': self.__first,
+			'to': self.__last,
+			'zones': zones,
+		}
+
+	def __parseMessage(self, timestamp: float, message: str):
+		if message.startswith('Iteration measured'):
+			match = ITERATION.match(message)
+			if match is None:
+				return
+			zone = self.__getZone(match.group('zone'))
+			if zone is None:
+				return
+			if match.group('temp') == 'None':
+				zone['invalidTemperature'] += 1
+			else:
+				zone['temperature'].add(float(match.group('temp')))
+				# Logs written before fault clears were logged only tell by the next valid reading
+				if 'temp_reading' in zone['faults']:
+					zone['faults']['temp_reading'].leave(timestamp)
+			if int(match.group('duty')) >= 0 and match.group('status') == 'ON':
+				zone['duty'].add(int(match.group('duty')))
+			if match.group('rpm') is not None:
+				zone['rpm'].add(int(match.group('rpm')))
+			return
+
+		for fault, expression in FAULT_STARTS:
+			match = expression.match(message)
+			if match is not None:
+				zone = self.__getZone(match.group('zone'))
+				if zone is not None:
+					zone['faults'].setdefault(fault, Span()).enter(timestamp)
+				return
+
+		for expression, handler in ((FAULT_REPORTED, self.__onFaultReported), (FAULT_CLEARED, self.__onFaultCleared), (PANIC, self.__onPanic), (RESET, self.__onReset), (SHUTDOWN, self.__onShutdown), (RESTART, self.__onRestart)):
+			match = expression.match(message)
+			if match is not None:
+				zone = self.__getZone(match.group('zone'))
+				if zone is not None:
+					handler(zone, timestamp, match)
+				return
+
+	def __onFaultReported(self, zone, timestamp, match):
+		zone['faults'].setdefault(match.group('fault'), Span()).enter(timestamp)
+
+	def __onFaultCleared(self, zone, timestamp, match):
+		span = zone['faults'].setdefault(match.group('fault'), Span())
+		# The cleared line carries the exact age, even when the start was logged in a purged file
+		if span.isIn():
+			span.leave(timestamp)
+		else:
+			span.add(int(match.group('age')))
+
+	def __onPanic(self, zone, timestamp, match):
+		zone['panic'].enter(timestamp)
+
+	def __onReset(self, zone, timestamp, match):
+		zone['panic'].leave(timestamp)
+
+	def __onShutdown(self, zone, timestamp, match):
+		zone['stopped'].enter(timestamp)
+
+	def __onRestart(self, zone, timestamp, match):
+		zone['stopped'].leave(timestamp)
+
+	def __getZone(self, name: str):
+		name = name or DEFAULT_ZONE
+		if self.__zoneFilter is not None and name != self.__zoneFilter:
+			return None
+		if name not in self.__zones:
+			self.__zones[name] = {
+				'temperature': Distribution(-55, 125, 0.0625),
+				'duty': Distribution(0, 100, 1),
+				'rpm': Distribution(0, 20000, 10),
+				'invalidTemperature': 0,
+				'panic': Span(),
+				'stopped': Span(),
+				'faults': {},
+			}
+		return self.__zones[name]
+
+	def __closeRun(self):
+		if self.__last is None:
+			return
+		for zone in self.__zones.values():
+			for span in [zone['panic'], zone['stopped']] + list(zone['faults'].values()):
+				span.leave(self.__last)
+
+	def __parseStamp(self, text: str):
+		# strptime would dominate the analysis, the hour is parsed once (DST changes on the hour) & minutes, seconds added
+		hour = text[:13]
+		if hour != self.__stampText:
+			self.__stampText = hour
+			self.__stamp = datetime.strptime(hour, '%Y-%m-%d-%H').timestamp()
+		return self.__stamp + int(text[14:16]) * 60 + int(text[17:19])
+
+def listFiles(path: str, rid: str = None):
+	"""
+	Lists log files in rotation order, plain & gzip compressed.
+
+	Returns:
+	- list : (rid, path) per file;
+	"""
+	files = []
+	for filename in os.listdir(path):
+		match = FILENAME.match(filename)
+		if match is None or (rid is not None and match.group(1) != rid):
+			continue
+		files.append(((match.group(1), int(match.group(2))), match.group(1), os.path.join(path, filename)))
+	return [(fileRid, filePath) for key, fileRid, filePath in sorted(files)]
+
+def readLines(files: list):
+	"""
+	Lazily yields (rid, line) over log files, one file open at a time.
+	"""
+	for rid, path in files:
+		opener = gzip.open if path.endswith('.gz') else open
+		with opener(path, 'rt', encoding='utf-8', errors='replace') as f:
+			for line in f:
+				yield rid, line.rstrip('\n')
+
+def formatDuration(seconds: float):
+	days, seconds = divmod(int(seconds), 86400)
+	return ('{0}d '.format(days) if days else '') + Utils.secondsToHours(seconds)
+
+def formatReport(report: dict):
+	lines = []
+	stamp = lambda value: datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M:%S') if value is not None else '-'
+	lines.append('Lines: {0} ({1} engine), Runs: {2}, From: {3}, To: {4}'.format(report['lines'], report['engine_lines'], report['runs'], stamp(report['from']), stamp(report['to'])))
+
+	for name, zone in report['zones'].items():
+		lines.append('')
+		lines.append('Zone {0}: {1} iterations, {2} invalid temperature readings'.format(name, zone['iterations'], zone['invalid_temperature_readings']))
+		for key, unit in (('temperature', 'C'), ('duty', '%'), ('rpm', 'rpm')):
+			summary = zone[key]
+			if summary is None:
+				lines.append('  {0:<12} -'.format(key.capitalize()))
+				continue
+			lines.append('  {0:<12} min {1}{7}, p50 {2}{7}, p90 {3}{7}, p95 {4}{7}, p99 {5}{7}, max {6}{7}'.format(key.capitalize(), summary['min'], summary['p50'], summary['p90'], summary['p95'], summary['p99'], summary['max'], unit))
+		for key, label in (('panic', 'Panic'), ('stopped', 'Fans stopped')):
+			summary = zone[key]
+			lines.append('  {0:<12} {1} times, total {2}, longest {3}{4}'.format(label, summary['count'], formatDuration(summary['total_secs']), formatDuration(summary['longest_secs']), ' (still on)' if summary['open'] else ''))
+		for fault, summary in zone['faults'].items():
+			lines.append('  Fault {0}: {1} times, total {2}, longest {3}{4}'.format(fault, summary['count'], formatDuration(summary['total_secs']), formatDuration(summary['longest_secs']), ' (still open)' if summary['open'] else ''))
+
+	return '\n'.join(lines)
+
+def parseTime(value):
+	try:
+		return datetime.fromisoformat(value).timestamp()
+	except ValueError:
+		raise argparse.ArgumentTypeError('Invalid ISO date: {0}'.format(value))
+
+def main():
+	argParser = argparse.ArgumentParser(description='Raspberry PI : Fan Controller - Log analysis')
+	argParser.add_argument('--path', dest='path', default=parentdir + '/data/logs/', help='Logs folder')
+	argParser.add_argument('--rid', dest='rid', default=None, help='Only analyse the logs of one run (e.g. 2024-05-01_120000)')
+	argParser.add_argument('--zone', dest='zone', default=None, help='Only analyse one zone')
+	argParser.add_argument('--from', dest='start', type=parseTime, default=None, help='Range start, ISO date')
+	argParser.add_argument('--to', dest='end', type=parseTime, default=None, help='Range end (exclusive), ISO date')
+	argParser.add_argument('--json', dest='json', action='store_true', help='Print the report as JSON')
+
+	args = argParser.parse_args()
+
+	files = listFiles(args.path, args.rid)
+	# Files last written before the range cannot hold lines within it
+	if args.start is not None:
+		files = [(rid, path) for rid, path in files if os.path.getmtime(path) >= args.start]
+	if not files:
+		argParser.error('No log files found in {0}'.format(args.path))
+
+	analyzer = Analyzer(args.zone, args.start, args.end)
+	for rid, line in readLines(files):
+		analyzer.feed(rid, line)
+
+	report = analyzer.report()
+	report['files'] = len(files)
+
+	if args.json:
+		print(json.dumps(report, indent=2))
+	else:
+		print('Files: {0} ({1} compressed)'.format(len(files), sum(1 for rid, path in files if path.endswith('.gz'))))
+		print(formatReport(report))
+
+if __name__ == '__main__':
+	main()
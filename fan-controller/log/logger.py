@@ -2,76 +2,347 @@ from filesystem.dir import Dir
 from filesystem.file import File
 from datetime import datetime
 
+import atexit
+import gzip
+import json
+import queue
+import shutil
+import sys
+import threading
+import time
+
 class Logger:
+	"""
+	Logs lines to rotated files, see [Logs] config section.
+
+	Messages are templates, formatted with str.format() from the positional & keyword arguments given after them:
+
+		logger.info('PWM', message='Setting duty cycle of zone {zone} to {dutyCycle}', zone=zone, dutyCycle=dutyCycle)
+
+	The level is checked before anything else & lines kept are only formatted by the writer thread, so lines
+	dropped by the level cost a call, and lines kept cost no formatting on the caller thread. Arguments must not
+	change once logged. Keyword arguments are also written as structured fields by the json sink. Messages
+	without arguments are taken as is.
+	"""
+
+	# Levels by severity, lines below the current level are dropped
+	LEVELS = {'debug': 0, 'info': 1, 'warning': 2, 'error': 3}
+
+	# File sinks, by [Logs] Format: file extension
+	FORMATS = {'text': '.log', 'json': '.jsonl'}
+
+	# Lines waiting for the writer thread, past it new lines are dropped rather than piling up in memory
+	MAX_QUEUED = 10000
 
 	def __init__(self, path, rid, **kwargs):
-	
+
 		self.__path = Dir(path)
 		self.__verbose = kwargs.get('verbose', False)
 		self.__debug = kwargs.get('debug', False)
+		self.__level = self.LEVELS['debug'] if self.__debug else self.LEVELS['info']
+		self.__format = kwargs.get('format', 'text')
 		self.__rid = rid
 		self.__rotation = 0
 		self.__hasError = False
 		self.__maxLogLines = kwargs.get('maxLogLines', None)
+		self.__maxLogBytes = kwargs.get('maxLogBytes', None)
 		self.__maxFilesCount = kwargs.get('maxFilesCount', 5)
+		self.__flushInterval = kwargs.get('flushInterval', 1.0)
+		self.__flushLines = kwargs.get('flushLines', 100)
+		self.__compress = kwargs.get('compress', False)
 		self.__writtenLines = 0
+		self.__writtenBytes = 0
+		self.__handle = None
+		self.__writeFailed = False
+		self.__dropped = 0
+		self.__stampSecond = None
+		self.__stamp = None
+		self.__updateThreshold()
 
 		#Init dir
 		if not self.__path.exists():
 			self.__path.create()
-		
-	def log(self, section, status, message):
-	
-		log = '[' + datetime.today().strftime('%Y-%m-%d-%H:%M:%S') + '][' + section.upper() + '][' + status.upper() + '] - ' + message
 
-		if self.__verbose and ((status != 'debug') or (status == 'debug' and self.__debug)):
-			print(log)
+		# Index existing logs once, rotation keeps it up to date
+		self.__indexLock = threading.Lock()
+		self.__index = sorted(filename for filename in self.__path.list() if filename.startswith('Log_'))
+
+		# Lines are written by a background thread, in batches
+		self.__queue = queue.SimpleQueue()
+		self.__thread = threading.Thread(target=self.__run, name='logger', daemon=True)
+		self.__thread.start()
+
+		atexit.register(self.close)
+
+	def log(self, section, status, message, *args, **fields):
 
-		if self.__debug and status == 'debug':
+		if self.LEVELS[status] < self.__threshold:
 			return
 
-		f = open(self.__path.getPath() + 'Log_' +  self.__rid + '_' + ( '{0:0=3d}'.format(self.__rotation) ) + '.log' , 'a')
-		f.write(log + "\n")
-		f.close()
-		
 		if status == 'error':
 			self.__hasError = True
 
-		self.__writtenLines += 1
+		self.__enqueue((time.time(), section, status, message, args, fields))
 
-		self.__rotate()
+	# Level methods check the threshold inline, a dropped line costs no more than the call
 
-	def info(self, section = 'global', message = ''):
-		self.log(section,'info',message)
+	def info(self, section = 'global', message = '', *args, **fields):
+		if self.__threshold <= 1:
+			self.__enqueue((time.time(), section, 'info', message, args, fields))
 
-	def warning(self, section='global', message=''):
-		self.log(section, 'warning', message)
-	
-	def error(self, section = 'global', message = ''):
-		self.log(section,'error',message)
+	def warning(self, section='global', message='', *args, **fields):
+		if self.__threshold <= 2:
+			self.__enqueue((time.time(), section, 'warning', message, args, fields))
+
+	def error(self, section = 'global', message = '', *args, **fields):
+		self.__hasError = True
+		self.__enqueue((time.time(), section, 'error', message, args, fields))
+
+	def debug(self, section='global', message='', *args, **fields):
+		if self.__threshold <= 0:
+			self.__enqueue((time.time(), section, 'debug', message, args, fields))
+
+	def isEnabledFor(self, status):
+		"""
+		Whether lines of a level are logged, e.g. to skip computing values only logged.
+		"""
+		return self.LEVELS[status] >= self.__threshold
+
+	def configure(self, **kwargs):
+		"""
+		Updates rotation & flushing settings, e.g. on config reload.
+		"""
+		self.__maxLogLines = kwargs.get('maxLogLines', self.__maxLogLines)
+		self.__maxLogBytes = kwargs.get('maxLogBytes', self.__maxLogBytes)
+		self.__maxFilesCount = kwargs.get('maxFilesCount', self.__maxFilesCount)
+		self.__flushInterval = kwargs.get('flushInterval', self.__flushInterval)
+		self.__flushLines = kwargs.get('flushLines', self.__flushLines)
+		self.__compress = kwargs.get('compress', self.__compress)
+
+	def setLevel(self, level):
+		"""
+		Sets the lowest level logged at runtime, e.g. from the control socket.
+
+		Parameters:
+		- level (str): One of LEVELS, debug lines are printed to the console only;
+		"""
+		self.__level = self.LEVELS[level]
+		self.__debug = level == 'debug'
+		self.__updateThreshold()
+
+	def getLevel(self):
+		return next(name for name, value in self.LEVELS.items() if value == self.__level)
+
+	def isDebug(self):
+		return self.__verbose and self.__debug
 
-	def debug(self, section='global', message=''):
-		self.log(section, 'debug', message)
-		
 	def hasErrors(self):
 		return self.__hasError
-		
+
+	def close(self):
+		"""
+		Flushes pending lines and stops the writer thread.
+		"""
+		if not self.__thread.is_alive():
+			return
+
+		self.__queue.put(None)
+		self.__thread.join()
+
 	def purge(self):
-	
-		logs = sorted(self.__path.list(), reverse=True)
 
-		for filename in logs[:(self.__maxFilesCount*-1)]:
+		with self.__indexLock:
+			expired = self.__index[:(self.__maxFilesCount*-1)]
+			self.__index = self.__index[(self.__maxFilesCount*-1):]
+
+		for filename in expired:
 			log = File(self.__path.getPath()+filename)
-			log.delete()
+			if log.exists():
+				log.delete()
+
+	def __enqueue(self, item):
+
+		# The writer fell behind (e.g. a stalled disk) or stopped, lines are counted & dropped
+		if self.__queue.qsize() >= self.MAX_QUEUED:
+			self.__dropped += 1
+			return
+
+		self.__queue.put(item)
+
+	def __updateThreshold(self):
+		# Debug lines are console only, dropped as well without a console
+		self.__threshold = max(self.__level, self.LEVELS['debug'] if self.isDebug() else self.LEVELS['info'])
+
+	def __run(self):
+
+		pending = []
+		deadline = time.monotonic() + self.__flushInterval
+
+		while True:
+			try:
+				item = self.__queue.get(timeout=max(deadline - time.monotonic(), 0))
+			except queue.Empty:
+				item = False
+
+			if item:
+				pending.append(item)
+
+			# Flush on size, time, errors & close
+			if item is None or len(pending) >= self.__flushLines or time.monotonic() >= deadline or (item and item[2] == 'error'):
+				self.__flush(pending)
+				pending = []
+				deadline = time.monotonic() + self.__flushInterval
+
+			if item is None:
+				break
+
+		self.__closeHandle()
+
+	def __flush(self, items):
+
+		if self.__dropped:
+			dropped, self.__dropped = self.__dropped, 0
+			items.insert(0, (items[0][0] if items else time.time(), 'Logger', 'warning', 'Dropped {0} lines, the writer fell behind', (dropped,), {}))
+
+		try:
+			self.__write(items)
+		except Exception as e:
+			# Disk full, permissions, deleted log dir...: the batch is lost, the file is opened again on the next one
+			self.__hasError = True
+			self.__closeHandle()
+			if not self.__writeFailed:
+				self.__writeFailed = True
+				print('Logger : Failed to write logs to {0}, retrying on the next batch. Reason: {1}'.format(self.__path.getPath(), repr(e)), file=sys.stderr)
+			return
+
+		if self.__writeFailed:
+			self.__writeFailed = False
+			print('Logger : Writing logs to {0} again'.format(self.__path.getPath()), file=sys.stderr)
+
+	def __closeHandle(self):
+
+		if self.__handle is None:
+			return
+
+		try:
+			self.__handle.close()
+		except OSError:
+			pass
+		self.__handle = None
+
+	def __write(self, items):
+
+		if not items:
+			return
+
+		for stamp, section, status, message, args, fields in items:
+
+			if args or fields:
+				message = self.__render(message, args, fields)
+
+			log = '[' + self.__formatStamp(stamp) + '][' + section.upper() + '][' + status.upper() + '] - ' + message
+
+			if self.__verbose:
+				print(log)
+
+			if status == 'debug':
+				continue
+
+			if self.__format == 'json':
+				log = self.__toJson(stamp, section, status, message, fields)
+
+			if self.__handle is None:
+				self.__open()
+
+			self.__handle.write(log + "\n")
+
+			self.__writtenLines += 1
+			self.__writtenBytes += len(log) + 1
+
+			self.__rotate()
+
+		if self.__handle is not None:
+			self.__handle.flush()
+
+	def __render(self, message, args, fields):
+
+		try:
+			return message.format(*args, **fields)
+		except Exception as e:
+			# A broken template or argument must neither lose the line nor end the writer thread
+			return message + ' (unformatted: ' + repr(e) + ', args ' + repr(args) + ', fields ' + repr(fields) + ')'
+
+	def __toJson(self, stamp, section, status, message, fields):
+
+		record = {'time': round(stamp, 3), 'section': section.upper(), 'level': status.upper(), 'message': message}
+		if fields:
+			record['fields'] = fields
+		return json.dumps(record, default=str)
+
+	def __formatStamp(self, stamp):
+
+		# Timestamps have a 1 sec resolution, format once per second
+		second = int(stamp)
+		if second != self.__stampSecond:
+			self.__stampSecond = second
+			self.__stamp = datetime.fromtimestamp(second).strftime('%Y-%m-%d-%H:%M:%S')
+
+		return self.__stamp
+
+	def __getFilename(self, rotation):
+
+		return 'Log_' + self.__rid + '_' + ( '{0:0=3d}'.format(rotation) ) + self.FORMATS[self.__format]
+
+	def __open(self):
+
+		# The log dir may have been removed meanwhile
+		if not self.__path.exists():
+			self.__path.create()
+
+		filename = self.__getFilename(self.__rotation)
+		self.__handle = open(self.__path.getPath() + filename, 'a')
+
+		with self.__indexLock:
+			if filename not in self.__index:
+				self.__index.append(filename)
 
 	def __rotate(self):
 
-		if self.__maxLogLines is None or self.__writtenLines < self.__maxLogLines:
+		linesExceeded = self.__maxLogLines is not None and self.__writtenLines >= self.__maxLogLines
+		bytesExceeded = self.__maxLogBytes is not None and self.__writtenBytes >= self.__maxLogBytes
+
+		if not linesExceeded and not bytesExceeded:
 			return
 
+		self.__handle.close()
+		self.__handle = None
+
+		filename = self.__getFilename(self.__rotation)
+
 		self.__rotation += 1
 		self.__writtenLines = 0
+		self.__writtenBytes = 0
 
 		self.purge()
 
+		if self.__compress:
+			self.__gzip(filename)
+
+	def __gzip(self, filename):
+
+		with self.__indexLock:
+			if filename not in self.__index:
+				return
+
+		source = self.__path.getPath() + filename
+
+		try:
+			with open(source, 'rb') as raw, gzip.open(source + '.gz', 'wb') as compressed:
+				shutil.copyfileobj(raw, compressed)
+			File(source).delete()
+		except OSError as e:
+			print('Logger : Failed to compress {0}. Reason: {1}'.format(source, e), file=sys.stderr)
+			return
 
+		with self.__indexLock:
+			self.__index[self.__index.index(filename)] = filename + '.gz'
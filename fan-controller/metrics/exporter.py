@@ -0,0 +1,101 @@
+import os
+import asyncio
+
+from config.config import Config
+from log.logger import Logger
+from runtime.runtime import Runtime
+from .registry import Registry
+
+class Exporter:
+    """
+    Exposes the metrics registry in the Prometheus text format, see [Metrics] config section.
+
+    Metrics are served over HTTP on /metrics and/or written to a node_exporter textfile collector file. The
+    textfile is also the fallback when the HTTP port cannot be bound. Scrapes are answered by the event loop, one
+    request per connection.
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    # Seconds a client gets to send its request
+    REQUEST_TIMEOUT = 5
+
+    def __init__(self, config: Config, logger: Logger, registry: Registry = None):
+        self.__config = config
+        self.__logger = logger
+        self.__registry = registry or Registry.getDefault()
+        self.__server = None
+        self.__task = None
+
+    async def start(self):
+        metrics = self.__config.getSnapshot().Metrics
+
+        if metrics.Port > 0:
+            try:
+                self.__server = await asyncio.start_server(self.__handle, metrics.Address, metrics.Port)
+                self.__logger.info('Metrics', message='Serving metrics on http://{0}:{1}/metrics'.format(metrics.Address, metrics.Port))
+            except OSError as e:
+                self.__server = None
+                self.__logger.error('Metrics', message='Cannot serve metrics on {0}:{1}: {2}{3}'.format(metrics.Address, metrics.Port, repr(e), ', falling back to the textfile' if metrics.TextfilePath else ''))
+
+        if metrics.TextfilePath:
+            self.__task = Runtime.spawn(self.__runTextfile(), 'metrics-textfile', self.__logger)
+            self.__logger.info('Metrics', message='Writing metrics to {0} every {1} secs'.format(metrics.TextfilePath, metrics.TextfileInterval))
+
+    async def stop(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+        await Runtime.cancel(self.__task)
+        self.__task = None
+
+    def writeTextfile(self, path: str):
+        """
+        Writes the metrics to a textfile collector file, atomically so a scrape never reads a partial file.
+        """
+        temporary = '{0}.{1}.tmp'.format(path, os.getpid())
+        with open(temporary, 'w') as f:
+            f.write(self.__registry.render())
+        os.replace(temporary, path)
+
+    async def __runTextfile(self):
+        while True:
+            metrics = self.__config.getSnapshot().Metrics
+            try:
+                self.writeTextfile(metrics.TextfilePath)
+            except OSError as e:
+                self.__logger.error('Metrics', message='Cannot write metrics to {0}: {1}'.format(metrics.TextfilePath, repr(e)))
+            await asyncio.sleep(metrics.TextfileInterval)
+
+    async def __handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), self.REQUEST_TIMEOUT)
+            # Headers are not used, read up to the blank line ending them
+            while True:
+                line = await asyncio.wait_for(reader.readline(), self.REQUEST_TIMEOUT)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+
+            parts = request.decode('latin-1').split()
+            body = b''
+            if len(parts) < 2 or parts[0] not in ('GET', 'HEAD'):
+                status = '405 Method Not Allowed'
+            elif parts[1].split('?')[0] not in ('/', '/metrics'):
+                status = '404 Not Found'
+            else:
+                status = '200 OK'
+                body = self.__registry.render().encode('utf-8')
+
+            writer.write('HTTP/1.0 {0}\r\nContent-Type: {1}\r\nContent-Length: {2}\r\nConnection: close\r\n\r\n'.format(status, self.CONTENT_TYPE, len(body)).encode('latin-1'))
+            if parts and parts[0] == 'GET':
+                writer.write(body)
+            await writer.drain()
+
+            # Scrapes are frequent, keep them out of the logs unless debugging
+            if self.__logger.isDebug():
+                self.__logger.debug('Metrics', message='{0} "{1}" {2}'.format(writer.get_extra_info('peername'), request.decode('latin-1').strip(), status))
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
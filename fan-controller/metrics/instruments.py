@@ -0,0 +1,39 @@
+from .registry import Registry
+
+class Instruments:
+    """
+    The metrics recorded by the engine, see README for the full list.
+    """
+
+    __registry = Registry.getDefault()
+
+    # Sensor reads on the 1-Wire bus take hundreds of milliseconds
+    SENSOR_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0)
+
+    # Latencies
+    STAGE_SECONDS = __registry.histogram('fancontroller_stage_duration_seconds', 'Time spent per engine iteration stage.', ('zone', 'stage'))
+    ITERATION_SECONDS = __registry.histogram('fancontroller_iteration_duration_seconds', 'Time spent per zone iteration.', ('zone',))
+    SENSOR_READ_SECONDS = __registry.histogram('fancontroller_sensor_read_duration_seconds', 'Time spent reading a temperature sensor, in the background sampler.', ('sensor',), SENSOR_BUCKETS)
+    SCHEDULER_JITTER_SECONDS = __registry.histogram('fancontroller_scheduler_jitter_seconds', 'Delay between an iteration deadline and the engine waking up.')
+
+    # Gauges
+    TEMPERATURE = __registry.gauge('fancontroller_temperature_celsius', 'Zone temperature, aggregated from its sensors.', ('zone',))
+    SENSOR_TEMPERATURE = __registry.gauge('fancontroller_sensor_temperature_celsius', 'Latest temperature sensor reading.', ('sensor',))
+    DUTY_CYCLE = __registry.gauge('fancontroller_duty_cycle_percent', 'PWM duty cycle applied to the zone fans.', ('zone',))
+    RPM = __registry.gauge('fancontroller_fan_rpm', 'Fan speed measured by the zone tachometer.', ('zone',))
+    RPM_TARGET = __registry.gauge('fancontroller_fan_rpm_target', 'Fan speed the zone holds, in rpm speed control.', ('zone',))
+    RPM_ERROR = __registry.gauge('fancontroller_fan_rpm_error', 'Last measured minus target fan speed, in rpm speed control.', ('zone',))
+    FAN_ON = __registry.gauge('fancontroller_fan_on', 'Whether the zone fans are running (1) or stopped after the shutdown grace period (0).', ('zone',))
+    FAULT_ACTIVE = __registry.gauge('fancontroller_fault_active', 'Whether a fault is currently reported for the zone.', ('zone', 'fault'))
+    SCHEDULER_PERIOD = __registry.gauge('fancontroller_scheduler_period_seconds', 'Current period between engine iterations.')
+    START_TIME = __registry.gauge('fancontroller_start_time_seconds', 'Start time of the process since the Unix epoch.')
+
+    # Counters
+    PANICS = __registry.counter('fancontroller_panics_total', 'Times a zone entered panic mode.', ('zone',))
+    RESETS = __registry.counter('fancontroller_resets_total', 'Times a zone was reset after a fault cleared.', ('zone',))
+    RELAY_TOGGLES = __registry.counter('fancontroller_relay_toggles_total', 'Relay state changes.', ('pin', 'state'))
+    SENSOR_READ_ERRORS = __registry.counter('fancontroller_sensor_read_errors_total', 'Failed temperature sensor reads.', ('sensor',))
+    SENSOR_READINGS_REJECTED = __registry.counter('fancontroller_sensor_readings_rejected_total', 'Temperature sensor readings rejected by the filter.', ('sensor', 'reason'))
+    PWM_WRITES = __registry.counter('fancontroller_pwm_writes_total', 'Duty cycle writes to the zone PWM channel.', ('zone',))
+    PWM_WRITES_SUPPRESSED = __registry.counter('fancontroller_pwm_writes_suppressed_total', 'Duty cycle changes held back by the output stage.', ('zone', 'reason'))
+    SCHEDULER_OVERRUNS = __registry.counter('fancontroller_scheduler_overruns_total', 'Engine iterations that missed their deadline.')
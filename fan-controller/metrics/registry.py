@@ -0,0 +1,238 @@
+import bisect
+import threading
+import time
+
+class Metric:
+    """
+    A named metric, one series per label values combination.
+    """
+
+    TYPE = None
+
+    def __init__(self, name: str, help: str, labelNames: tuple = ()):
+        self._name = name
+        self._help = help
+        self._labelNames = tuple(labelNames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def getName(self):
+        return self._name
+
+    def labels(self, *values):
+        """
+        Returns the series of the given label values, created on first use. Callers on hot paths should keep it.
+        """
+        values = tuple(str(value) for value in values)
+        if len(values) != len(self._labelNames):
+            raise ValueError('Metric {0} expects labels {1}, got {2}'.format(self._name, self._labelNames, values))
+
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, self._createSeries())
+        return series
+
+    def render(self):
+        """
+        Renders all series in the Prometheus text exposition format.
+
+        Returns:
+        - list : Lines, without trailing new lines;
+        """
+        lines = ['# HELP {0} {1}'.format(self._name, self._help), '# TYPE {0} {1}'.format(self._name, self.TYPE)]
+        for values, series in sorted(self._series.items()):
+            lines.extend(self._renderSeries(dict(zip(self._labelNames, values)), series))
+        return lines
+
+    def _createSeries(self):
+        raise NotImplementedError
+
+    def _renderSeries(self, labels: dict, series):
+        raise NotImplementedError
+
+    @staticmethod
+    def _formatLabels(labels: dict):
+        if not labels:
+            return ''
+        return '{' + ','.join('{0}="{1}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for key, value in labels.items()) + '}'
+
+    @staticmethod
+    def _formatValue(value: float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(float(value))
+
+class CounterSeries:
+
+    def __init__(self):
+        self.__value = 0.0
+        self.__lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self.__lock:
+            self.__value += amount
+
+    def get(self):
+        return self.__value
+
+class Counter(Metric):
+    """
+    A monotonically increasing count, e.g. panics.
+    """
+
+    TYPE = 'counter'
+
+    def _createSeries(self):
+        return CounterSeries()
+
+    def _renderSeries(self, labels: dict, series):
+        return ['{0}{1} {2}'.format(self._name, self._formatLabels(labels), self._formatValue(series.get()))]
+
+class GaugeSeries:
+
+    def __init__(self):
+        self.__value = 0.0
+
+    def set(self, value: float):
+        self.__value = value
+
+    def get(self):
+        return self.__value
+
+class Gauge(Metric):
+    """
+    A value going up & down, e.g. temperature.
+    """
+
+    TYPE = 'gauge'
+
+    def _createSeries(self):
+        return GaugeSeries()
+
+    def _renderSeries(self, labels: dict, series):
+        value = series.get()
+        if value is None:
+            return []
+        return ['{0}{1} {2}'.format(self._name, self._formatLabels(labels), self._formatValue(value))]
+
+class Timer:
+    """
+    Context manager observing the time spent in its block.
+    """
+
+    def __init__(self, series):
+        self.__series = series
+
+    def __enter__(self):
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.__series.observe(time.perf_counter() - self.__start)
+        return False
+
+class HistogramSeries:
+
+    def __init__(self, buckets: tuple):
+        self.__buckets = buckets
+        self.__counts = [0] * (len(buckets) + 1)
+        self.__sum = 0.0
+        self.__lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.__buckets, value)
+        with self.__lock:
+            self.__counts[index] += 1
+            self.__sum += value
+
+    def time(self):
+        return Timer(self)
+
+    def get(self):
+        """
+        Returns the cumulative count per bucket upper bound (+Inf last), the sum & the count of observations.
+        """
+        with self.__lock:
+            counts = list(self.__counts)
+            total = self.__sum
+
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+
+        return list(zip(self.__buckets + (float('inf'),), cumulative)), total, running
+
+class Histogram(Metric):
+    """
+    Observations counted in cumulative buckets, e.g. latencies.
+    """
+
+    TYPE = 'histogram'
+
+    # In seconds, from sub millisecond computations to slow bus reads
+    LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, name: str, help: str, labelNames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labelNames)
+        self.__buckets = tuple(sorted(buckets))
+
+    def _createSeries(self):
+        return HistogramSeries(self.__buckets)
+
+    def _renderSeries(self, labels: dict, series):
+        buckets, total, count = series.get()
+        lines = []
+        for bound, cumulative in buckets:
+            lines.append('{0}_bucket{1} {2}'.format(self._name, self._formatLabels(dict(labels, le=self._formatValue(bound))), cumulative))
+        lines.append('{0}_sum{1} {2}'.format(self._name, self._formatLabels(labels), self._formatValue(total)))
+        lines.append('{0}_count{1} {2}'.format(self._name, self._formatLabels(labels), count))
+        return lines
+
+class Registry:
+    """
+    The metrics of the process, rendered together for the exporter.
+    """
+
+    __default = None
+    __defaultLock = threading.Lock()
+
+    def __init__(self):
+        self.__metrics = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def getDefault():
+        with Registry.__defaultLock:
+            if Registry.__default is None:
+                Registry.__default = Registry()
+            return Registry.__default
+
+    def counter(self, name: str, help: str, labelNames: tuple = ()):
+        return self.__register(Counter(name, help, labelNames))
+
+    def gauge(self, name: str, help: str, labelNames: tuple = ()):
+        return self.__register(Gauge(name, help, labelNames))
+
+    def histogram(self, name: str, help: str, labelNames: tuple = (), buckets: tuple = Histogram.LATENCY_BUCKETS):
+        return self.__register(Histogram(name, help, labelNames, buckets))
+
+    def render(self):
+        """
+        Renders every metric in the Prometheus text exposition format.
+        """
+        with self.__lock:
+            metrics = list(self.__metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def __register(self, metric: Metric):
+        with self.__lock:
+            if metric.getName() in self.__metrics:
+                raise ValueError('Metric {0} is already registered'.format(metric.getName()))
+            self.__metrics[metric.getName()] = metric
+        return metric
@@ -0,0 +1,56 @@
+import asyncio
+
+from log.logger import Logger
+
+class Runtime:
+    """
+    Helpers for the daemon event loop.
+
+    The control loop, sensor sampling, tachometers, buzzer patterns, config watching, metrics & signal handling
+    all run as tasks of a single asyncio loop. Blocking sysfs reads are handed to executors, shutdown cancels
+    the tasks rather than waiting for them to notice a flag.
+    """
+
+    @staticmethod
+    def spawn(coroutine, name: str, logger: Logger = None):
+        """
+        Schedules a coroutine as a task of the running loop, logging it if it ends with an error.
+
+        Returns:
+        - asyncio.Task
+        """
+        task = asyncio.get_running_loop().create_task(coroutine, name=name)
+        if logger is not None:
+            task.add_done_callback(lambda done: Runtime.__report(done, logger))
+        return task
+
+    @staticmethod
+    async def cancel(*tasks):
+        """
+        Cancels tasks and waits for them to unwind, tasks may be None or already done.
+        """
+        pending = [task for task in tasks if task is not None and not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    @staticmethod
+    async def waitFor(event: asyncio.Event, timeout: float):
+        """
+        Waits for an event to be set.
+
+        Returns:
+        - bool : Whether the event was set within timeout;
+        """
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @staticmethod
+    def __report(task, logger: Logger):
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.error('Runtime', message='Task {0} stopped on error: {1}'.format(task.get_name(), repr(task.exception())))
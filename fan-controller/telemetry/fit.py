@@ -0,0 +1,191 @@
+import os
+import sys
+import csv
+import inspect
+import argparse
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+
+sys.path.insert(0, parentdir + '/fan-controller')
+
+import numpy as np
+
+from telemetry.ring import Ring
+from telemetry.query import parseDuration, parseTime, select
+from engine.control.model import ThermalModel
+
+# Samples further apart than this share of the typical interval start a new segment
+GAP_TOLERANCE = 0.5
+
+def readRing(path, start, end, zone):
+    """
+    Reads (timestamp, temperature, duty) samples of a zone from a telemetry file.
+    """
+    ring = Ring(path, readOnly=True)
+    try:
+        return [(record[0], record[1], effectiveDuty(record[2], record[7])) for record in select(ring, start, end, zone)]
+    finally:
+        ring.close()
+
+def readCsv(path, start, end, zone):
+    """
+    Reads (timestamp, temperature, duty) samples of a zone from raw records exported by query.py.
+    """
+    samples = []
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            timestamp = float(row['timestamp'])
+            if not start <= timestamp < end or (zone is not None and int(row['zone']) != zone):
+                continue
+            samples.append((timestamp, float(row['temperature']) if row['temperature'] else None, effectiveDuty(int(row['duty']) if row['duty'] else None, int(row['relay']))))
+    return samples
+
+def effectiveDuty(duty, relay):
+    # Fans powered off by the relay do not cool, whatever the duty cycle left set
+    return 0 if not relay else duty
+
+def segments(samples):
+    """
+    Splits samples into runs of evenly spaced valid samples, gaps & missing readings end a run.
+
+    Returns:
+    - (list, float) : (temperatures, duty cycles) numpy arrays per run & the typical interval in secs;
+    """
+    valid = [sample for sample in samples if sample[1] is not None and sample[2] is not None]
+    if len(valid) < 2:
+        return [], 0
+    interval = float(np.median(np.diff([sample[0] for sample in valid])))
+
+    runs = []
+    current = [valid[0]]
+    for previous, sample in zip(valid, valid[1:]):
+        if abs(sample[0] - previous[0] - interval) > interval * GAP_TOLERANCE:
+            runs.append(current)
+            current = []
+        current.append(sample)
+    runs.append(current)
+
+    return [(np.array([sample[1] for sample in run]), np.array([sample[2] for sample in run], dtype=float)) for run in runs], interval
+
+def regressors(runs, order):
+    """
+    Stacks the least squares problem, the next temperature from the last order temperatures & duty cycles.
+
+    Returns:
+    - (numpy.ndarray, numpy.ndarray) : Regressor matrix [T[k], (T[k-1]), 1, u[k], (u[k-1])] & next temperatures;
+    """
+    rows = []
+    targets = []
+    for temperatures, duties in runs:
+        for k in range(order - 1, len(temperatures) - 1):
+            past = [temperatures[k - lag] for lag in range(order)]
+            inputs = [duties[k - lag] for lag in range(order)]
+            rows.append(past + [1.0] + inputs)
+            targets.append(temperatures[k + 1])
+    return np.array(rows), np.array(targets)
+
+def fit(runs, interval, order, ambient):
+    """
+    Fits a thermal model with least squares & converts it to continuous time.
+
+    Returns:
+    - (ThermalModel, dict) : Fitted model & its parameters, see [Model] config section;
+
+    Raises:
+    - ValueError : When there are too few samples or the fit is not a stable, cooling, model;
+    """
+    matrix, targets = regressors(runs, order)
+    # At least 10 samples per parameter
+    if len(targets) < 10 * (2 * order + 1):
+        raise ValueError('Not enough evenly spaced samples to fit a model of order {0}: {1}'.format(order, len(targets)))
+
+    theta, residuals, rank, singular = np.linalg.lstsq(matrix, targets, rcond=None)
+    if rank < 2 * order + 1:
+        raise ValueError('The duty cycle or temperature did not vary enough to tell the parameters apart, record a period with some load & duty cycle changes')
+
+    if order == 1:
+        a, bias, b = theta
+        if not 0 < a < 1:
+            raise ValueError('The fitted model is not stable (pole {0:.4f}), record a longer period'.format(a))
+        gain = 1 - a
+        timeConstant = -interval / np.log(a)
+        lag = 0.0
+        base = bias / gain
+        cooling = -b / gain
+    else:
+        a1, a2, bias, b1, b2 = theta
+        # T[k+1] = a1 T[k] + a2 T[k-1] + ..., poles are the roots of z^2 - a1 z - a2
+        poles = np.roots([1, -a1, -a2])
+        if np.iscomplexobj(poles) or not all(0 < pole < 1 for pole in poles):
+            raise ValueError('The fitted model has no two real, stable, time constants (poles {0}), try --order 1'.format(', '.join('{0:.4f}'.format(pole) for pole in poles)))
+        gain = 1 - a1 - a2
+        timeConstant, lag = sorted((-interval / np.log(pole) for pole in poles), reverse=True)
+        base = bias / gain
+        cooling = -(b1 + b2) / gain
+
+    if cooling <= 0:
+        raise ValueError('The fitted model does not cool with the fans (cooling {0:.4f} per percent), record a period with some duty cycle changes'.format(cooling))
+
+    parameters = {
+        'Ambient': round(ambient, 2),
+        'HeatInput': round(float(base) - ambient, 2),
+        'Cooling': round(float(cooling), 4),
+        'TimeConstant': round(float(timeConstant), 1),
+        'Lag': round(float(lag), 1),
+    }
+    return ThermalModel(parameters['Ambient'], parameters['HeatInput'], parameters['Cooling'], parameters['TimeConstant'], parameters['Lag']), parameters
+
+def simulate(model, runs, interval):
+    """
+    Runs the model alongside every run, from its first temperature & fed the recorded duty cycles.
+
+    Returns:
+    - float : Root mean square error in degrees;
+    """
+    errors = []
+    for temperatures, duties in runs:
+        temperature = chassis = temperatures[0]
+        for k in range(1, len(temperatures)):
+            temperature, chassis = model.predict(temperature, chassis, duties[k - 1], interval), model.predictChassis(chassis, duties[k - 1], interval)
+            errors.append(temperature - temperatures[k])
+    return float(np.sqrt(np.mean(np.square(errors)))) if errors else 0.0
+
+def main():
+    argParser = argparse.ArgumentParser(description='Raspberry PI : Fan Controller - Fits the [Model] thermal model of a zone from its recorded temperature & duty cycle, for the mpc control mode')
+    argParser.add_argument('--file', dest='file', default=parentdir + '/data/telemetry/telemetry.ring', help='Telemetry file, see [Telemetry][Path]')
+    argParser.add_argument('--csv', dest='csv', default=None, help='Raw records exported by query.py --format csv, instead of the telemetry file')
+    argParser.add_argument('--from', dest='start', type=parseTime, default=0, help='Range start: now, -<duration> (e.g. --from=-7d), epoch secs or ISO date')
+    argParser.add_argument('--last', dest='last', type=parseDuration, default=None, help='Range start as a duration ago (e.g. 7d), same as --from=-7d')
+    argParser.add_argument('--to', dest='end', type=parseTime, default='now', help='Range end (exclusive), same formats as --from')
+    argParser.add_argument('--zone', dest='zone', type=int, default=0, help='Zone index (in config order)')
+    argParser.add_argument('--order', dest='order', type=int, choices=(1, 2), default=1, help='Model order: 1 (chassis only) or 2 (chassis & sensor lag)')
+    argParser.add_argument('--ambient', dest='ambient', type=float, default=22, help='Room temperature during the recording, only splits the fitted settling temperature into Ambient & HeatInput')
+    args = argParser.parse_args()
+
+    start = parseTime('-{0}'.format(args.last)) if args.last is not None else args.start
+    try:
+        samples = readCsv(args.csv, start, args.end, args.zone) if args.csv else readRing(args.file, start, args.end, args.zone)
+    except (OSError, ValueError) as e:
+        print('Cannot read the recording: {0}'.format(repr(e)), file=sys.stderr)
+        sys.exit(1)
+
+    runs, interval = segments(samples)
+    try:
+        model, parameters = fit(runs, interval, args.order, args.ambient)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+
+    duties = np.concatenate([run[1] for run in runs])
+    print('Fitted an order {0} model on {1} samples in {2} runs, every {3:g} secs'.format(args.order, sum(len(run[0]) for run in runs), len(runs), interval))
+    print('Simulated error: {0:.2f} degrees RMS, duty cycle range {1:g}-{2:g}%'.format(simulate(model, runs, interval), duties.min(), duties.max()))
+    if duties.max() - duties.min() < 20:
+        print('Warning: the duty cycle barely changed, Cooling is poorly identified', file=sys.stderr)
+    print('')
+    print('[Model]')
+    for key, value in parameters.items():
+        print('{0} = {1:g}'.format(key, value))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+import os
+import sys
+import csv
+import time
+import inspect
+import argparse
+
+from datetime import datetime
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+
+sys.path.insert(0, parentdir + '/fan-controller')
+
+from telemetry.ring import Ring
+
+# Fields downsampled to min/max/mean per bucket
+NUMERIC = ('temperature', 'duty', 'tach_avg', 'rpm')
+
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+def parseDuration(value):
+    """
+    Parses a duration in seconds, optionally suffixed with s, m, h, d or w (e.g. 15m).
+    """
+    value = str(value).strip()
+    try:
+        if value[-1:] in UNITS:
+            return float(value[:-1]) * UNITS[value[-1]]
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('Invalid duration: {0}'.format(value))
+
+def parseTime(value):
+    """
+    Parses a point in time: "now", a duration ago (e.g. -7d), epoch seconds or an ISO date (e.g. 2024-05-01T12:00).
+    """
+    value = str(value).strip()
+    if value == 'now':
+        return time.time()
+    if value.startswith('-'):
+        return time.time() - parseDuration(value[1:])
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError('Invalid time: {0}'.format(value))
+
+def select(ring, start, end, zone):
+    """
+    Iterates the records within a time range, optionally of a single zone.
+    """
+    first = ring.search(start)
+    last = ring.search(end)
+    for record in ring.iterate(first, last):
+        if zone is None or record[3] == zone:
+            yield record
+
+def downsample(records, bucket):
+    """
+    Folds records into per zone time buckets, one bucket at a time so memory stays bounded.
+
+    Returns:
+    - generator : (bucket start, zone, count, min, max & mean per NUMERIC field, fault bits) rows;
+    """
+    current = None
+    folded = {}
+
+    for record in records:
+        values = dict(zip(Ring.FIELDS, record))
+        start = int(values['timestamp'] // bucket * bucket)
+
+        if start != current:
+            yield from flush(current, folded)
+            current = start
+            folded = {}
+
+        state = folded.setdefault(values['zone'], {'count': 0, 'faults': 0, 'fields': {field: [None, None, 0.0, 0] for field in NUMERIC}})
+        state['count'] += 1
+        state['faults'] |= values['faults']
+        for field in NUMERIC:
+            value = values[field]
+            if value is None:
+                continue
+            stats = state['fields'][field]
+            stats[0] = value if stats[0] is None else min(stats[0], value)
+            stats[1] = value if stats[1] is None else max(stats[1], value)
+            stats[2] += value
+            stats[3] += 1
+
+    yield from flush(current, folded)
+
+def flush(start, folded):
+    for zone in sorted(folded):
+        state = folded[zone]
+        row = [start, zone, state['count']]
+        for field in NUMERIC:
+            low, high, total, count = state['fields'][field]
+            row.extend([low, high, round(total / count, 3) if count else None])
+        row.append(state['faults'])
+        yield tuple(row)
+
+def downsampleHeader():
+    return ['timestamp', 'zone', 'count'] + ['{0}_{1}'.format(field, stat) for field in NUMERIC for stat in ('min', 'max', 'mean')] + ['faults']
+
+def writeCsv(rows, header, output):
+    handle = sys.stdout if output is None else open(output, 'w', newline='')
+    try:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(['' if value is None else value for value in row])
+    finally:
+        if handle is not sys.stdout:
+            handle.close()
+
+def writeNumpy(rowsFactory, header, output, count = None):
+    """
+    Writes rows to a .npy structured array, streamed into a memory mapped output when the count is known.
+    """
+    import numpy as np
+
+    dtype = np.dtype([(name, 'f8') for name in header])
+    convert = lambda row: tuple(float('nan') if value is None else value for value in row)
+
+    if count is None:
+        np.save(output, np.array([convert(row) for row in rowsFactory()], dtype=dtype))
+        return
+
+    array = np.lib.format.open_memmap(output, mode='w+', dtype=dtype, shape=(count,))
+    # Records written meanwhile are left out, the count was taken first
+    for index, row in zip(range(count), rowsFactory()):
+        array[index] = convert(row)
+    array.flush()
+    del array
+
+def info(ring, path):
+    first, end = ring.getBounds()
+    print('File:      {0} ({1:.1f} MB on disk)'.format(path, os.stat(path).st_blocks * 512 / 1024 / 1024))
+    print('Capacity:  {0} records of {1} bytes'.format(ring.getCapacity(), Ring.RECORD.size))
+    print('Records:   {0} available, {1} written in total'.format(end - first, end))
+    if end > first:
+        print('From:      {0}'.format(datetime.fromtimestamp(ring.read(first)[0]).isoformat()))
+        print('To:        {0}'.format(datetime.fromtimestamp(ring.read(end - 1)[0]).isoformat()))
+
+def main():
+    argParser = argparse.ArgumentParser(description='Raspberry PI : Fan Controller - Telemetry query')
+    argParser.add_argument('--file', dest='file', default=parentdir + '/data/telemetry/telemetry.ring', help='Telemetry file, see [Telemetry][Path]')
+    argParser.add_argument('--info', dest='info', action='store_true', help='Print the file capacity & time span, then exit')
+    argParser.add_argument('--from', dest='start', type=parseTime, default=0, help='Range start: now, -<duration> (e.g. --from=-7d), epoch secs or ISO date')
+    argParser.add_argument('--last', dest='last', type=parseDuration, default=None, help='Range start as a duration ago (e.g. 7d), same as --from=-7d')
+    argParser.add_argument('--to', dest='end', type=parseTime, default='now', help='Range end (exclusive), same formats as --from')
+    argParser.add_argument('--zone', dest='zone', type=int, default=None, help='Zone index (in config order), all zones by default')
+    argParser.add_argument('--bucket', dest='bucket', type=parseDuration, default=None, help='Downsample to min/max/mean per bucket (e.g. 1h), raw records by default')
+    argParser.add_argument('--format', dest='format', choices=('csv', 'npy'), default='csv', help='Output format')
+    argParser.add_argument('--output', dest='output', default=None, help='Output file, stdout by default (csv only)')
+
+    args = argParser.parse_args()
+
+    try:
+        ring = Ring(args.file, readOnly=True)
+    except ValueError as e:
+        argParser.error(str(e))
+
+    try:
+        if args.info:
+            info(ring, args.file)
+            return
+
+        start = time.time() - args.last if args.last is not None else args.start
+        end = args.end
+        if args.bucket is not None:
+            header = downsampleHeader()
+            rowsFactory = lambda: downsample(select(ring, start, end, args.zone), args.bucket)
+            count = None
+        else:
+            header = list(Ring.FIELDS)
+            rowsFactory = lambda: select(ring, start, end, args.zone)
+            count = sum(1 for row in rowsFactory()) if args.format == 'npy' else None
+
+        if args.format == 'npy':
+            if args.output is None:
+                argParser.error('--output is required with --format npy')
+            writeNumpy(rowsFactory, header, args.output, count)
+        else:
+            writeCsv(rowsFactory(), header, args.output)
+    except BrokenPipeError:
+        # Output piped to e.g. head, which exited early
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        ring.close()
+
+if __name__ == '__main__':
+    main()
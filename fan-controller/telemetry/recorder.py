@@ -0,0 +1,94 @@
+import time
+
+from config.config import Config
+from log.logger import Logger
+from .ring import Ring
+
+class Recorder:
+    """
+    Records the engine iterations to the telemetry ring, see [Telemetry] config section.
+
+    One record is written per zone every Interval secs. In between, iterations are folded in: the highest
+    temperature is kept so short spikes are not lost, fault bits are combined, other values are the latest.
+
+    Record timestamps never decrease, Ring.search() relies on it: a Pi has no RTC & the clock may step back once NTP
+    corrects fake-hwclock, records are then stamped with the last timestamp until the clock catches up.
+    """
+    __config = None
+    __logger = None
+    __ring = None
+
+    def __init__(self, config: Config, logger: Logger):
+        self.__config = config
+        self.__logger = logger
+        self.__pending = {}
+        self.__lastWrite = {}
+        self.__lastFlush = time.monotonic()
+        self.__lastTimestamp = 0
+        self.__clockBehind = False
+
+        telemetry = self.__config.getSnapshot().Telemetry
+        if not telemetry.Enabled:
+            return
+
+        try:
+            self.__ring = Ring(telemetry.Path, telemetry.Capacity)
+            first, end = self.__ring.getBounds()
+            if end > first:
+                self.__lastTimestamp = self.__ring.read(end - 1)[0]
+            self.__logger.info('Telemetry', message='Recording to {0}: Capacity [{1} records], Interval [{2} secs]'.format(telemetry.Path, self.__ring.getCapacity(), telemetry.Interval))
+        except (OSError, ValueError) as e:
+            self.__logger.error('Telemetry', message='Cannot open telemetry file {0}, not recording: {1}'.format(telemetry.Path, repr(e)))
+
+    def record(self, zone: int, status: dict):
+        """
+        Folds a zone iteration in, writing a record once Interval secs elapsed since the last one.
+
+        Parameters:
+        - zone (int): Zone index;
+        - status (dict): Zone status, see Zone.getStatus();
+        """
+        if self.__ring is None:
+            return
+
+        pending = self.__pending.get(zone)
+        if pending is None:
+            pending = self.__pending[zone] = dict(status)
+        else:
+            if status['temperature'] is not None and (pending['temperature'] is None or status['temperature'] > pending['temperature']):
+                pending['temperature'] = status['temperature']
+            faults = pending['faults'] | status['faults']
+            pending.update({key: value for key, value in status.items() if key not in ('temperature', 'faults')})
+            pending['faults'] = faults
+
+        telemetry = self.__config.getSnapshot().Telemetry
+        now = time.monotonic()
+        if zone in self.__lastWrite and now - self.__lastWrite[zone] < telemetry.Interval:
+            return
+
+        timestamp = time.time()
+        if timestamp < self.__lastTimestamp:
+            if not self.__clockBehind:
+                self.__logger.warning('Telemetry', message='Clock stepped back {0:.0f} secs behind the last record, records keep its timestamp until the clock catches up'.format(self.__lastTimestamp - timestamp))
+            self.__clockBehind = True
+            timestamp = self.__lastTimestamp
+        elif self.__clockBehind:
+            self.__clockBehind = False
+            self.__logger.info('Telemetry', message='Clock caught up with the last record')
+        self.__lastTimestamp = timestamp
+
+        try:
+            self.__ring.append(timestamp, pending['temperature'], pending['dutyCycle'], zone, pending['tachAvgPulses'], pending['tachRepeatedPulses'], pending['rpm'], pending['relayOn'], pending['faults'])
+            if now - self.__lastFlush >= telemetry.FlushInterval:
+                self.__ring.flush()
+                self.__lastFlush = now
+        except (OSError, ValueError) as e:
+            self.__logger.error('Telemetry', message='Cannot write telemetry record: {0}'.format(repr(e)))
+
+        self.__lastWrite[zone] = now
+        del self.__pending[zone]
+
+    def close(self):
+        if self.__ring is not None:
+            self.__ring.close()
+            self.__ring = None
@@ -0,0 +1,190 @@
+import mmap
+import os
+import struct
+
+class Ring:
+    """
+    A fixed size file of packed telemetry records, memory mapped & written as a ring.
+
+    The header holds the total number of records ever written, records are stored at (count % capacity),
+    so the file never grows and the oldest records are overwritten first. Records are appended in time
+    order, time ranges are looked up with a binary search over the mapped file rather than by loading it.
+    """
+
+    MAGIC = b'FCTR'
+    VERSION = 1
+
+    # magic, version, record size, capacity, count
+    HEADER = struct.Struct('<4sHHIQ')
+    HEADER_SIZE = 64
+
+    # timestamp (epoch secs), temperature (centi-degrees), duty cycle (%), zone index, tach average pulses,
+    # tach repeated pulses, rpm, relay state, fault bits
+    RECORD = struct.Struct('<IhBBHHHBB')
+    FIELDS = ('timestamp', 'temperature', 'duty', 'zone', 'tach_avg', 'tach_repeated', 'rpm', 'relay', 'faults')
+
+    # Encoding of missing values
+    NO_TEMPERATURE = -32768
+    NO_DUTY = 255
+
+    def __init__(self, path: str, capacity: int = None, readOnly: bool = False):
+        """
+        Opens a ring file, creating it when missing.
+
+        Parameters:
+        - path (str): Ring file path;
+        - capacity (int): Number of records, required to create the file. An existing file with another capacity is recreated;
+        - readOnly (bool): Whether to open an existing file for reading only;
+
+        Raises:
+        - ValueError : When the file is not a ring file, or is missing in read only mode;
+        """
+        self.__path = path
+        self.__readOnly = readOnly
+
+        if readOnly:
+            if not os.path.exists(path):
+                raise ValueError('Telemetry file not found: {0}'.format(path))
+        elif not os.path.exists(path) or self.__readHeader(path)[1:3] != (self.RECORD.size, capacity):
+            self.__create(path, capacity)
+
+        self.__file = open(path, 'rb' if readOnly else 'r+b')
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ if readOnly else mmap.ACCESS_WRITE)
+
+        magic, version, recordSize, self.__capacity, count = self.HEADER.unpack_from(self.__map, 0)
+        if magic != self.MAGIC or version != self.VERSION or recordSize != self.RECORD.size:
+            self.close()
+            raise ValueError('Not a telemetry file (or an unsupported version): {0}'.format(path))
+
+    def close(self):
+        if self.__map is not None:
+            if not self.__readOnly:
+                self.__map.flush()
+            self.__map.close()
+            self.__map = None
+        self.__file.close()
+
+    def getCapacity(self):
+        return self.__capacity
+
+    def getCount(self):
+        """
+        Returns the total number of records ever written, including the overwritten ones.
+        """
+        return self.HEADER.unpack_from(self.__map, 0)[4]
+
+    def getBounds(self):
+        """
+        Returns the (first, end) logical indexes of the records available.
+        """
+        count = self.getCount()
+        return max(0, count - self.__capacity), count
+
+    def append(self, timestamp: float, temperature: float, duty: int, zone: int, tachAvg: int, tachRepeated: int, rpm: int, relay: bool, faults: int):
+        count = self.getCount()
+        self.RECORD.pack_into(self.__map, self.__offset(count),
+            int(timestamp),
+            self.NO_TEMPERATURE if temperature is None else self.__clamp(round(temperature * 100), -32767, 32767),
+            self.NO_DUTY if duty is None or duty < 0 else self.__clamp(int(duty), 0, 100),
+            self.__clamp(zone, 0, 255),
+            self.__clamp(int(tachAvg), 0, 65535),
+            self.__clamp(int(tachRepeated), 0, 65535),
+            self.__clamp(int(rpm), 0, 65535),
+            1 if relay else 0,
+            self.__clamp(faults, 0, 255))
+        # The count is only bumped once the record is complete, so readers never see a partial one
+        struct.pack_into('<Q', self.__map, self.HEADER.size - 8, count + 1)
+
+    def flush(self):
+        """
+        Writes dirty pages to disk, the kernel otherwise writes them back on its own schedule.
+        """
+        self.__map.flush()
+
+    def read(self, index: int):
+        """
+        Reads a record by logical index.
+
+        Returns:
+        - tuple : Decoded record, see FIELDS. Temperature in degrees, None when missing;
+        """
+        return self.decode(self.RECORD.unpack_from(self.__map, self.__offset(index)))
+
+    def readRaw(self, start: int, end: int):
+        """
+        Returns the packed records between two logical indexes, at most up to the end of the file.
+
+        Returns:
+        - (bytes, int) : Packed records & the logical index following the last one;
+        """
+        position = start % self.__capacity
+        end = min(end, start + self.__capacity - position)
+        offset = self.__offset(start)
+        return self.__map[offset:offset + (end - start) * self.RECORD.size], end
+
+    def iterate(self, start: int, end: int, chunk: int = 4096):
+        """
+        Iterates decoded records between two logical indexes, in chunks so memory stays bounded.
+        """
+        while start < end:
+            data, following = self.readRaw(start, min(end, start + chunk))
+            for record in self.RECORD.iter_unpack(data):
+                yield self.decode(record)
+            start = following
+
+    def search(self, timestamp: float):
+        """
+        Returns the logical index of the first record at or after a timestamp.
+        """
+        low, high = self.getBounds()
+        while low < high:
+            middle = (low + high) // 2
+            if struct.unpack_from('<I', self.__map, self.__offset(middle))[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @classmethod
+    def decode(cls, record: tuple):
+        timestamp, temperature, duty, zone, tachAvg, tachRepeated, rpm, relay, faults = record
+        return (timestamp, None if temperature == cls.NO_TEMPERATURE else temperature / 100, None if duty == cls.NO_DUTY else duty, zone, tachAvg, tachRepeated, rpm, relay, faults)
+
+    def __offset(self, index: int):
+        return self.HEADER_SIZE + (index % self.__capacity) * self.RECORD.size
+
+    @staticmethod
+    def __clamp(value: int, low: int, high: int):
+        return max(low, min(high, value))
+
+    @classmethod
+    def __readHeader(cls, path: str):
+        with open(path, 'rb') as f:
+            data = f.read(cls.HEADER.size)
+        if len(data) < cls.HEADER.size:
+            return (None, None, None, None)
+        magic, version, recordSize, capacity, count = cls.HEADER.unpack(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            return (None, None, None, None)
+        return (magic, recordSize, capacity, count)
+
+    @classmethod
+    def __create(cls, path: str, capacity: int):
+        if not capacity or capacity < 1:
+            raise ValueError('Telemetry capacity must be at least 1 record')
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Keep a previous file with another layout rather than silently losing its history
+        if os.path.exists(path):
+            os.replace(path, path + '.old')
+
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            header = cls.HEADER.pack(cls.MAGIC, cls.VERSION, cls.RECORD.size, capacity, 0)
+            f.write(header + b'\0' * (cls.HEADER_SIZE - len(header)))
+            # Sparse until written, the file only takes disk space as records come in
+            f.truncate(cls.HEADER_SIZE + capacity * cls.RECORD.size)
+        os.replace(temporary, path)
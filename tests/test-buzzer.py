@@ -1,7 +1,7 @@
 import os
 import sys
 import inspect
-import time
+import asyncio
 
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
@@ -15,15 +15,20 @@ from engine.buzzer.buzzer import Buzzer
 config = Config(parentdir + '/data/config/default.ini')
 logger = Logger(parentdir + '/data/logs/', 'Debug', verbose=True, debug=True)
 
-buzzer = Buzzer(config,logger)
+async def main():
+    buzzer = Buzzer(config,logger)
 
-logger.info('Test', message='Buzzer test activated [press ctrl+c to end the test]...')
+    logger.info('Test', message='Buzzer test activated [press ctrl+c to end the test]...')
 
-buzzer.buzzIntermittent()
+    buzzer.buzzIntermittent()
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await buzzer.shutdown()
 
 try:
-    while True:
-        time.sleep(1)
+    asyncio.run(main())
 except KeyboardInterrupt:
-    buzzer.shutdown()
+    exit(0)
 
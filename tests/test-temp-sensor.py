@@ -1,7 +1,7 @@
 import os
 import sys
 import inspect
-import time
+import asyncio
 
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
@@ -15,14 +15,22 @@ from engine.temperature.temperature import Temperature
 config = Config(parentdir + '/data/config/default.ini')
 logger = Logger(parentdir + '/data/logs/', 'Debug', verbose=True, debug=True)
 
-temperature = Temperature(config,logger)
+async def main():
+    temperature = Temperature(config,logger)
+    temperature.start()
+    await temperature.waitReady(timeout=5)
 
-logger.info('Test', message='Temp sensor test activated [press ctrl+c to end the test]...')
+    logger.info('Test', message='Temp sensor test activated [press ctrl+c to end the test]...')
+
+    try:
+        while True:
+            for temp, timestamp, age in temperature.getLatest():
+                logger.info('Test', message='Temp measured: {0} ({1:.1f} secs old)'.format(temp, age if age is not None else 0))
+            await asyncio.sleep(5)
+    finally:
+        await temperature.stop()
 
 try:
-    while True:
-        temp = temperature.read()
-        logger.info('Test', message='Temp measured: {0}'.format(temp))
-        time.sleep(5)
+    asyncio.run(main())
 except KeyboardInterrupt:
     exit(0)
\ No newline at end of file